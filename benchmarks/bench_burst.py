@@ -0,0 +1,50 @@
+"""
+Measure the cost of the high-frequency burst sampler.
+
+Prints the time per sample() and per report() call, and the CPU share the
+sampler takes when run by the scheduler at the given period.
+
+Usage: python benchmarks/bench_burst.py [interface] [period_ms] [seconds]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import time
+import timeit
+
+from burst import BurstSampler
+from interface_stats import InterfaceStats
+from scheduler import Scheduler
+
+def main():
+    interface = sys.argv[1] if len(sys.argv) > 1 else InterfaceStats().interface_name
+    period = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    sampler = BurstSampler(interface, period=period)
+    source = 'sysfs' if sampler._fds is not None else '/proc/net/dev'
+    print(f"Interface {interface} ({source}), period {period * 1000:.0f} ms")
+
+    number = 20000
+    per_sample = timeit.timeit(sampler.sample, number=number) / number
+    print(f"sample(): {per_sample * 1e6:.2f} us")
+
+    number = 200
+    per_report = timeit.timeit(lambda: sampler.report(since=0), number=number) / number
+    print(f"report() over {min(sampler._total, sampler.capacity)} samples: {per_report * 1e3:.2f} ms")
+
+    scheduler = Scheduler()
+    scheduler.add_job('bursts', sampler.sample, period=period)
+    cpu, wall = time.process_time(), time.monotonic()
+    scheduler.start()
+    time.sleep(seconds)
+    scheduler.stop(timeout=1)
+    cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+
+    job = scheduler.jobs['bursts']
+    print(f"Scheduled: {job.runs} samples in {wall:.1f} s, {job.overruns} overruns, "
+          f"CPU {cpu / wall * 100:.2f}% of one core")
+    sampler.close()
+
+if __name__ == '__main__':
+    main()
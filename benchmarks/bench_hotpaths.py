@@ -0,0 +1,284 @@
+"""
+Benchmark the probe, parse, collect and render hot paths.
+
+Runs without network access: the ping and traceroute binaries are replaced
+by the instant stand-ins in benchmarks/fake_bin, native ICMP probes go to
+loopback, and graph data is synthetic with a fixed seed. Measures
+
+- probe: ping() throughput through the subprocess and native paths, and a
+  NetworkHeatmap.measure() sweep
+- parse: ping and traceroute output parsing
+- render: update_series_graph latency and serialized payload size for full
+  figures and deltas at 1k, 10k and 100k stored points, rendered and served
+  from the shared render cache
+- instrumentation: the cost of one stage timer, relative to a native
+  loopback ping() (one timer) and to a status panel update request (three)
+
+Results are written as JSON together with the environment, so runs on
+different commits can be compared with --compare.
+
+Usage: python benchmarks/bench_hotpaths.py [--quick] [--output FILE] [--compare FILE]
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from unittest.mock import patch
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+FAKE_BIN = os.path.join(ROOT, 'benchmarks', 'fake_bin')
+sys.path.insert(0, SRC)
+os.environ['PATH'] = FAKE_BIN + os.pathsep + os.environ.get('PATH', '')
+# Importing main must not touch the user's history
+os.environ.setdefault('PINGCANVAS_DATA', tempfile.mkdtemp(prefix='pingcanvas-bench-'))
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+import icmp
+from ping import ping, _parse_ping_output
+from traceroute import traceroute, _parse_traceroute_output
+from heatmap import NetworkHeatmap
+from timeseries import TimeSeriesStore
+from snapshot import SnapshotPublisher
+from instrumentation import Timings, timings
+
+SEED = 1234
+SERIES_SIZES = (1_000, 10_000, 100_000)
+
+def timed(function, repeat):
+    """Call function repeat times and return (mean seconds per call, last result)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+def percentiles(function, repeat):
+    """Time each call separately and return p50/p95 in ms"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {
+        'p50_ms': float(np.percentile(durations, 50) * 1000),
+        'p95_ms': float(np.percentile(durations, 95) * 1000)
+    }
+
+def ping_output(count, rng):
+    lines = ["PING 192.0.2.1 (192.0.2.1) 56(84) bytes of data."]
+    rtts = rng.uniform(5, 50, count)
+    lines += [f"64 bytes from 192.0.2.1: icmp_seq={i + 1} ttl=57 time={rtt:.1f} ms"
+              for i, rtt in enumerate(rtts)]
+    lines += ["", "--- 192.0.2.1 ping statistics ---",
+              f"{count} packets transmitted, {count} received, 0% packet loss, time {count}ms",
+              f"rtt min/avg/max/mdev = {rtts.min():.3f}/{rtts.mean():.3f}/{rtts.max():.3f}/{rtts.std():.3f} ms"]
+    return "\n".join(lines) + "\n"
+
+def traceroute_output(hops, rng):
+    lines = [f"traceroute to 192.0.2.1 (192.0.2.1), {hops} hops max, 60 byte packets"]
+    for hop in range(1, hops + 1):
+        if rng.random() < 0.1:
+            lines.append(f" {hop}  * * *")
+        else:
+            rtts = rng.uniform(1, 80, 3)
+            lines.append(f" {hop}  10.{hop}.0.1  " + "  ".join(f"{rtt:.3f} ms" for rtt in rtts))
+    return "\n".join(lines) + "\n"
+
+def bench_probe(quick):
+    results = {}
+    repeat = 20 if quick else 100
+    with patch('icmp.available', return_value=False):
+        seconds, _ = timed(lambda: ping('192.0.2.1', count=1, timeout=1), repeat)
+        results['ping_subprocess'] = {'probes_per_s': 1 / seconds, 'ms_per_probe': seconds * 1000}
+        seconds, _ = timed(lambda: traceroute('192.0.2.1', timeout=1), repeat)
+        results['traceroute_subprocess'] = {'ms_per_trace': seconds * 1000}
+
+        hosts = [f"192.0.2.{i % 254 + 1}" for i in range(64 if quick else 256)]
+        heatmap = NetworkHeatmap(hosts, interval_minutes=1, history_hours=1, sweep_deadline=60)
+        seconds, stats = timed(heatmap.measure, 2 if quick else 5)
+        results['heatmap_sweep_subprocess'] = {
+            'hosts': len(hosts),
+            'probes_per_s': len(hosts) * 2 / seconds,
+            'ms_per_sweep': seconds * 1000,
+            'responded': stats['responded']
+        }
+
+    if icmp.available():
+        seconds, _ = timed(lambda: ping('127.0.0.1', count=1, timeout=1), repeat * 10)
+        results['ping_native'] = {'probes_per_s': 1 / seconds, 'ms_per_probe': seconds * 1000}
+        hosts = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(256 if quick else 2048)]
+        heatmap = NetworkHeatmap(hosts, interval_minutes=1, history_hours=1, sweep_deadline=60)
+        seconds, stats = timed(heatmap.measure, 2 if quick else 5)
+        results['heatmap_sweep_native'] = {
+            'hosts': len(hosts),
+            'probes_per_s': len(hosts) * 2 / seconds,
+            'ms_per_sweep': seconds * 1000,
+            'responded': stats['responded']
+        }
+    return results
+
+def bench_parse(quick):
+    rng = np.random.default_rng(SEED)
+    repeat = 2_000 if quick else 20_000
+    results = {}
+    for count in (1, 4, 100):
+        output = ping_output(count, rng)
+        seconds, _ = timed(lambda: _parse_ping_output(output, count), repeat)
+        results[f'ping_{count}'] = {'us_per_parse': seconds * 1e6}
+    for hops in (12, 30):
+        output = traceroute_output(hops, rng)
+        seconds, _ = timed(lambda: _parse_traceroute_output(output), repeat)
+        results[f'traceroute_{hops}'] = {'us_per_parse': seconds * 1e6}
+    return results
+
+def payload_bytes(outputs):
+    """Size of the callback outputs as Dash serializes them, skipping no_update"""
+    import dash
+    return sum(len(to_json_plotly(output)) for output in outputs if output is not dash.no_update)
+
+def bench_render(quick):
+    import dash
+    import main
+
+    rng = np.random.default_rng(SEED)
+    repeat = 5 if quick else 30
+    results = {}
+    ctx = patch.object(dash, 'ctx', type('Context', (), {'triggered_id': 'interval-component'})())
+    for size in SERIES_SIZES:
+        store = TimeSeriesStore(size, ('ping', 'download', 'upload'))
+        start = time.time_ns() // 1_000_000 - size * 1000
+        latency = rng.gamma(4, 5, size)
+        for i in range(size):
+            store.append(start + i * 1000, ping=latency[i], download=80 + latency[i], upload=20)
+
+        snapshots = SnapshotPublisher(store.columns, ())
+        snapshots.publish(series=store)
+
+        entry = {}
+        with ctx, patch.object(main, 'snapshots', snapshots):
+            for graph in main.SERIES_GRAPHS:
+                def full():
+                    main.render_cache.clear()
+                    return main.update_series_graph(graph, None, None)
+
+                entry[f'{graph}_full'] = dict(percentiles(full, repeat), bytes=payload_bytes(full()))
+                entry[f'{graph}_full_cached'] = percentiles(
+                    lambda: main.update_series_graph(graph, None, None), repeat * 10)
+                # One new sample since the client's last update
+                cursor = {'total': store.total - 1, 'full': store.total - 1}
+
+                def delta():
+                    main.render_cache.clear()
+                    return main.update_series_graph(graph, cursor, None)
+
+                entry[f'{graph}_delta'] = dict(percentiles(delta, repeat * 10), bytes=payload_bytes(delta()))
+        results[f'{size}_points'] = entry
+    return results
+
+def bench_instrumentation(quick):
+    repeat = 100_000 if quick else 1_000_000
+    local = Timings()
+
+    def timer():
+        with local.time('stage'):
+            pass
+
+    results = {'timer': {'ns_per_call': timed(timer, repeat)[0] * 1e9}}
+    local.enabled = False
+    results['timer_disabled'] = {'ns_per_call': timed(timer, repeat)[0] * 1e9}
+
+    timer_ns = results['timer']['ns_per_call']
+    if icmp.available():
+        probe, _ = timed(lambda: ping('127.0.0.1', count=1, timeout=1), repeat // 100)
+        results['ping_native'] = {'overhead_pct': timer_ns / (probe * 1e9) * 100}
+
+    import main
+    client = main.app.server.test_client()
+    request = {
+        'output': '..status-display.children...status-version.data..',
+        'outputs': [{'id': 'status-display', 'property': 'children'},
+                    {'id': 'status-version', 'property': 'data'}],
+        'inputs': [{'id': 'status-interval', 'property': 'n_intervals', 'value': 1}],
+        'changedPropIds': ['status-interval.n_intervals'],
+        'state': [{'id': 'status-version', 'property': 'data', 'value': None}]
+    }
+    update, _ = timed(lambda: client.post('/_dash-update-component', json=request), repeat // 1000)
+    # The callback, its request and the encoding each record a stage
+    results['status_request'] = {'overhead_pct': 3 * timer_ns / (update * 1e9) * 100}
+    timings.reset()
+    return results
+
+BENCHMARKS = {
+    'probe': bench_probe,
+    'parse': bench_parse,
+    'render': bench_render,
+    'instrumentation': bench_instrumentation
+}
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'native_icmp': icmp.available(),
+        'seed': SEED
+    }
+
+def flatten(results, prefix=''):
+    """Flatten nested results into {'group.case.metric': value}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+def compare(previous, current):
+    before = flatten(previous['results'])
+    after = flatten(current['results'])
+    print(f"\nCompared with {previous['environment'].get('commit')}:")
+    for key in sorted(after):
+        if key in before and before[key]:
+            print(f"  {key:<50} {before[key]:>12.3f} -> {after[key]:>12.3f} "
+                  f"({(after[key] / before[key] - 1) * 100:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true', help='fewer repetitions')
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append',
+                        help='run only this group; may be repeated')
+    parser.add_argument('--output', default='bench_hotpaths.json', help='JSON results file')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+
+    report = {'environment': environment(), 'results': {}}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", flush=True)
+        report['results'][name] = BENCHMARKS[name](args.quick)
+        for key, value in flatten(report['results'][name]).items():
+            print(f"  {key:<50} {value:>12.3f}")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
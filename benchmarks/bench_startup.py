@@ -0,0 +1,85 @@
+"""
+Measure how long the dashboard takes to start.
+
+Prints the import time of main and of the modules it imports, and the time
+from launching `python src/main.py` (with the debug reloader, as users run
+it) until the page and its layout are served. History is written to a
+temporary directory.
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import sys
+import os
+import re
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '../src'))
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def import_times():
+    """Return (module, self us, cumulative us) for main and its direct imports"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=SRC, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # Depth 0 is main itself (and interpreter startup); depth 1 are its imports
+        if match and len(match.group(3)) <= 3:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return modules
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+def time_to_first_response(timeout=60):
+    """Return seconds until / and /_dash-layout answer, or None on timeout"""
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data:
+        env = dict(os.environ, PORT=str(port), PINGCANVAS_DATA=data)
+        start = time.monotonic()
+        process = subprocess.Popen([sys.executable, 'main.py'], cwd=SRC, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+        try:
+            base = f'http://127.0.0.1:{port}'
+            deadline = start + timeout
+            if not (wait_for(base + '/', deadline) and wait_for(base + '/_dash-layout', deadline)):
+                return None
+            return time.monotonic() - start
+        finally:
+            # The reloader child is in the same session
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    modules = import_times()
+    print("Import time (cumulative, ms):")
+    for name, _, cumulative in sorted(modules, key=lambda m: -m[2])[:15]:
+        print(f"  {name:<20} {cumulative / 1000:8.1f}")
+
+    results = [time_to_first_response() for _ in range(runs)]
+    served = [r for r in results if r is not None]
+    print(f"Time to first response over {runs} runs: " +
+          (f"best {min(served):.2f} s, worst {max(served):.2f} s" if served else "no response"))
+
+if __name__ == '__main__':
+    main()
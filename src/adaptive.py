@@ -0,0 +1,211 @@
+import math
+import threading
+import time
+import numpy as np
+from sweep import sweep
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Initialize a token bucket limiting probe packets per second.
+
+        :param rate: Tokens added per second
+        :param burst: Most tokens that can accumulate, and the most debt
+                      charge() can run up; defaults to one second's worth
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, n=1, now=None):
+        """
+        Take up to n tokens.
+
+        :return: Number of tokens granted, possibly 0
+        """
+        with self._lock:
+            self._refill(now)
+            granted = max(0, min(n, int(self.tokens)))
+            self.tokens -= granted
+            return granted
+
+    def charge(self, n=1, now=None):
+        """
+        Spend n tokens for probes that go out regardless of the budget.
+
+        The bucket may go into debt of up to burst tokens, which holds back
+        take() until it is paid off, so the total rate stays within the
+        budget as long as the charged rate does.
+        """
+        with self._lock:
+            self._refill(now)
+            self.tokens = max(self.tokens - n, -self.burst)
+
+class AdaptiveProber:
+    def __init__(self, hosts, budget, min_interval=1, max_interval=60, backoff=1.5,
+                 alpha=0.2, change_sigmas=3, min_deviation=1.0, sensitivity=10):
+        """
+        Initialize per-host probe intervals that follow how each host behaves.
+
+        Every reply updates a moving mean, variance and loss rate of its host.
+        A host that starts or stops answering, or whose round-trip time is
+        more than change_sigmas standard deviations off the mean, goes back
+        to min_interval. Otherwise its interval grows by backoff per probe, up
+        to max_interval divided by 1 + sensitivity * (coefficient of variation
+        + loss rate), so jittery and lossy hosts stay sampled more often than
+        stable ones. A host that stays unreachable backs off to max_interval,
+        so dead targets do not use up the budget. All probes
+        are paid for from a shared TokenBucket; when it runs dry the most
+        overdue hosts go first and the rest wait.
+
+        :param hosts: List of hosts
+        :param budget: TokenBucket of probe packets per second
+        :param min_interval: Shortest seconds between probes of a host
+        :param max_interval: Longest seconds between probes of a host
+        :param backoff: Interval growth factor per unremarkable probe
+        :param alpha: Weight of the newest probe in the moving statistics
+        :param change_sigmas: Deviation from the mean counted as a change
+        :param min_deviation: Smallest deviation in ms counted as a change, so
+                              near-constant hosts do not flap
+        :param sensitivity: How strongly variance and loss shorten the interval
+        """
+        self.hosts = hosts
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.alpha = alpha
+        self.change_sigmas = change_sigmas
+        self.min_deviation = min_deviation
+        self.sensitivity = sensitivity
+
+        self.mean = np.full(len(hosts), np.nan)
+        self.var = np.zeros(len(hosts))
+        self.loss = np.zeros(len(hosts))
+        self.interval = np.full(len(hosts), float(min_interval))
+        # Monotonic time each host is next due; all are due at the start
+        self.next_due = np.zeros(len(hosts))
+        # Latest round-trip time (NaN for no reply) and epoch-ms probe time
+        self.latency = np.full(len(hosts), np.nan)
+        self.updated = np.zeros(len(hosts))
+        self.probes = 0
+        self.deferred = 0
+        self._lock = threading.Lock()
+
+    def due(self, now=None):
+        """
+        Claim the hosts to probe now, as many as the budget allows.
+
+        Claimed hosts are not handed out again until their interval passes,
+        even if their probe is lost; hosts that did not fit stay due.
+
+        :return: List of host indices, most overdue first
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            overdue = np.flatnonzero(self.next_due <= now)
+            if not len(overdue):
+                return []
+            granted = self.budget.take(len(overdue), now)
+            chosen = overdue[np.argsort(self.next_due[overdue], kind='stable')[:granted]]
+            self.next_due[chosen] = now + self.interval[chosen]
+            self.deferred += len(overdue) - granted
+            return chosen.tolist()
+
+    def record(self, index, latency, now=None):
+        """
+        Record the result of one probe and schedule the host's next one.
+
+        :param index: Host index
+        :param latency: Round-trip time in ms, or None if lost
+        """
+        now = time.monotonic() if now is None else now
+        lost = latency is None or math.isnan(latency)
+        with self._lock:
+            mean, std = self.mean[index], math.sqrt(self.var[index])
+            was_lost = self.updated[index] > 0 and math.isnan(self.latency[index])
+            if lost:
+                # Going unreachable is a change, staying unreachable is not
+                changed = not was_lost
+            elif math.isnan(mean):
+                changed = was_lost
+                self.mean[index] = latency
+            else:
+                deviation = latency - mean
+                changed = was_lost or abs(deviation) > self.change_sigmas * max(std, self.min_deviation)
+                self.mean[index] = mean + self.alpha * deviation
+                self.var[index] = (1 - self.alpha) * (self.var[index] + self.alpha * deviation ** 2)
+            self.loss[index] += self.alpha * (lost - self.loss[index])
+
+            if changed:
+                interval = self.min_interval
+            elif lost:
+                interval = self.interval[index] * self.backoff
+            else:
+                mean = self.mean[index]
+                variation = math.sqrt(self.var[index]) / mean if mean > 0 else 0.0
+                ceiling = self.max_interval / (1 + self.sensitivity * (variation + self.loss[index]))
+                interval = min(self.interval[index] * self.backoff, ceiling)
+            self.interval[index] = min(max(interval, self.min_interval), self.max_interval)
+            self.next_due[index] = now + self.interval[index]
+
+            self.latency[index] = np.nan if lost else latency
+            self.updated[index] = time.time() * 1000
+            self.probes += 1
+
+    def run(self, probe, max_workers=32, deadline=None):
+        """
+        Probe the hosts that are due and record the results.
+
+        :param probe: Callable taking a host and returning a latency in ms or
+                      None; it should send a single packet
+        :param max_workers: Maximum number of probes in flight at once
+        :param deadline: Seconds the probes may take, see sweep.sweep
+        :return: Sweep statistics of the probed hosts
+        """
+        indices = self.due()
+        hosts = [self.hosts[i] for i in indices]
+        latencies, stats = sweep(hosts, probe, max_workers=max_workers, deadline=deadline)
+        for i, latency in zip(indices, latencies):
+            self.record(i, latency)
+        return stats
+
+    def snapshot(self, max_age=None):
+        """
+        Copy the latest round-trip times.
+
+        :param max_age: Seconds after which a result counts as missing; None
+                        keeps all
+        :return: Tuple of (latencies in ms with NaN for no reply, epoch-ms
+                 probe times) as arrays in host order
+        """
+        with self._lock:
+            latency = self.latency.copy()
+            updated = self.updated.copy()
+        if max_age is not None:
+            latency[updated < time.time() * 1000 - max_age * 1000] = np.nan
+        return latency, updated
+
+    def stats(self):
+        """
+        Summarize the probe schedule.
+
+        :return: Dictionary of probes sent, how often a due host was held
+                 back for lack of budget, and the mean, min and max interval
+                 in seconds
+        """
+        with self._lock:
+            return {
+                'probes': self.probes,
+                'deferred': self.deferred,
+                'mean_interval': float(self.interval.mean()) if len(self.hosts) else None,
+                'min_interval': float(self.interval.min()) if len(self.hosts) else None,
+                'max_interval': float(self.interval.max()) if len(self.hosts) else None
+            }
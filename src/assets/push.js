@@ -0,0 +1,137 @@
+// Push mode: applies the samples and panel versions the server streams from
+// /events instead of polling. See main.events for the event types.
+(function () {
+    'use strict';
+
+    var PANEL_INTERVALS = {
+        status: 'status-interval',
+        traceroute: 'traceroute-interval',
+        heatmap: 'heatmap-interval'
+    };
+    var ALL_INTERVALS = ['interval-component', 'status-interval', 'traceroute-interval', 'heatmap-interval'];
+
+    var config = null;
+    // Per graph: the meta of the figure on screen (a new figure brings a new
+    // meta object), the total of the last sample appended, and whether a new
+    // figure has been requested
+    var graphs = {};
+    var ticks = 0;
+
+    function setProps(id, props) {
+        window.dash_clientside.set_props(id, props);
+    }
+
+    // Changing n_intervals runs the callbacks of a disabled interval once
+    function tick(id) {
+        ticks += 1;
+        setProps(id, {n_intervals: ticks});
+    }
+
+    function plotOf(graph) {
+        var container = document.getElementById(graph + '-graph');
+        return container && container.querySelector('.js-plotly-plot');
+    }
+
+    // Clearing the cursor makes the next update a full figure
+    function reload(graph) {
+        var plot = plotOf(graph);
+        graphs[graph] = {meta: plot && plot.layout && plot.layout.meta, reloading: true};
+        setProps(graph + '-cursor', {data: null});
+    }
+
+    function resync() {
+        if (config) {
+            Object.keys(config.graphs).forEach(reload);
+        }
+        ALL_INTERVALS.forEach(tick);
+    }
+
+    function pollInstead() {
+        ALL_INTERVALS.forEach(function (id) {
+            setProps(id, {disabled: false});
+        });
+    }
+
+    function applySample(graph, columns, sample) {
+        var plot = plotOf(graph);
+        var meta = plot && plot.layout && plot.layout.meta;
+        if (!meta || meta.zoomed) {
+            return;  // No live figure yet, or the user is looking at history
+        }
+        var state = graphs[graph];
+        if (!state || state.meta !== meta) {
+            state = graphs[graph] = {meta: meta, applied: meta.total};
+        }
+        if (state.reloading || sample.total <= state.applied) {
+            return;
+        }
+        if (sample.total > state.applied + 1) {
+            // Samples were missed; start over from a full figure
+            reload(graph);
+            tick('interval-component');
+            return;
+        }
+
+        setProps(graph + '-graph', {
+            extendData: [
+                {x: columns.map(function () { return [sample.x]; }),
+                 y: columns.map(function (column) { return [sample[column]]; })},
+                columns.map(function (column, i) { return i; }),
+                config.history
+            ]
+        });
+        state.applied = sample.total;
+        setProps(graph + '-cursor', {data: {total: sample.total, full: meta.total}});
+
+        // A downsampled figure is rebuilt now and then, as when polling
+        if (meta.downsampled && sample.total - meta.total >= config.refresh) {
+            tick('interval-component');
+        }
+    }
+
+    function connect(url) {
+        var source = new EventSource(url);
+        var connected = false;
+
+        source.addEventListener('config', function (event) {
+            config = JSON.parse(event.data);
+            if (connected) {
+                resync();  // Events may have been missed while reconnecting
+            }
+            connected = true;
+        });
+        source.addEventListener('sample', function (event) {
+            var sample = JSON.parse(event.data);
+            Object.keys(config.graphs).forEach(function (graph) {
+                applySample(graph, config.graphs[graph], sample);
+            });
+        });
+        source.addEventListener('version', function (event) {
+            var version = JSON.parse(event.data);
+            if (PANEL_INTERVALS[version.panel]) {
+                tick(PANEL_INTERVALS[version.panel]);
+            }
+        });
+        source.addEventListener('dropped', resync);
+    }
+
+    // The layout is rendered after this script runs
+    function start() {
+        var element = document.getElementById('push');
+        if (!element || !window.dash_clientside || !window.dash_clientside.set_props) {
+            setTimeout(start, 100);
+            return;
+        }
+        var url = element.getAttribute('data-url');
+        if (!url) {
+            return;  // Push mode is off; the intervals poll
+        }
+        if (window.EventSource) {
+            connect(url);
+        } else {
+            pollInstead();
+        }
+    }
+
+    start();
+})();
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+import numpy as np
+import psutil
+
+from interface_stats import NetDevSampler, FIELD_INDEX, counter_deltas
+
+SYS_CLASS_NET = '/sys/class/net'
+DIRECTIONS = ('recv', 'sent')
+
+class BurstSampler:
+    def __init__(self, interface_name, period=0.02, window=60, threshold_mbps=None,
+                 sys_path=SYS_CLASS_NET):
+        """
+        Initialize a high-frequency byte counter sampler for one interface.
+
+        sample() is meant to run every 10-100 ms, e.g. as a scheduler job. It
+        only reads the interface's rx_bytes and tx_bytes from sysfs through
+        descriptors that stay open, and writes them into a preallocated ring
+        buffer, so a sample costs a few microseconds. All rate computation
+        happens in report(), once per dashboard interval. Where sysfs is not
+        available the interface's row of /proc/net/dev is used instead.
+
+        :param interface_name: Interface to sample
+        :param period: Intended seconds between samples, used to size the buffer
+        :param window: Seconds of samples kept
+        :param threshold_mbps: Rate above which a sample counts as part of a
+                               burst. Defaults to 80% of the link speed, or no
+                               burst counting if the link speed is unknown.
+        :param sys_path: Root of the sysfs network class directory
+        """
+        self.interface_name = interface_name
+        self.period = period
+        self.capacity = int(window / period) + 1
+        if threshold_mbps is None:
+            stats = psutil.net_if_stats().get(interface_name)
+            threshold_mbps = stats.speed * 0.8 if stats and stats.speed else None
+        self.threshold_mbps = threshold_mbps
+
+        self._times = np.zeros(self.capacity)
+        self._counters = np.zeros((self.capacity, len(DIRECTIONS)), dtype=np.uint64)
+        self._total = 0
+        self._lock = threading.Lock()
+        self._reported = time.monotonic()
+
+        statistics = os.path.join(sys_path, interface_name, 'statistics')
+        try:
+            self._fds = [os.open(os.path.join(statistics, f'{name}_bytes'), os.O_RDONLY)
+                         for name in ('rx', 'tx')]
+            self._proc = None
+        except OSError:
+            self._fds = None
+            self._proc = NetDevSampler()
+
+    def _read(self):
+        if self._fds is not None:
+            return [int(os.pread(fd, 32, 0)) for fd in self._fds]
+        names, counters = self._proc.snapshot()
+        row = counters[names.index(self.interface_name)]
+        return [row[FIELD_INDEX['bytes_recv']], row[FIELD_INDEX['bytes_sent']]]
+
+    def sample(self):
+        """Read the byte counters once and store them in the ring buffer"""
+        counters = self._read()
+        now = time.monotonic()
+        with self._lock:
+            slot = self._total % self.capacity
+            self._times[slot] = now
+            self._counters[slot] = counters
+            self._total += 1
+
+    def _window(self, since):
+        with self._lock:
+            count = min(self._total, self.capacity)
+            slots = np.arange(self._total - count, self._total) % self.capacity
+            times = self._times[slots]
+            counters = self._counters[slots]
+        # Keep the last sample before the window as the base of the first delta
+        first = max(0, int(np.searchsorted(times, since, side='left')) - 1)
+        return times[first:], counters[first:]
+
+    def report(self, since=None):
+        """
+        Summarize the sub-second rates of a window.
+
+        :param since: Monotonic time the window starts at; None for the time
+                      of the previous report, so one report per dashboard
+                      interval covers every sample exactly once
+        :return: Dictionary with 'samples', 'duration' (seconds), 'threshold'
+                 (Mbps or None) and per direction ('recv', 'sent') a dictionary
+                 of 'peak' and 'p99' rates in Mbps and the number of 'bursts'
+                 (runs of samples above the threshold, None without one).
+                 Rates are None when fewer than two samples are available.
+        """
+        if since is None:
+            since, self._reported = self._reported, time.monotonic()
+        times, counters = self._window(since)
+
+        report = {
+            'samples': max(0, len(times) - 1),
+            'duration': float(times[-1] - times[0]) if len(times) > 1 else 0.0,
+            'threshold': self.threshold_mbps
+        }
+        if len(times) < 2:
+            for direction in DIRECTIONS:
+                report[direction] = {'peak': None, 'p99': None, 'bursts': None}
+            return report
+
+        deltas, _, _ = counter_deltas(counters[1:], counters[:-1])
+        intervals = np.diff(times)
+        rates = deltas * 8 / np.maximum(intervals, 1e-9)[:, None] / 1_000_000
+
+        for column, direction in enumerate(DIRECTIONS):
+            values = rates[:, column]
+            bursts = None
+            if self.threshold_mbps is not None:
+                above = values > self.threshold_mbps
+                # Count the samples where a run above the threshold starts
+                bursts = int(above[0]) + int((above[1:] & ~above[:-1]).sum())
+            report[direction] = {
+                'peak': float(values.max()),
+                'p99': float(np.percentile(values, 99)),
+                'bursts': bursts
+            }
+        return report
+
+    def close(self):
+        """Close the counter file descriptors"""
+        if self._fds is not None:
+            for fd in self._fds:
+                os.close(fd)
+            self._fds = None
+        if self._proc is not None:
+            self._proc.close()
+            self._proc = None
@@ -0,0 +1,246 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import icmp
+from ping import ping
+from sweep import sweep
+
+def read_targets(path):
+    """Read a target list with one host per line, ignoring blank lines and # comments"""
+    with open(path) as f:
+        hosts = [line.split('#', 1)[0].strip() for line in f]
+    return [host for host in hosts if host]
+
+class SharedResults:
+    def __init__(self, hosts, workers, name=None):
+        """
+        Initialize the result matrix shared between the collector processes.
+
+        One shared memory block holds a run flag, per host the latest
+        round-trip time (NaN for no reply) and the epoch-ms time it was probed
+        (0 if never), the worker that owns the host, and one heartbeat per
+        worker. Workers
+        write their hosts' rows in place and the dashboard reads them through
+        NumPy views, so results are never pickled.
+
+        :param hosts: Number of hosts
+        :param workers: Number of worker slots
+        :param name: Name of an existing block to attach to; None creates one
+        """
+        self.hosts = hosts
+        self.workers = workers
+        size = 8 + hosts * 8 * 2 + workers * 8 + hosts * 4
+        self.owner_process = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        buffer = self.shm.buf
+        # A flag rather than a multiprocessing.Event: a worker killed while
+        # waiting on an Event leaves set() blocked forever
+        self.running = np.ndarray(1, dtype=np.int64, buffer=buffer)
+        offset = 8
+        self.latency = np.ndarray(hosts, dtype=np.float64, buffer=buffer, offset=offset)
+        offset += hosts * 8
+        self.updated = np.ndarray(hosts, dtype=np.float64, buffer=buffer, offset=offset)
+        offset += hosts * 8
+        # Monotonic time of each worker's last sign of life; CLOCK_MONOTONIC
+        # is system-wide, so the parent can compare it with its own clock
+        self.heartbeat = np.ndarray(workers, dtype=np.float64, buffer=buffer, offset=offset)
+        offset += workers * 8
+        self.owner = np.ndarray(hosts, dtype=np.int32, buffer=buffer, offset=offset)
+        if self.owner_process:
+            self.running[0] = 1
+            self.latency.fill(np.nan)
+            self.updated.fill(0)
+            self.heartbeat.fill(0)
+            self.owner.fill(-1)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Detach from the block; the creating process also frees it"""
+        # Views must be released before the mapping can be closed
+        self.running = self.latency = self.updated = self.heartbeat = self.owner = None
+        self.shm.close()
+        if self.owner_process:
+            self.shm.unlink()
+
+def _probe_batch(prober, hosts, timeout):
+    if prober is not None:
+        try:
+            replies = prober.ping_many(hosts, count=1, timeout=timeout)
+        except OSError:
+            return [None] * len(hosts)
+        return [replies[host][0] for host in hosts]
+    latencies, _ = sweep(hosts, lambda host: ping(host, count=1, timeout=timeout),
+                         deadline=timeout + 1)
+    return latencies
+
+def _running(results):
+    # Also stop if the dashboard died without stopping the collector
+    parent = multiprocessing.parent_process()
+    return bool(results.running[0]) and (parent is None or parent.is_alive())
+
+def _worker(worker_id, name, hosts, workers, period, timeout, batch_size, concurrency):
+    results = SharedResults(len(hosts), workers, name=name)
+    prober = icmp.IcmpProber() if icmp.available() else None
+
+    def probe(batch):
+        if not _running(results):
+            return
+        latencies = _probe_batch(prober, [hosts[i] for i in batch], timeout)
+        results.latency[batch] = [np.nan if latency is None else latency for latency in latencies]
+        results.updated[batch] = time.time() * 1000
+        results.heartbeat[worker_id] = time.monotonic()
+
+    # A batch waits the full timeout if any of its hosts does not answer, so
+    # several batches are kept in flight to hide those waits
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        while _running(results):
+            started = time.monotonic()
+            results.heartbeat[worker_id] = started
+            # Ownership is re-read every round, so rebalancing needs no messages
+            mine = np.flatnonzero(results.owner == worker_id)
+            list(executor.map(probe, [mine[first:first + batch_size]
+                                      for first in range(0, len(mine), batch_size)]))
+            due = started + period
+            while _running(results) and time.monotonic() < due:
+                time.sleep(min(0.1, max(0.0, due - time.monotonic())))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if prober is not None:
+            prober.close()
+        results.close()
+
+class ShardedCollector:
+    def __init__(self, hosts, workers=None, period=10, timeout=2, batch_size=128,
+                 concurrency=4, heartbeat_timeout=None):
+        """
+        Initialize a collector that probes hosts from a pool of processes.
+
+        The host list is split across worker processes, each probing its
+        share in batches through its own ICMP prober (or the ping binary where
+        unprivileged ICMP is unavailable), so probe throughput scales with
+        cores. Results land in a SharedResults matrix. check() replaces dead
+        or hung workers and moves their hosts to live ones in the meantime.
+
+        :param hosts: List of hosts to probe
+        :param workers: Number of worker processes, defaults to the CPU count
+        :param period: Seconds between probes of the same host
+        :param timeout: Seconds to wait for the replies of a batch
+        :param batch_size: Hosts sent per batch before waiting for replies
+        :param concurrency: Batches each worker keeps in flight
+        :param heartbeat_timeout: Seconds without a heartbeat before a worker
+                                  counts as hung; defaults to 3 * (period + timeout)
+        """
+        self.hosts = list(hosts)
+        self.workers = workers or os.cpu_count() or 1
+        self.period = period
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.heartbeat_timeout = heartbeat_timeout or 3 * (period + timeout)
+        self.restarts = 0
+        self.results = None
+        # Workers must not inherit the dashboard's threads and locks, so they
+        # are not forked from it; a fork server makes restarts cheap
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self._processes = {}
+        self._spawned_at = {}
+        self._members = []
+
+    def _spawn(self, worker_id):
+        process = self._context.Process(
+            target=_worker,
+            args=(worker_id, self.results.name, self.hosts, self.workers,
+                  self.period, self.timeout, self.batch_size, self.concurrency),
+            name=f'collector-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self._spawned_at[worker_id] = time.monotonic()
+
+    def _assign(self, members):
+        """Spread the hosts evenly over the given worker ids"""
+        self._members = sorted(members)
+        if self._members:
+            ids = np.array(self._members, dtype=np.int32)
+            self.results.owner[:] = ids[np.arange(len(self.hosts)) % len(ids)]
+
+    def start(self):
+        """Create the shared matrix and start the workers"""
+        self.results = SharedResults(len(self.hosts), self.workers)
+        self._assign(range(self.workers))
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+        return self
+
+    def check(self):
+        """
+        Replace dead or hung workers and rebalance the hosts.
+
+        The hosts of a dead worker move to the live workers at once; its
+        replacement gets a share again on the first check after it has
+        reported in. Meant to run periodically, e.g. as a scheduler job.
+
+        :return: List of worker ids that were restarted
+        """
+        now = time.monotonic()
+        restarted = []
+        for worker_id, process in list(self._processes.items()):
+            last_seen = max(self.results.heartbeat[worker_id], self._spawned_at[worker_id])
+            if process.is_alive() and now - last_seen <= self.heartbeat_timeout:
+                continue
+            if process.is_alive():
+                process.kill()
+            process.join()
+            restarted.append(worker_id)
+
+        if restarted:
+            self._assign([w for w in self._members if w not in restarted])
+            for worker_id in restarted:
+                self.results.heartbeat[worker_id] = 0
+                self._spawn(worker_id)
+            self.restarts += len(restarted)
+
+        ready = [w for w, process in self._processes.items()
+                 if process.is_alive() and self.results.heartbeat[w] >= self._spawned_at[w]]
+        if sorted(ready) != self._members and ready:
+            self._assign(ready)
+        return restarted
+
+    def snapshot(self, max_age=None):
+        """
+        Copy the latest round-trip times.
+
+        :param max_age: Seconds after which a result counts as missing, so
+                        hosts of a dead worker turn into gaps; None keeps all
+        :return: Tuple of (latencies in ms with NaN for no reply, epoch-ms
+                 probe times) as arrays in host order
+        """
+        latency = self.results.latency.copy()
+        updated = self.results.updated.copy()
+        if max_age is not None:
+            latency[updated < time.time() * 1000 - max_age * 1000] = np.nan
+        return latency, updated
+
+    def stop(self, timeout=5):
+        """Stop the workers and free the shared matrix"""
+        if self.results is not None:
+            self.results.running[0] = 0
+        for process in self._processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._processes.clear()
+        if self.results is not None:
+            self.results.close()
+            self.results = None
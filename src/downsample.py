@@ -0,0 +1,84 @@
+import numpy as np
+
+def minmax(y, threshold):
+    """
+    Select the minimum and maximum of each bucket, keeping spikes visible.
+
+    :param y: Values to downsample; NaN marks gaps
+    :param threshold: Maximum number of points to return
+    :return: Sorted array of selected indices
+    """
+    n = len(y)
+    if n <= threshold:
+        return np.arange(n)
+
+    buckets = max(1, threshold // 2)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # All-NaN buckets select their first point, so gaps stay gaps
+    offsets = np.arange(buckets) * size
+    low = np.where(np.isnan(padded), np.inf, padded).argmin(axis=1) + offsets
+    high = np.where(np.isnan(padded), -np.inf, padded).argmax(axis=1) + offsets
+    indices = np.unique(np.concatenate([low, high]))
+    return indices[indices < n]
+
+def lttb(x, y, threshold):
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    :param x: Sample positions, e.g. epoch-ms timestamps
+    :param y: Values to downsample; NaN marks gaps
+    :param threshold: Maximum number of points to return
+    :return: Sorted array of selected indices, always including the first
+             and last point
+    """
+    n = len(y)
+    if n <= threshold:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:threshold]
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        following = y[end:next_end]
+        next_y = np.nanmean(following) if not np.isnan(following).all() else np.nan
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        # NaN areas (gaps) are only chosen when the whole bucket is a gap
+        previous = start + int(np.where(np.isnan(areas), -1, areas).argmax())
+        selected[bucket + 1] = previous
+
+    return selected
+
+def downsample(x, y, threshold, method='lttb'):
+    """
+    Downsample a series to at most threshold points.
+
+    :param x: Sample positions
+    :param y: Values; NaN marks gaps
+    :param threshold: Maximum number of points, e.g. the graph's pixel width
+    :param method: 'lttb' for shape-preserving selection or 'minmax' to keep
+                   every bucket's extremes
+    :return: Sorted array of selected indices
+    """
+    if method == 'minmax':
+        return minmax(y, threshold)
+    if method == 'lttb':
+        return lttb(x, y, threshold)
+    raise ValueError(f"Unknown downsampling method: {method}")
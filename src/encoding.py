@@ -0,0 +1,54 @@
+import base64
+import numpy as np
+
+# NumPy dtypes plotly.js can decode from a typed array spec
+TYPED_ARRAY_CODES = {
+    np.dtype('int8'): 'i1',
+    np.dtype('uint8'): 'u1',
+    np.dtype('int16'): 'i2',
+    np.dtype('uint16'): 'u2',
+    np.dtype('int32'): 'i4',
+    np.dtype('uint32'): 'u4',
+    np.dtype('float32'): 'f4',
+    np.dtype('float64'): 'f8'
+}
+
+def typed_array(array):
+    """
+    Encode a NumPy array as a plotly.js typed array spec.
+
+    The spec ({'dtype', 'bdata'[, 'shape']}) carries the raw little-endian
+    buffer in base64, so figures skip per-element JSON encoding entirely.
+    plotly.js has no 64-bit integer arrays: datetime64 values become float64
+    epoch milliseconds (plot them on a 'date' axis), and int64 values become
+    int32 when they fit and float64 otherwise.
+
+    :param array: Array-like of numbers or datetime64 values
+    :return: Dictionary usable anywhere plotly expects a data array
+    """
+    array = np.asarray(array)
+    if np.issubdtype(array.dtype, np.datetime64):
+        array = array.astype('datetime64[ms]').view(np.int64).astype(np.float64)
+    elif array.dtype == np.int64 or array.dtype == np.uint64:
+        fits = not array.size or (array.min() >= np.iinfo(np.int32).min
+                                  and array.max() <= np.iinfo(np.int32).max)
+        array = array.astype(np.int32 if fits else np.float64)
+    elif array.dtype not in TYPED_ARRAY_CODES:
+        array = array.astype(np.float64)
+
+    array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    spec = {
+        'dtype': TYPED_ARRAY_CODES[array.dtype.newbyteorder('=')],
+        'bdata': base64.b64encode(array.data).decode('ascii')
+    }
+    if array.ndim > 1:
+        spec['shape'] = ','.join(str(size) for size in array.shape)
+    return spec
+
+def decode_typed_array(spec):
+    """Decode a typed array spec back into a NumPy array, mainly for tests and tooling"""
+    dtype = {code: dtype for dtype, code in TYPED_ARRAY_CODES.items()}[spec['dtype']]
+    array = np.frombuffer(base64.b64decode(spec['bdata']), dtype=dtype.newbyteorder('<'))
+    if 'shape' in spec:
+        array = array.reshape([int(size) for size in spec['shape'].split(',')])
+    return array
@@ -0,0 +1,166 @@
+import json
+import struct
+import numpy as np
+
+from storage import ROLLUP_FIELDS
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'binary': 'application/octet-stream'
+}
+# Rows encoded per chunk of the response
+BATCH_ROWS = 8192
+
+# Binary stream layout: MAGIC, a length-prefixed JSON header naming the
+# columns and their NumPy dtypes, then batches of a row count followed by
+# each column's raw bytes in header order, ending with a row count of 0
+MAGIC = b'PCX1'
+LENGTH = struct.Struct('<I')
+
+def select_fields(fields, columns=None):
+    """
+    Pick the stored fields belonging to the requested columns.
+
+    :param fields: Field names of a tier, excluding 'timestamp'
+    :param columns: Column names to keep; rollup fields such as ping_mean
+                    belong to column ping. None keeps every field.
+    :return: List of field names in tier order
+    :raises ValueError: If a requested column is not stored
+    """
+    if columns is None:
+        return list(fields)
+    wanted = set(columns)
+    selected = []
+    found = set()
+    for field in fields:
+        column, _, suffix = field.rpartition('_')
+        if field in wanted:
+            found.add(field)
+        elif suffix in ROLLUP_FIELDS and column in wanted:
+            found.add(column)
+        else:
+            continue
+        selected.append(field)
+    missing = wanted - found
+    if missing:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(missing))}")
+    return selected
+
+def iter_batches(store, start=None, end=None, resolution=0, columns=None, batch_rows=BATCH_ROWS):
+    """
+    Read a time range of a TieredStore in batches.
+
+    The store is locked only while the range is located; the batches are
+    slices of its memory-mapped columns, so no more than one batch is ever
+    copied and an export of any size does not hold up appends.
+
+    :param store: TieredStore to read
+    :param start: Inclusive start in epoch milliseconds, None for the beginning
+    :param end: Exclusive end in epoch milliseconds, None for the latest sample
+    :param resolution: Coarsest acceptable spacing in milliseconds, see
+                       TieredStore.query
+    :param columns: Columns to export, see select_fields
+    :param batch_rows: Maximum rows per batch
+    :return: Tuple of (tier name, dictionary of field name to dtype starting
+             with 'timestamp', generator of dictionaries of arrays per field)
+    """
+    tier, rows = store.query(start, end, resolution)
+    fields = ['timestamp'] + select_fields([name for name in rows if name != 'timestamp'], columns)
+
+    def batches():
+        for first in range(0, len(rows['timestamp']), batch_rows):
+            yield {name: rows[name][first:first + batch_rows] for name in fields}
+
+    return tier, {name: rows[name].dtype for name in fields}, batches()
+
+def _text_column(array, null):
+    """Format an array as a list of strings, writing null for NaN and infinities"""
+    text = array.astype(str)
+    if array.dtype.kind == 'f':
+        text = np.where(np.isfinite(array), text, null)
+    # Joining Python strings is several times faster than joining NumPy ones
+    return text.tolist()
+
+def ndjson_chunks(dtypes, batches):
+    """Encode batches as one JSON object per line, with null for missing values"""
+    template = '{' + ','.join(f'{json.dumps(name)}:%s' for name in dtypes) + '}\n'
+    for batch in batches:
+        columns = [_text_column(batch[name], 'null') for name in dtypes]
+        yield ''.join(template % row for row in zip(*columns)).encode()
+
+def csv_chunks(dtypes, batches):
+    """Encode batches as CSV with a header row, leaving missing values empty"""
+    yield (','.join(dtypes) + '\n').encode()
+    for batch in batches:
+        columns = [_text_column(batch[name], '') for name in dtypes]
+        yield ''.join(','.join(row) + '\n' for row in zip(*columns)).encode()
+
+def binary_chunks(dtypes, batches, metadata=None):
+    """
+    Encode batches in the columnar binary format.
+
+    Each batch is written as the raw little-endian column buffers, so
+    encoding is a copy per column and a reader can wrap them with
+    np.frombuffer; see read_binary.
+
+    :param dtypes: Dictionary of field name to dtype, in output order
+    :param metadata: Extra entries for the JSON header, e.g. the tier
+    """
+    dtypes = {name: np.dtype(dtype).newbyteorder('<') for name, dtype in dtypes.items()}
+    header = json.dumps({
+        **(metadata or {}),
+        'columns': [[name, dtype.str] for name, dtype in dtypes.items()]
+    }).encode()
+    yield MAGIC + LENGTH.pack(len(header)) + header
+    for batch in batches:
+        yield LENGTH.pack(len(batch['timestamp']))
+        for name, dtype in dtypes.items():
+            yield batch[name].astype(dtype, copy=False).tobytes()
+    yield LENGTH.pack(0)
+
+def read_binary(stream):
+    """
+    Decode the columnar binary format.
+
+    :param stream: Binary file-like object
+    :return: Tuple of (header dictionary, generator of dictionaries of
+             arrays, one per batch)
+    :raises ValueError: If the stream does not start with the format's magic
+    """
+    def read(size):
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError("Truncated export")
+        return data
+
+    if read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a PingCanvas export")
+    header = json.loads(read(LENGTH.unpack(read(LENGTH.size))[0]))
+    dtypes = [(name, np.dtype(dtype)) for name, dtype in header['columns']]
+
+    def batches():
+        while True:
+            rows = LENGTH.unpack(read(LENGTH.size))[0]
+            if not rows:
+                return
+            yield {name: np.frombuffer(read(rows * dtype.itemsize), dtype=dtype)
+                   for name, dtype in dtypes}
+
+    return header, batches()
+
+def export(store, format, start=None, end=None, resolution=0, columns=None, batch_rows=BATCH_ROWS):
+    """
+    Stream a time range of a TieredStore in one of FORMATS.
+
+    :return: Tuple of (tier name, generator of bytes chunks)
+    :raises ValueError: For an unknown format or column
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format: {format}")
+    tier, dtypes, batches = iter_batches(store, start, end, resolution, columns, batch_rows)
+    if format == 'ndjson':
+        return tier, ndjson_chunks(dtypes, batches)
+    if format == 'csv':
+        return tier, csv_chunks(dtypes, batches)
+    return tier, binary_chunks(dtypes, batches, {'tier': tier})
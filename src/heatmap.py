@@ -1,34 +1,237 @@
+import ipaddress
+import time
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from ping import ping
+from sweep import sweep
+
+def prefix_group(host, ipv4_prefix=24, ipv6_prefix=48):
+    """
+    Group a host by its network prefix.
+
+    :param host: IP address or hostname
+    :return: Network in CIDR notation for addresses, or the parent domain
+             for hostnames
+    """
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        labels = host.rstrip('.').split('.')
+        return '.'.join(labels[-2:]) if len(labels) > 2 else host
+    prefix = ipv4_prefix if address.version == 4 else ipv6_prefix
+    return str(ipaddress.ip_network(f"{host}/{prefix}", strict=False))
 
 class NetworkHeatmap:
-    def __init__(self, hosts, interval_minutes=5, history_hours=24):
+    def __init__(self, hosts, interval_minutes=5, history_hours=24,
+                 max_workers=32, sweep_deadline=None, collector=None, adaptive=None):
         """
         Initialize network heatmap.
         
         :param hosts: List of hosts to monitor
         :param interval_minutes: Minutes between measurements
         :param history_hours: Hours of history to maintain
+        :param max_workers: Maximum number of hosts probed concurrently
+        :param sweep_deadline: Seconds a sweep may take; defaults to the interval
+        :param collector: Started ShardedCollector probing the same hosts; when
+                          given, measure() reads its shared results instead
+                          of sweeping
+        :param adaptive: AdaptiveProber over the same hosts; when given,
+                         probe_due() probes the hosts as they come due and
+                         measure() records their latest results instead of
+                         sweeping
         """
         self.hosts = hosts
         self.interval = interval_minutes
         self.history_hours = history_hours
+        self.max_workers = max_workers
+        self.sweep_deadline = sweep_deadline if sweep_deadline is not None else interval_minutes * 60
+        self.collector = collector
+        self.adaptive = adaptive
+        self.last_sweep = None
         self.measurements = len(hosts)
         self.timepoints = (history_hours * 60) // interval_minutes
-        self.data = np.zeros((self.measurements, self.timepoints))
-        self.data.fill(np.nan)
+        # Columns are mirrored into a second half so the chronological view
+        # is always one contiguous slice; data is the ring-indexed first half
+        self._buffer = np.full((self.measurements, 2 * self.timepoints), np.nan)
+        self._timestamps = np.zeros(2 * self.timepoints, dtype=np.int64)
+        self.data = self._buffer[:, :self.timepoints]
+        self.timestamps = self._timestamps[:self.timepoints]
         self.current_index = 0
+        self.columns = 0
+        # Group callable to its (labels, row index per host), see groups()
+        self._groups = {}
+
+    def _write_column(self, values, timestamp):
+        index = self.current_index
+        for column in (index, index + self.timepoints):
+            self._buffer[:, column] = values
+            self._timestamps[column] = timestamp
+        self.current_index = (index + 1) % self.timepoints
+        self.columns = min(self.columns + 1, self.timepoints)
+
+    def _probe(self, host):
+        return ping(host, count=2)
 
     def measure(self):
-        """Take a measurement of all hosts and add to data"""
-        for i, host in enumerate(self.hosts):
-            latency = ping(host, count=2)
-            if latency is not None:
-                self.data[i, self.current_index] = latency
+        """
+        Take a measurement of all hosts and add to data.
+
+        Hosts are probed concurrently; any host that fails or misses the
+        sweep deadline is recorded as NaN.
+
+        :return: Sweep statistics (duration, total, completed, responded, timed_out)
+        """
+        if self.collector is not None:
+            return self._measure_collector()
+        if self.adaptive is not None:
+            return self._measure_adaptive()
+
+        latencies, stats = sweep(
+            self.hosts,
+            self._probe,
+            max_workers=self.max_workers,
+            deadline=self.sweep_deadline
+        )
+        self._write_column(
+            [np.nan if latency is None else latency for latency in latencies],
+            time.time_ns() // 1_000_000
+        )
         
-        self.current_index = (self.current_index + 1) % self.timepoints
+        self.last_sweep = stats
+        return stats
+
+    def _measure_collector(self):
+        # Results older than two probe rounds belong to a dead or stalled
+        # worker and are recorded as gaps
+        start = time.monotonic()
+        max_age = 2 * self.collector.period + self.collector.timeout
+        return self._write_results(*self.collector.snapshot(max_age=max_age), max_age, start)
+
+    def _write_results(self, latencies, updated, max_age, start):
+        self._write_column(latencies, time.time_ns() // 1_000_000)
+
+        fresh = int((updated >= time.time() * 1000 - max_age * 1000).sum())
+        self.last_sweep = {
+            'duration': time.monotonic() - start,
+            'total': len(self.hosts),
+            'completed': fresh,
+            'responded': int((~np.isnan(latencies)).sum()),
+            'timed_out': len(self.hosts) - fresh
+        }
+        return self.last_sweep
+
+    def probe_due(self, timeout=0.5):
+        """
+        Probe the hosts the adaptive prober has due, one packet each.
+
+        Call this often, e.g. every second; hosts are only probed when due.
+        A call returns within timeout plus a quarter second of slack for
+        starting the probes, so with the default timeout it fits in a one
+        second period.
+
+        :param timeout: Seconds to wait for each reply
+        :return: Sweep statistics of the probed hosts
+        """
+        return self.adaptive.run(lambda host: ping(host, count=1, timeout=timeout),
+                                 max_workers=self.max_workers, deadline=timeout + 0.25)
+
+    def _measure_adaptive(self):
+        # Stable hosts are probed up to max_interval apart and keep their last
+        # result in between; results twice as old are recorded as gaps
+        start = time.monotonic()
+        max_age = 2 * self.adaptive.max_interval
+        return self._write_results(*self.adaptive.snapshot(max_age=max_age), max_age, start)
+
+    def load_history(self, history, timestamps=None):
+        """
+        Fill the matrix from stored sweeps, e.g. after a restart.
+
+        :param history: Array of shape (hosts, n) holding the latest n sweeps,
+                        oldest first. Only the newest timepoints columns are kept.
+        :param timestamps: Epoch-ms time of each sweep, if known
+        """
+        history = np.asarray(history)[:, -self.timepoints:]
+        timestamps = np.zeros(history.shape[1], dtype=np.int64) if timestamps is None \
+            else np.asarray(timestamps)[-self.timepoints:]
+        self._buffer.fill(np.nan)
+        self._timestamps.fill(0)
+        self.current_index = 0
+        self.columns = 0
+        for i in range(history.shape[1]):
+            self._write_column(history[:, i], timestamps[i])
+
+    def chronological(self):
+        """
+        Return the measured columns oldest first, without copying.
+
+        :return: Tuple of (timestamps, data) read-only views; timestamps are
+                 epoch ms with one entry per column of data
+        """
+        start = (self.current_index - self.columns) % self.timepoints
+        timestamps = self._timestamps[start:start + self.columns]
+        data = self._buffer[:, start:start + self.columns]
+        timestamps.flags.writeable = False
+        data.flags.writeable = False
+        return timestamps, data
+
+    def rows(self, offset, limit):
+        """
+        Return one page of hosts for a viewport.
+
+        :return: Tuple of (hosts, timestamps, data) where data is a view of
+                 the chronological matrix restricted to the page's rows
+        """
+        timestamps, data = self.chronological()
+        return self.hosts[offset:offset + limit], timestamps, data[offset:offset + limit]
+
+    def groups(self, group=prefix_group):
+        """
+        Map hosts to groups, once per group callable.
+
+        :param group: Callable mapping a host to its group label
+        :return: Tuple of (labels in order of first appearance, array with
+                 the label index of each host)
+        """
+        if group not in self._groups:
+            labels = []
+            index = {}
+            rows = np.empty(len(self.hosts), dtype=np.int64)
+            for i, host in enumerate(self.hosts):
+                label = group(host)
+                if label not in index:
+                    index[label] = len(labels)
+                    labels.append(label)
+                rows[i] = index[label]
+            self._groups[group] = (labels, rows)
+        return self._groups[group]
+
+    def aggregate(self, group=prefix_group, how='mean'):
+        """
+        Aggregate host rows into groups.
+
+        :param group: Callable mapping a host to its group label
+        :param how: 'mean' or 'max' latency of the responding hosts in a group
+        :return: Tuple of (labels, timestamps, data) with one row per group,
+                 in order of first appearance
+        """
+        timestamps, data = self.chronological()
+        labels, rows = self.groups(group)
+
+        valid = ~np.isnan(data)
+        counts = np.zeros((len(labels), data.shape[1]))
+        np.add.at(counts, rows, valid)
+        if how == 'mean':
+            result = np.zeros((len(labels), data.shape[1]))
+            np.add.at(result, rows, np.where(valid, data, 0))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result /= counts
+        elif how == 'max':
+            result = np.full((len(labels), data.shape[1]), -np.inf)
+            np.maximum.at(result, rows, np.where(valid, data, -np.inf))
+        else:
+            raise ValueError(f"Unknown aggregation: {how}")
+        result[counts == 0] = np.nan
+        return labels, timestamps, result
 
     def plot(self, filename=None):
         """
@@ -36,9 +239,13 @@ class NetworkHeatmap:
         
         :param filename: If provided, save plot to this file
         """
+        # matplotlib takes longer to import than the rest of the app together,
+        # and only this method needs it
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, len(self.hosts) * 0.5))
       
-        masked_data = np.ma.masked_invalid(self.data)
+        masked_data = np.ma.masked_invalid(self.chronological()[1])
       
         plt.imshow(
             masked_data,
@@ -0,0 +1,424 @@
+import ipaddress
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACH = 3
+ICMP_ECHO_REQUEST = 8
+ICMP_TIME_EXCEEDED = 11
+ICMPV6_DEST_UNREACH = 1
+ICMPV6_TIME_EXCEEDED = 3
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+# Linux values, not all of which the socket module exports
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+IPV6_RECVERR = getattr(socket, 'IPV6_RECVERR', 25)
+MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+
+_HEADER = struct.Struct('!BBHHH')
+# struct sock_extended_err, followed by the offender's sockaddr
+_EXTENDED_ERR = struct.Struct('=IBBBBII')
+_available = {}
+
+def _open_socket(family):
+    proto = socket.IPPROTO_ICMPV6 if family == socket.AF_INET6 else socket.IPPROTO_ICMP
+    return socket.socket(family, socket.SOCK_DGRAM, proto)
+
+def available(ipv6=False):
+    """
+    Check whether the kernel allows unprivileged ICMP datagram sockets.
+
+    On Linux this is governed by net.ipv4.ping_group_range.
+
+    :param ipv6: Boolean indicating whether to check ICMPv6.
+    :return: True if an ICMP socket can be opened for the address family.
+    """
+    family = socket.AF_INET6 if ipv6 else socket.AF_INET
+    if family not in _available:
+        try:
+            _open_socket(family).close()
+            _available[family] = True
+        except OSError:
+            _available[family] = False
+    return _available[family]
+
+def checksum(data):
+    """Compute the Internet checksum (RFC 1071) of a byte string"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack('!%dH' % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+def parse_extended_error(data, family):
+    """
+    Parse an IP_RECVERR/IPV6_RECVERR control message.
+
+    :param data: Control message data (struct sock_extended_err + sockaddr)
+    :param family: Address family of the socket
+    :return: Tuple of (origin, icmp_type, icmp_code, offender address or None)
+    """
+    _, origin, icmp_type, code, _, _, _ = _EXTENDED_ERR.unpack_from(data)
+    offender = data[_EXTENDED_ERR.size:]
+    address = None
+    if family == socket.AF_INET6 and len(offender) >= 24:
+        address = socket.inet_ntop(socket.AF_INET6, offender[8:24])
+    elif family == socket.AF_INET and len(offender) >= 8:
+        address = socket.inet_ntop(socket.AF_INET, offender[4:8])
+    return origin, icmp_type, code, address
+
+def resolve(host, family):
+    """Resolve a host to a socket address, or None if it cannot be resolved"""
+    try:
+        return socket.getaddrinfo(host, None, family, socket.SOCK_DGRAM)[0][4]
+    except (socket.gaierror, UnicodeError, IndexError):
+        return None
+
+def is_ipv6_address(host):
+    """Check whether a host is an IPv6 address literal, optionally with a zone"""
+    try:
+        return ipaddress.ip_address(host.split('%')[0]).version == 6
+    except ValueError:
+        return False
+
+def resolve_host(host, ipv6=None):
+    """
+    Resolve a host and pick the address family to probe it over.
+
+    :param host: Hostname or IP address.
+    :param ipv6: True or False to force the address family, or None to take
+                 it from an address literal and to try IPv4 before IPv6 for
+                 hostnames.
+    :return: Tuple of (family, socket address), with None for the address if
+             the host cannot be resolved.
+    """
+    if ipv6 is None and is_ipv6_address(host):
+        ipv6 = True
+    if ipv6 is not None:
+        family = socket.AF_INET6 if ipv6 else socket.AF_INET
+        return family, resolve(host, family)
+    for family in (socket.AF_INET, socket.AF_INET6):
+        address = resolve(host, family)
+        if address is not None:
+            return family, address
+    return socket.AF_INET, None
+
+class _Probe:
+    __slots__ = ('address', 'sent_at', 'rtt')
+
+    def __init__(self, address, sent_at):
+        self.address = address
+        self.sent_at = sent_at
+        self.rtt = None
+
+class IcmpProber:
+    def __init__(self, payload_size=56):
+        """
+        Initialize an ICMP echo prober.
+
+        One datagram socket per address family serves every host. The kernel
+        assigns the echo identifier from the socket's local port, and replies
+        are matched on identifier, sequence number and source address by a
+        single background receiver thread.
+
+        :param payload_size: Number of payload bytes in each echo request.
+        """
+        self._cond = threading.Condition()
+        self._sockets = {}
+        self._idents = {}
+        self._pending = {}
+        self._sequence = 0
+        self._receiver = None
+        self._closed = False
+        # Written to whenever a socket is added, so the receiver starts
+        # watching it at once instead of after its select() times out
+        self._wakeup = None
+        self._payload = b'PingCanvas'.ljust(payload_size, b'\x00')[:payload_size]
+
+    def _socket(self, family):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Prober is closed")
+            sock = self._sockets.get(family)
+            if sock is None:
+                sock = _open_socket(family)
+                sock.bind(('::', 0) if family == socket.AF_INET6 else ('0.0.0.0', 0))
+                sock.setblocking(False)
+                self._sockets[family] = sock
+                self._idents[family] = sock.getsockname()[1]
+                if self._wakeup is not None:
+                    self._wake()
+            if self._receiver is None:
+                self._wakeup = socket.socketpair()
+                for end in self._wakeup:
+                    end.setblocking(False)
+                self._receiver = threading.Thread(target=self._receive_loop,
+                                                  args=(self._wakeup[0],), daemon=True)
+                self._receiver.start()
+            return sock
+
+    def _wake(self):
+        try:
+            self._wakeup[1].send(b'\0')
+        except OSError:
+            # The pipe is full, so the receiver is already due to wake up
+            pass
+
+    def _send(self, sock, family, address):
+        with self._cond:
+            self._sequence = (self._sequence + 1) & 0xffff
+            sequence = self._sequence
+            ident = self._idents[family]
+
+        if family == socket.AF_INET6:
+            header = _HEADER.pack(ICMPV6_ECHO_REQUEST, 0, 0, ident, sequence)
+            packet = header + self._payload
+        else:
+            header = _HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, ident, sequence)
+            packet = _HEADER.pack(ICMP_ECHO_REQUEST, 0, checksum(header + self._payload),
+                                  ident, sequence) + self._payload
+
+        probe = _Probe(address[0].split('%')[0], time.monotonic())
+        with self._cond:
+            self._pending[(family, sequence)] = probe
+        try:
+            sock.sendto(packet, address)
+        except OSError:
+            with self._cond:
+                self._pending.pop((family, sequence), None)
+            return probe, None
+        return probe, (family, sequence)
+
+    def _dispatch(self, family, data, address, received_at):
+        if len(data) < _HEADER.size:
+            return
+        icmp_type, _, _, ident, sequence = _HEADER.unpack_from(data)
+        expected = ICMPV6_ECHO_REPLY if family == socket.AF_INET6 else ICMP_ECHO_REPLY
+        if icmp_type != expected or ident != self._idents.get(family):
+            return
+        with self._cond:
+            probe = self._pending.get((family, sequence))
+            if probe is None or probe.address != address[0].split('%')[0]:
+                return
+            del self._pending[(family, sequence)]
+            probe.rtt = (received_at - probe.sent_at) * 1000
+            self._cond.notify_all()
+
+    def _receive_loop(self, wakeup):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+                sockets = {sock: family for family, sock in self._sockets.items()}
+            try:
+                readable, _, _ = select.select([wakeup, *sockets], [], [], 0.5)
+            except (OSError, ValueError):
+                continue
+            for sock in readable:
+                if sock is wakeup:
+                    try:
+                        while wakeup.recv(64):
+                            pass
+                    except OSError:
+                        pass
+                    continue
+                while True:
+                    try:
+                        data, address = sock.recvfrom(65535)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        break
+                    self._dispatch(sockets[sock], data, address, time.monotonic())
+
+    def ping_many(self, hosts, count=1, timeout=2, interval=0.2, ipv6=None):
+        """
+        Send echo requests to several hosts and collect the round-trip times.
+
+        Hosts may mix address families; each family is probed over its own
+        socket.
+
+        :param hosts: List of hosts to probe.
+        :param count: Number of echo requests to send to each host.
+        :param timeout: Seconds to wait for a reply after the last request.
+        :param interval: Seconds between successive rounds of requests.
+        :param ipv6: Boolean forcing ICMPv6 or ICMP for every host, or None to
+                     pick the family per host, see resolve_host.
+        :return: Dictionary mapping each host to a list of round-trip times in
+                 milliseconds, one per request, with None for lost replies.
+        """
+        addresses = {host: resolve_host(host, ipv6) for host in hosts}
+        sockets = {}
+        for family in {family for family, address in addresses.values() if address is not None}:
+            try:
+                sockets[family] = self._socket(family)
+            except OSError as e:
+                # Hosts of a family that cannot be probed count as lost
+                print(f"Error opening ICMP socket: {e}")
+        probes = {host: [] for host in hosts}
+        keys = []
+
+        for round_number in range(count):
+            if round_number:
+                time.sleep(interval)
+            for host, (family, address) in addresses.items():
+                if address is None or family not in sockets:
+                    probes[host].append(None)
+                    continue
+                probe, key = self._send(sockets[family], family, address)
+                probes[host].append(probe)
+                if key is not None:
+                    keys.append(key)
+
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while any(key in self._pending for key in keys):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            for key in keys:
+                self._pending.pop(key, None)
+
+        return {
+            host: [probe.rtt if probe is not None else None for probe in host_probes]
+            for host, host_probes in probes.items()
+        }
+
+    def ping(self, host, count=4, timeout=2, interval=0.2, ipv6=None):
+        """
+        Send echo requests to a single host.
+
+        :return: List of round-trip times in milliseconds, None for lost replies.
+        """
+        return self.ping_many([host], count=count, timeout=timeout,
+                              interval=interval, ipv6=ipv6)[host]
+
+    def close(self):
+        """Close the prober's sockets and stop its receiver thread"""
+        with self._cond:
+            self._closed = True
+            sockets = list(self._sockets.values())
+            self._sockets.clear()
+            if self._wakeup is not None:
+                self._wake()
+                sockets.extend(self._wakeup)
+            self._cond.notify_all()
+        if self._receiver is not None:
+            self._receiver.join(1)
+        for sock in sockets:
+            sock.close()
+
+def trace(host, max_hops=30, timeout=2, ipv6=False):
+    """
+    Trace the path to a host by probing every TTL at once.
+
+    An echo request is sent for each TTL from 1 to max_hops before any reply
+    is awaited. Routers answer with time-exceeded errors, which the kernel
+    queues on the socket's error queue (IP_RECVERR) with the router as the
+    offender; the destination answers with an echo reply. The sequence
+    number of each probe is its TTL, so a trace takes roughly one round
+    trip plus the timeout instead of one timeout per silent hop.
+
+    :param host: The host to trace.
+    :param max_hops: Maximum number of hops to probe.
+    :param timeout: Seconds to wait for replies after sending the probes.
+    :param ipv6: Boolean indicating whether to use ICMPv6.
+    :return: List of (ttl, address, rtt_ms) tuples up to the destination, with
+             None for hops that did not answer, or None if the host cannot
+             be resolved.
+    """
+    family = socket.AF_INET6 if ipv6 else socket.AF_INET
+    address = resolve(host, family)
+    if address is None:
+        return None
+    target = address[0].split('%')[0]
+
+    if ipv6:
+        level, ttl_option, recverr = socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, IPV6_RECVERR
+        request, reply = ICMPV6_ECHO_REQUEST, ICMPV6_ECHO_REPLY
+        origin_icmp, time_exceeded, unreachable = SO_EE_ORIGIN_ICMP6, ICMPV6_TIME_EXCEEDED, ICMPV6_DEST_UNREACH
+    else:
+        level, ttl_option, recverr = socket.IPPROTO_IP, socket.IP_TTL, IP_RECVERR
+        request, reply = ICMP_ECHO_REQUEST, ICMP_ECHO_REPLY
+        origin_icmp, time_exceeded, unreachable = SO_EE_ORIGIN_ICMP, ICMP_TIME_EXCEEDED, ICMP_DEST_UNREACH
+
+    hops = {}
+    final_ttl = max_hops
+    sent_at = {}
+    with _open_socket(family) as sock:
+        sock.bind(('::', 0) if ipv6 else ('0.0.0.0', 0))
+        sock.setsockopt(level, recverr, 1)
+        sock.setblocking(False)
+        ident = sock.getsockname()[1]
+
+        for ttl in range(1, max_hops + 1):
+            sock.setsockopt(level, ttl_option, ttl)
+            header = _HEADER.pack(request, 0, 0, ident, ttl)
+            if not ipv6:
+                header = _HEADER.pack(request, 0, checksum(header), ident, ttl)
+            sent_at[ttl] = time.monotonic()
+            try:
+                sock.sendto(header, address)
+            except OSError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        while True:
+            if all(ttl in hops for ttl in range(1, final_ttl + 1)):
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                continue
+
+            # Routers along the path: time-exceeded and unreachable errors
+            while True:
+                try:
+                    data, ancdata, _, _ = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+                except (BlockingIOError, InterruptedError):
+                    break
+                received_at = time.monotonic()
+                if len(data) < _HEADER.size:
+                    continue
+                ttl = _HEADER.unpack_from(data)[4]
+                for cmsg_level, cmsg_type, cmsg_data in ancdata:
+                    if cmsg_level != level or cmsg_type != recverr:
+                        continue
+                    origin, icmp_type, _, offender = parse_extended_error(cmsg_data, family)
+                    if origin != origin_icmp or ttl not in sent_at or offender is None:
+                        continue
+                    hops.setdefault(ttl, (offender, (received_at - sent_at[ttl]) * 1000))
+                    if icmp_type == unreachable:
+                        final_ttl = min(final_ttl, ttl)
+
+            # The destination itself: echo replies
+            while True:
+                try:
+                    data, source = sock.recvfrom(512)
+                except OSError:
+                    break
+                received_at = time.monotonic()
+                if len(data) < _HEADER.size:
+                    continue
+                icmp_type, _, _, reply_ident, ttl = _HEADER.unpack_from(data)
+                if icmp_type != reply or reply_ident != ident or ttl not in sent_at:
+                    continue
+                hops.setdefault(ttl, (source[0].split('%')[0] or target,
+                                      (received_at - sent_at[ttl]) * 1000))
+                final_ttl = min(final_ttl, ttl)
+
+    return [
+        (ttl, *hops[ttl]) if ttl in hops else (ttl, None, None)
+        for ttl in range(1, final_ttl + 1)
+    ]
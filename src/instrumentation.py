@@ -0,0 +1,169 @@
+import functools
+import threading
+import time
+
+# Bucket i covers durations whose top three bits are fixed: every power of two
+# is split into 4 sub-buckets, so a percentile is off by at most 25%
+SUB_BUCKETS = 4
+BUCKETS = 64 * SUB_BUCKETS
+
+def bucket_index(ns):
+    """Return the histogram bucket of a duration in nanoseconds"""
+    if ns < SUB_BUCKETS:
+        return max(ns, 0)
+    bits = ns.bit_length()
+    return SUB_BUCKETS * (bits - 1) + ((ns >> (bits - 3)) & (SUB_BUCKETS - 1))
+
+def bucket_bounds(index):
+    """Return the [low, high) nanosecond range of a bucket"""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    bits = index // SUB_BUCKETS + 1
+    width = 1 << (bits - 3)
+    low = (SUB_BUCKETS | (index % SUB_BUCKETS)) * width
+    return low, low + width
+
+class Histogram:
+    def __init__(self):
+        """
+        Initialize a log-linear latency histogram.
+
+        Recording is a few integer updates and memory stays fixed however
+        many durations are recorded. There is no lock: taking one costs more
+        than the update itself, and an increment lost to a race between
+        threads does not matter for diagnostics.
+        """
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        """Record one duration in nanoseconds"""
+        self.counts[bucket_index(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q):
+        """
+        Estimate a percentile from the buckets.
+
+        :param q: Percentile between 0 and 100
+        :return: Duration in nanoseconds at the middle of the bucket holding
+                 the percentile, or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) / 2, self.max_ns)
+        return self.max_ns
+
+    def snapshot(self):
+        """
+        Summarize the histogram.
+
+        :return: Dictionary with 'count' and 'mean', 'p50', 'p90', 'p99' and
+                 'max' in milliseconds (None while empty)
+        """
+        copy = Histogram()
+        copy.counts = list(self.counts)
+        copy.count, copy.total_ns, copy.max_ns = self.count, self.total_ns, self.max_ns
+
+        def ms(ns):
+            return None if ns is None else ns / 1e6
+
+        return {
+            'count': copy.count,
+            'mean': ms(copy.total_ns / copy.count) if copy.count else None,
+            'p50': ms(copy.percentile(50)),
+            'p90': ms(copy.percentile(90)),
+            'p99': ms(copy.percentile(99)),
+            'max': ms(copy.max_ns) if copy.count else None
+        }
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class Timings:
+    def __init__(self, enabled=True):
+        """
+        Initialize a registry of per-stage duration histograms.
+
+        Stages are dotted names such as 'ping.spawn' or 'callback.status' and
+        are created on first use.
+
+        :param enabled: When False, timers and records are no-ops
+        """
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        """Return the histogram of a stage, creating it if needed"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def record(self, stage, ns):
+        """Record a duration in nanoseconds for a stage"""
+        if self.enabled:
+            self.histogram(stage).record(ns)
+
+    def time(self, stage):
+        """Return a context manager that records the duration of its block"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(stage))
+
+    def timed(self, stage):
+        """Decorator recording every call of a function under a stage"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return the summary of every stage keyed by stage name, sorted"""
+        with self._lock:
+            stages = sorted(self.histograms.items())
+        return {stage: histogram.snapshot() for stage, histogram in stages}
+
+    def reset(self):
+        """Drop all recorded durations"""
+        with self._lock:
+            self.histograms = {}
+
+# Process-wide registry the collector stages and dashboard callbacks record into
+timings = Timings()
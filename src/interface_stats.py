@@ -1,17 +1,163 @@
 import psutil
 import time
+import numpy as np
 from typing import Dict, Optional
 
+PROC_NET_DEV = '/proc/net/dev'
+
+# Column order of /proc/net/dev, named after psutil's fields where they exist
+COUNTER_FIELDS = (
+    'bytes_recv', 'packets_recv', 'errin', 'dropin',
+    'fifo_in', 'frame_in', 'compressed_in', 'multicast_in',
+    'bytes_sent', 'packets_sent', 'errout', 'dropout',
+    'fifo_out', 'colls', 'carrier_out', 'compressed_out'
+)
+FIELD_INDEX = {field: i for i, field in enumerate(COUNTER_FIELDS)}
+
+# Some drivers still export 32-bit counters through the 64-bit interface
+COUNTER_32_MAX = np.uint64(2 ** 32)
+COUNTER_64_HALF = np.uint64(2 ** 63)
+
+def counter_deltas(current, previous):
+    """
+    Compute counter increments, handling wraps and resets explicitly.
+
+    A counter that went down wrapped if the wrapped delta is under half its
+    range: 2**32 for counters that were below 2**32 (a 32-bit counter), and
+    2**64 otherwise. Otherwise it was reset, e.g. because the interface was
+    recreated, and counts from zero again.
+
+    :param current: uint64 array of current counter values
+    :param previous: uint64 array of previous values, same shape
+    :return: Tuple of (uint64 deltas, wrapped mask, reset mask)
+    """
+    # uint64 subtraction is modulo 2**64, so this is already the wrapped
+    # delta of a 64-bit counter
+    deltas = current - previous
+    decreased = current < previous
+    narrow = decreased & (previous < COUNTER_32_MAX)
+    deltas[narrow] = (current[narrow] - previous[narrow]) % COUNTER_32_MAX
+    half_range = np.where(narrow, COUNTER_32_MAX // np.uint64(2), COUNTER_64_HALF)
+    wrapped = decreased & (deltas < half_range)
+    reset = decreased & ~wrapped
+    deltas[reset] = current[reset]
+    return deltas, wrapped, reset
+
+class NetDevSampler:
+    def __init__(self, path: str = PROC_NET_DEV):
+        """
+        Initialize a sampler for the counters of all network interfaces.
+
+        Each sample reads every interface in a single pass over /proc/net/dev
+        through a handle that stays open between samples, and computes all
+        rates at once as arrays over a monotonic clock. Where /proc/net/dev is
+        not available (e.g. macOS) psutil is used instead, which only
+        provides byte, packet, error and drop counters.
+
+        :param path: Path of the /proc/net/dev file
+        """
+        self.path = path
+        try:
+            self._file = open(path, 'rb')
+        except OSError:
+            self._file = None
+        self.wraps = 0
+        self.resets = 0
+        self._names = None
+        self._counters = None
+        self._time = None
+
+    def snapshot(self):
+        """
+        Read the current counters of all interfaces.
+
+        :return: Tuple of (interface names, uint64 array of shape
+                 (interfaces, len(COUNTER_FIELDS)))
+        """
+        if self._file is None:
+            return self._snapshot_psutil()
+
+        self._file.seek(0)
+        lines = self._file.read().decode('ascii').splitlines()[2:]  # Skip the two header lines
+        names = []
+        fields = []
+        for line in lines:
+            name, counters = line.split(':', 1)
+            names.append(name.strip())
+            fields.append(counters)
+        counters = np.array(' '.join(fields).split(), dtype=np.uint64)
+        return tuple(names), counters.reshape(len(names), len(COUNTER_FIELDS))
+
+    def _snapshot_psutil(self):
+        stats = psutil.net_io_counters(pernic=True)
+        counters = np.zeros((len(stats), len(COUNTER_FIELDS)), dtype=np.uint64)
+        for row, nic in enumerate(stats.values()):
+            for field in ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                          'errin', 'errout', 'dropin', 'dropout'):
+                counters[row, FIELD_INDEX[field]] = getattr(nic, field)
+        return tuple(stats), counters
+
+    def _deltas(self, names, counters):
+        previous = self._counters
+        if names != self._names:
+            # Interfaces appeared or disappeared; new ones start at zero delta
+            index = {name: i for i, name in enumerate(self._names)}
+            previous = counters.copy()
+            for row, name in enumerate(names):
+                if name in index:
+                    previous[row] = self._counters[index[name]]
+
+        deltas, wrapped, reset = counter_deltas(counters, previous)
+        self.wraps += int(wrapped.sum())
+        self.resets += int(reset.sum())
+        return deltas
+
+    def sample(self) -> Dict:
+        """
+        Take a snapshot and compute per-second rates since the previous one.
+
+        :return: Dictionary with 'interfaces' (names), 'counters' (uint64
+                 array), 'rates' (float64 array of per-second deltas, zero on
+                 the first sample), 'interval' (seconds since the previous
+                 sample) and 'timestamp' (monotonic seconds)
+        """
+        names, counters = self.snapshot()
+        now = time.monotonic()
+
+        if self._time is None or now <= self._time:
+            interval = 0.0
+            rates = np.zeros(counters.shape)
+        else:
+            interval = now - self._time
+            rates = self._deltas(names, counters) / interval
+
+        self._names, self._counters, self._time = names, counters, now
+        return {
+            'timestamp': now,
+            'interval': interval,
+            'interfaces': names,
+            'counters': counters,
+            'rates': rates
+        }
+
+    def close(self):
+        """Close the /proc/net/dev handle"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 class InterfaceStats:
-    def __init__(self, interface_name: str = None):
+    def __init__(self, interface_name: str = None, path: str = PROC_NET_DEV):
         """
         Initialize interface statistics collector.
-        
+
         :param interface_name: Name of network interface to monitor. If None, uses default interface.
+        :param path: Path of the /proc/net/dev file; psutil is used if it cannot be opened
         """
         self.interface_name = interface_name or self._get_default_interface()
-        self._last_stats = self._get_stats()
-        self._last_time = time.time()
+        self.sampler = NetDevSampler(path)
+        self.last_sample = self.sampler.sample()
+        self._row(self.last_sample)
 
     def _get_default_interface(self) -> str:
         """Find the default network interface"""
@@ -21,56 +167,48 @@ class InterfaceStats:
                 return interface
         raise RuntimeError("No active network interface found")
 
-    def _get_stats(self) -> Dict:
-        """Get current network statistics"""
-        counters = psutil.net_io_counters(pernic=True)
-        if self.interface_name not in counters:
+    def _row(self, sample: Dict) -> int:
+        """Find the monitored interface's row in a sample"""
+        if self.interface_name not in sample['interfaces']:
             raise ValueError(f"Interface {self.interface_name} not found")
-        return counters[self.interface_name]
+        return sample['interfaces'].index(self.interface_name)
 
     def get_rates(self) -> Dict[str, float]:
         """
-        Calculate current network rates.
-        
-        :return: Dictionary containing bytes_sent/s, bytes_recv/s
-        """
-        current_time = time.time()
-        current_stats = self._get_stats()
-        
-        time_delta = current_time - self._last_time
-        if time_delta <= 0:
-            return {'bytes_sent': 0, 'bytes_recv': 0}
+        Calculate current network rates from a new sample of all interfaces.
 
-        bytes_sent = current_stats.bytes_sent - self._last_stats.bytes_sent
-        bytes_recv = current_stats.bytes_recv - self._last_stats.bytes_recv
-
-        self._last_stats = current_stats
-        self._last_time = current_time
+        :return: Dictionary containing bytes_sent and bytes_recv in Mbps, and
+                 packets_sent, packets_recv, errin, errout, dropin and dropout per second
+        """
+        self.last_sample = self.sampler.sample()
+        rates = self.last_sample['rates'][self._row(self.last_sample)]
 
-        # Convert to bits per second first, then to Mbps
         return {
-            'bytes_sent': max(0, (bytes_sent * 8) / time_delta / 1_000_000),  # Convert to Mbps
-            'bytes_recv': max(0, (bytes_recv * 8) / time_delta / 1_000_000)   # Convert to Mbps
+            'bytes_sent': rates[FIELD_INDEX['bytes_sent']] * 8 / 1_000_000,  # Convert to Mbps
+            'bytes_recv': rates[FIELD_INDEX['bytes_recv']] * 8 / 1_000_000,  # Convert to Mbps
+            **{field: rates[FIELD_INDEX[field]] for field in (
+                'packets_sent', 'packets_recv', 'errin', 'errout', 'dropin', 'dropout'
+            )}
         }
 
     def get_totals(self) -> Dict[str, int]:
         """
-        Get total transfer statistics.
-        
-        :return: Dictionary containing total bytes_sent, bytes_recv, packets_sent, packets_recv
+        Get total transfer statistics as of the last sample.
+
+        :return: Dictionary containing total bytes_sent, bytes_recv, packets_sent, packets_recv,
+                 errin, errout, dropin and dropout
         """
-        stats = self._get_stats()
+        counters = self.last_sample['counters'][self._row(self.last_sample)]
         return {
-            'bytes_sent': stats.bytes_sent,
-            'bytes_recv': stats.bytes_recv,
-            'packets_sent': stats.packets_sent,
-            'packets_recv': stats.packets_recv
+            field: int(counters[FIELD_INDEX[field]])
+            for field in ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                          'errin', 'errout', 'dropin', 'dropout')
         }
 
 if __name__ == "__main__":
     stats = InterfaceStats()
     print(f"Monitoring interface: {stats.interface_name}")
-    
+
     try:
         while True:
             rates = stats.get_rates()
@@ -0,0 +1,224 @@
+import math
+import threading
+import time
+
+class DDSketch:
+    def __init__(self, relative_accuracy=0.01, max_bins=128):
+        """
+        Initialize a DDSketch quantile sketch.
+
+        Values are counted in logarithmic bins so every quantile is returned
+        within the given relative accuracy. When more than max_bins bins are in
+        use the lowest ones are collapsed together, which keeps memory fixed
+        and the upper percentiles exact to the accuracy bound.
+
+        :param relative_accuracy: Relative error bound for quantile estimates
+        :param max_bins: Maximum number of bins kept
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        """Add a single non-negative value to the sketch"""
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        collapsed = sum(self.bins.pop(key) for key in keys[:excess])
+        target = keys[excess]
+        self.bins[target] += collapsed
+
+    def merge(self, other):
+        """Merge another sketch with the same accuracy into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q):
+        """
+        Estimate a quantile.
+
+        :param q: Quantile between 0 and 1
+        :return: Estimated value, or None if the sketch is empty
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+class _Slot:
+    __slots__ = ('epoch', 'sketch', 'sent', 'received', 'jitter_sum', 'jitter_count')
+
+    def __init__(self, relative_accuracy, max_bins):
+        self.epoch = None
+        self.sketch = DDSketch(relative_accuracy, max_bins)
+        self.sent = 0
+        self.received = 0
+        self.jitter_sum = 0.0
+        self.jitter_count = 0
+
+    def reset(self, epoch):
+        self.epoch = epoch
+        self.sketch = DDSketch(self.sketch.relative_accuracy, self.sketch.max_bins)
+        self.sent = 0
+        self.received = 0
+        self.jitter_sum = 0.0
+        self.jitter_count = 0
+
+class LatencyWindow:
+    def __init__(self, window=300, slots=10, relative_accuracy=0.01, max_bins=128):
+        """
+        Initialize a sliding-window latency summary for one target.
+
+        The window is split into a fixed ring of slots, each holding its own
+        sketch and counters. Slots older than the window are reused in place,
+        so memory does not grow with the number of replies.
+
+        :param window: Window length in seconds
+        :param slots: Number of slots the window is divided into
+        :param relative_accuracy: Relative error bound for percentiles
+        :param max_bins: Maximum number of sketch bins per slot
+        """
+        self.window = window
+        self.slot_width = window / slots
+        self._slots = [_Slot(relative_accuracy, max_bins) for _ in range(slots)]
+        self._last_rtt = None
+
+    def _epoch(self, timestamp):
+        return int(timestamp // self.slot_width)
+
+    def record(self, rtts, timestamp):
+        """
+        Record the replies of one probe burst.
+
+        :param rtts: List of round-trip times in ms, None for lost replies
+        :param timestamp: Monotonic time of the burst in seconds
+        """
+        epoch = self._epoch(timestamp)
+        slot = self._slots[epoch % len(self._slots)]
+        if slot.epoch != epoch:
+            slot.reset(epoch)
+
+        for rtt in rtts:
+            slot.sent += 1
+            if rtt is None:
+                continue
+            slot.received += 1
+            slot.sketch.add(rtt)
+            if self._last_rtt is not None:
+                slot.jitter_sum += abs(rtt - self._last_rtt)
+                slot.jitter_count += 1
+            self._last_rtt = rtt
+
+    def summary(self, timestamp):
+        """
+        Summarise the replies recorded within the window.
+
+        :param timestamp: Monotonic time the window ends at
+        :return: Dictionary containing p50, p95, p99, jitter, loss, sent and
+                 received. Latency fields are None when nothing was received.
+        """
+        epoch = self._epoch(timestamp)
+        sketch = DDSketch(self._slots[0].sketch.relative_accuracy,
+                          self._slots[0].sketch.max_bins)
+        sent = received = jitter_count = 0
+        jitter_sum = 0.0
+        for slot in self._slots:
+            if slot.epoch is None or not epoch - len(self._slots) < slot.epoch <= epoch:
+                continue
+            sketch.merge(slot.sketch)
+            sent += slot.sent
+            received += slot.received
+            jitter_sum += slot.jitter_sum
+            jitter_count += slot.jitter_count
+
+        return {
+            'p50': sketch.quantile(0.50),
+            'p95': sketch.quantile(0.95),
+            'p99': sketch.quantile(0.99),
+            'jitter': jitter_sum / jitter_count if jitter_count else None,
+            'loss': (sent - received) / sent if sent else None,
+            'sent': sent,
+            'received': received
+        }
+
+class LatencyStats:
+    def __init__(self, window=300, slots=10, relative_accuracy=0.01, max_bins=128):
+        """
+        Initialize per-host streaming latency statistics.
+
+        :param window: Sliding window length in seconds
+        :param slots: Number of slots the window is divided into
+        :param relative_accuracy: Relative error bound for percentiles
+        :param max_bins: Maximum number of sketch bins per slot
+        """
+        self._config = (window, slots, relative_accuracy, max_bins)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def record(self, host, rtts, timestamp=None):
+        """
+        Record the replies of one probe burst for a host.
+
+        Matches the ping reply listener signature so it can be registered
+        with ping.add_reply_listener.
+
+        :param host: Host the replies came from
+        :param rtts: List of round-trip times in ms, None for lost replies
+        :param timestamp: Monotonic time in seconds, defaults to now
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            window = self._windows.get(host)
+            if window is None:
+                window = self._windows[host] = LatencyWindow(*self._config)
+            window.record(rtts, timestamp)
+
+    def summary(self, host, timestamp=None):
+        """
+        Get the windowed statistics for a host.
+
+        :return: Dictionary as returned by LatencyWindow.summary, or None if the
+                 host has never been recorded
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        with self._lock:
+            window = self._windows.get(host)
+            return window.summary(timestamp) if window else None
+
+    def hosts(self):
+        """Return the hosts that have recorded statistics"""
+        with self._lock:
+            return list(self._windows)
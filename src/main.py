@@ -2,83 +2,246 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
 import dash
+import flask
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import plotly.graph_objs as go
-from datetime import datetime
+from datetime import datetime, timezone
+import functools
+import os
 import time
-import threading
+import numpy as np
 
-from ping import ping
+from ping import ping, add_reply_listener
+from latency_stats import LatencyStats
 from traceroute import traceroute
 from speed_measure import NetworkSpeedTest
 from interface_stats import InterfaceStats
+from burst import BurstSampler
 from heatmap import NetworkHeatmap
+from collector import ShardedCollector, read_targets
+from adaptive import TokenBucket, AdaptiveProber
+from timeseries import TimeSeriesStore
+from downsample import downsample
+from encoding import typed_array
+from scheduler import Scheduler
+from storage import TieredStore, DEFAULT_DATA_DIR
+from instrumentation import timings
+from export import export, FORMATS
+from render_cache import RenderCache
+from push import EventBroadcaster
+from snapshot import SnapshotPublisher
+
+HISTORY_SAMPLES = 3600
+# Interface rates kept on disk: bytes in Mbps, the rest per second
+INTERFACE_COLUMNS = ('bytes_recv', 'bytes_sent', 'packets_recv', 'packets_sent',
+                     'errin', 'errout', 'dropin', 'dropout')
+# Clients further behind than this get a full figure instead of a delta
+MAX_DELTA_POINTS = 300
+# Points per graph; longer series are downsampled to this. A fixed stand-in
+# for the pixel width of a full-width graph on a typical screen, as clients
+# do not report their graph size
+GRAPH_POINTS = 1000
+# Heatmap rows sent per page; larger fleets are paged or grouped by prefix
+HEATMAP_ROWS = 50
+# How many delta points a downsampled figure takes before it is rebuilt
+FULL_REFRESH_POINTS = 60
+# Sub-second counter sampling period for microburst detection; 0 disables it
+BURST_PERIOD_MS = int(os.environ.get('PINGCANVAS_BURST_MS', 20))
+
+# Set PINGCANVAS_TARGETS to a file with one host per line to probe a large
+# target list from PINGCANVAS_WORKERS processes (default: one per core)
+TARGETS_FILE = os.environ.get('PINGCANVAS_TARGETS')
+COLLECTOR_WORKERS = int(os.environ.get('PINGCANVAS_WORKERS', 0)) or None
+# Google, Cloudflare and Quad9 DNS by default
+HEATMAP_HOSTS = read_targets(TARGETS_FILE) if TARGETS_FILE else ["8.8.8.8", "1.1.1.1", "9.9.9.9"]
+# Probe packets per second shared by the per-second ping and the heatmap,
+# which then probes each host between every second and every minute depending
+# on its jitter, loss and recent changes; 0 restores fixed-rate sweeps. The
+# sharded collector for large target lists keeps its own fixed rate
+PROBE_BUDGET = float(os.environ.get('PINGCANVAS_PROBE_BUDGET', 10))
+# Per-stage timing histograms, served at /diagnostics; set
+# PINGCANVAS_INSTRUMENT=0 to turn them off and PINGCANVAS_DIAGNOSTICS=1 to
+# show them on the page
+timings.enabled = os.environ.get('PINGCANVAS_INSTRUMENT', '1') != '0'
+DIAGNOSTICS = os.environ.get('PINGCANVAS_DIAGNOSTICS') == '1'
+# Push new samples and panel versions to the page over Server-Sent Events
+# instead of having every client poll; PINGCANVAS_PUSH=0 restores polling
+PUSH = os.environ.get('PINGCANVAS_PUSH', '1') != '0'
+# The dev server's reloader runs the app in a child process; see start()
+DEBUG = True
 
 app = dash.Dash(__name__)
-speed_test = NetworkSpeedTest()
-interface_stats = InterfaceStats()
-heatmap = NetworkHeatmap(["8.8.8.8", "1.1.1.1", "9.9.9.9"])  # Google Cloudflare and Quad9 DNS
-
-network_data = {
-    'timestamps': [],
-    'ping_times': [],
-    'download_speeds': [],
-    'upload_speeds': [],
-    'measured_download': 0,  # Last measured download speed
-    'measured_upload': 0,    # Last measured upload speed
-    'last_speed_test': 0,    # Timestamp of last speed test
-    'traceroute_hops': [],
-    'heatmap_data': None
-}
 
-def update_network_data():
-    """Background task to update network metrics"""
+# Collector components, created by start() so importing this module stays
+# cheap and side-effect free
+speed_test = None
+interface_stats = None
+burst_sampler = None
+heatmap = None
+collector = None
+probe_budget = None
+network_history = None
+interface_history = None
+heatmap_history = None
+scheduler = None
 
-    network_data['traceroute_hops'] = traceroute("8.8.8.8") or []
-    
-    while True:
-        try:
-            timestamp = datetime.now()
-            
-            ping_time = ping("8.8.8.8")
-            interface_stats_data = interface_stats.get_rates()
-            
-            if not network_data['last_speed_test'] or \
-               (timestamp - network_data['last_speed_test']).seconds >= 60:
-                speed_results = speed_test.measure()
-                network_data['measured_download'] = speed_results['download']
-                network_data['measured_upload'] = speed_results['upload']
-                network_data['last_speed_test'] = timestamp
-
-            network_data['timestamps'].append(timestamp)
-            network_data['ping_times'].append(ping_time)
-            network_data['download_speeds'].append(network_data['measured_download'])
-            network_data['upload_speeds'].append(network_data['measured_upload'])
-     
-            if len(network_data['timestamps']) % 10 == 0:
-                heatmap.measure()
-                network_data['heatmap_data'] = {
-                    'z': heatmap.data.tolist(),
-                    'hosts': heatmap.hosts
-                }
-            
-            # Update traceroute every minute and store result even if empty
-            if len(network_data['timestamps']) % 60 == 0:
-                network_data['traceroute_hops'] = traceroute("8.8.8.8") or []
-            
-            if len(network_data['timestamps']) > 3600:
-                for key in network_data:
-                    if key not in ['traceroute_hops', 'heatmap_data', 'measured_download', 
-                                 'measured_upload', 'last_speed_test']:
-                        network_data[key] = network_data[key][-3600:]
-            
-            time.sleep(1)
-        except Exception as e:
-            print(f"Error in update thread: {e}")
-            time.sleep(1)
-
-threading.Thread(target=update_network_data, daemon=True).start()
+latency_stats = LatencyStats(window=300)
+# Outputs rendered once per data version and shared by every client
+render_cache = RenderCache()
+# Server-Sent Events to the pages in push mode, see /events
+broadcaster = EventBroadcaster()
+# Per-second samples; timestamps are epoch milliseconds. Only the collector
+# touches this buffer; callbacks read the published snapshots
+series = TimeSeriesStore(HISTORY_SAMPLES, ('ping', 'download', 'upload'))
+# The collector jobs publish an immutable snapshot of the series, their latest
+# results and a data version per panel whenever something changes, so
+# callbacks see one consistent state without locking
+snapshots = SnapshotPublisher(
+    series.columns,
+    ('status', 'traceroute', 'heatmap'),
+    measured_download=0,  # Last measured download speed
+    measured_upload=0,    # Last measured upload speed
+    last_speed_test=0,    # Timestamp of last speed test
+    bursts=None,          # Sub-second rate report of the last second
+    traceroute_hops=()
+)
+
+def restore_history():
+    """Reload the in-memory buffers from the on-disk history"""
+    rows = network_history.tail(HISTORY_SAMPLES)
+    for i, timestamp in enumerate(rows['timestamp']):
+        series.append(int(timestamp), **{column: rows[column][i] for column in series.columns})
+    snapshots.publish(series=series)
+
+    if heatmap_history is None:
+        return
+    rows = heatmap_history.tail(heatmap.timepoints)
+    if len(rows['timestamp']):
+        heatmap.load_history(np.vstack([rows[host] for host in heatmap.hosts]), rows['timestamp'])
+
+def publish_snapshot(panels, series=None, **state):
+    """
+    Publish new collector results and tell pushed pages to fetch the panels.
+
+    :param panels: Panels whose data changed
+    :param series: The series buffer if it changed
+    :param state: Changed results, see snapshots
+    :return: The published Snapshot
+    """
+    snapshot = snapshots.publish(series=series, panels=panels, **state)
+    for panel in panels:
+        broadcaster.publish('version', {'panel': panel, 'version': snapshot.panels[panel]})
+    return snapshot
+
+def sample_network():
+    """Take one per-second sample of latency and the last measured speeds"""
+    timestamp = time.time()
+    if probe_budget:
+        probe_budget.charge()
+    ping_time = ping("8.8.8.8", count=1, timeout=0.9)
+    interface_rates = interface_stats.get_rates()
+    bursts = burst_sampler.report() if burst_sampler else None
+
+    state = snapshots.current.state
+    sample = {
+        'ping': ping_time,
+        'download': state['measured_download'],
+        'upload': state['measured_upload']
+    }
+    with timings.time('store.series'):
+        series.append(int(timestamp * 1000), **sample)
+    with timings.time('store.history'):
+        network_history.append(int(timestamp * 1000), **sample)
+        interface_history.append(int(timestamp * 1000), **interface_rates)
+    snapshot = publish_snapshot(('status',), series=series, bursts=bursts)
+    # Pages append the sample to their graphs themselves; x is in the graphs'
+    # naive local epoch ms, see local_datetimes
+    broadcaster.publish('sample', {
+        'total': snapshot.total,
+        'x': int(local_datetimes(np.int64(timestamp * 1000)).astype(np.int64)),
+        **{column: None if value is None or np.isnan(value) else float(value)
+           for column, value in sample.items()}
+    })
+
+def run_speed_test():
+    """Measure download and upload speed"""
+    speed_results = speed_test.measure()
+    publish_snapshot(('status',),
+                     measured_download=speed_results['download'],
+                     measured_upload=speed_results['upload'],
+                     last_speed_test=datetime.now())
+
+def measure_heatmap():
+    """Sweep all heatmap hosts"""
+    heatmap.measure()
+    if heatmap_history is not None:
+        column = (heatmap.current_index - 1) % heatmap.timepoints
+        heatmap_history.append(
+            int(heatmap.timestamps[column]),
+            **{host: heatmap.data[i, column] for i, host in enumerate(heatmap.hosts)}
+        )
+    publish_snapshot(('heatmap',))
+
+def update_traceroute_hops():
+    """Trace the path to the monitored host, storing the result even if empty"""
+    publish_snapshot(('traceroute',), traceroute_hops=tuple(traceroute("8.8.8.8") or ()))
+
+def start():
+    """
+    Create the collector components, reload history and start the jobs.
+
+    Call this once in the process that serves requests, before serving.
+
+    :return: The running Scheduler
+    """
+    global speed_test, interface_stats, burst_sampler, heatmap, collector, probe_budget
+    global network_history, interface_history, heatmap_history, scheduler
+
+    # Set PINGCANVAS_SPEED_SERVER to host[:port] of a throughput.py server to
+    # measure against it instead of public speedtest.net servers
+    speed_test = NetworkSpeedTest(server=os.environ.get('PINGCANVAS_SPEED_SERVER'))
+    interface_stats = InterfaceStats()
+    if BURST_PERIOD_MS:
+        burst_sampler = BurstSampler(interface_stats.interface_name, period=BURST_PERIOD_MS / 1000)
+    if TARGETS_FILE:
+        collector = ShardedCollector(HEATMAP_HOSTS, workers=COLLECTOR_WORKERS).start()
+    adaptive = None
+    if PROBE_BUDGET:
+        # The per-second ping is charged first, so the heatmap gets the rest
+        if PROBE_BUDGET <= 1:
+            raise ValueError("PINGCANVAS_PROBE_BUDGET must be above the 1 packet/s "
+                             "of the per-second ping, or 0 to turn it off")
+        probe_budget = TokenBucket(PROBE_BUDGET)
+        if collector is None:
+            adaptive = AdaptiveProber(HEATMAP_HOSTS, probe_budget)
+    heatmap = NetworkHeatmap(HEATMAP_HOSTS, collector=collector, adaptive=adaptive)
+    add_reply_listener(latency_stats.record)
+
+    # On-disk history with 1 min and 1 h rollups, reloaded on restart. The
+    # heatmap keeps files per host, which does not scale to large target lists
+    network_history = TieredStore(os.path.join(DEFAULT_DATA_DIR, 'network'), series.columns)
+    interface_history = TieredStore(os.path.join(DEFAULT_DATA_DIR, 'interface'), INTERFACE_COLUMNS)
+    if collector is None:
+        heatmap_history = TieredStore(os.path.join(DEFAULT_DATA_DIR, 'heatmap'), heatmap.hosts)
+    restore_history()
+
+    # Each collector job runs on its own fixed-rate timer, so a slow speed test
+    # or traceroute no longer delays the per-second samples
+    scheduler = Scheduler(timings=timings)
+    scheduler.add_job('sample', sample_network, period=1)
+    scheduler.add_job('speed_test', run_speed_test, period=60, jitter=5)
+    scheduler.add_job('heatmap', measure_heatmap, period=10, jitter=1, initial_delay=10)
+    if adaptive:
+        # probe_due's default timeout keeps each run inside the period
+        scheduler.add_job('probe', heatmap.probe_due, period=1)
+    scheduler.add_job('traceroute', update_traceroute_hops, period=60, jitter=5)
+    if burst_sampler:
+        scheduler.add_job('bursts', burst_sampler.sample, period=BURST_PERIOD_MS / 1000)
+    if collector:
+        scheduler.add_job('collector', collector.check, period=5)
+    scheduler.start()
+    return scheduler
 
 app.layout = html.Div([
     html.H1('Ping Canvas', 
@@ -113,15 +276,45 @@ app.layout = html.Div([
         
         html.Div([
             html.H3('Network Latency Heatmap'),
-            dcc.Graph(id='heatmap-graph')
-        ], className='graph-container')
+            dcc.Graph(id='heatmap-graph'),
+            # Only needed when there are more hosts than fit on one page
+            html.Div([
+                html.Button('Previous hosts', id='heatmap-prev', n_clicks=0),
+                html.Button('Next hosts', id='heatmap-next', n_clicks=0),
+                html.Button('Group by prefix', id='heatmap-group', n_clicks=0)
+            ], style={'display': 'block' if len(HEATMAP_HOSTS) > HEATMAP_ROWS else 'none'})
+        ], className='graph-container'),
+
+        html.Div([
+            html.H3('Diagnostics', style={'color': 'white'}),
+            html.Div(id='diagnostics-display')
+        ], className='status-container', style={'display': 'block' if DIAGNOSTICS else 'none'})
     ]),
     
+    # Each panel polls at the rate its data can change. In push mode the
+    # timers stay off and assets/push.js ticks them when the server announces
+    # new data, or turns them on if the browser cannot receive events
     dcc.Interval(
         id='interval-component',
         interval=1000,
-        n_intervals=0
-    )
+        n_intervals=0,
+        disabled=PUSH
+    ),
+    dcc.Interval(id='status-interval', interval=1000, n_intervals=0, disabled=PUSH),
+    dcc.Interval(id='traceroute-interval', interval=5000, n_intervals=0, disabled=PUSH),
+    dcc.Interval(id='heatmap-interval', interval=5000, n_intervals=0, disabled=PUSH),
+    html.Div(id='push', **{'data-url': app.get_relative_path('/events')} if PUSH else {}),
+    dcc.Interval(id='diagnostics-interval', interval=5000, n_intervals=0, disabled=not DIAGNOSTICS),
+
+    # What each series graph of this client shows, see update_series_graph
+    dcc.Store(id='ping-cursor', storage_type='memory'),
+    dcc.Store(id='speed-cursor', storage_type='memory'),
+    # Data version each panel last rendered for this client
+    dcc.Store(id='status-version', storage_type='memory'),
+    dcc.Store(id='traceroute-version', storage_type='memory'),
+    dcc.Store(id='heatmap-version', storage_type='memory'),
+    # Heatmap page offset and grouping of this client
+    dcc.Store(id='heatmap-view', storage_type='memory', data={'offset': 0, 'grouped': False})
 ], style={
     'backgroundColor': 'black',
     'minHeight': '100vh',
@@ -129,6 +322,133 @@ app.layout = html.Div([
     'padding': '20px'
 })
 
+def timed_callback(name):
+    """
+    Record the run time of a callback as stage 'callback.<name>'.
+
+    The rest of its request, mostly encoding the outputs as JSON, is
+    recorded as 'callback.encode' by record_request_time.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                timings.record(f'callback.{name}', elapsed)
+                if flask.has_request_context():
+                    flask.g.callback_ns = elapsed
+        return wrapper
+    return decorator
+
+@app.server.before_request
+def start_request_timer():
+    flask.g.request_start = time.perf_counter_ns()
+
+@app.server.after_request
+def record_request_time(response):
+    # Dash runs one callback per update request and encodes its outputs
+    # inside the request, so what the callback itself did not take is
+    # decoding the inputs and encoding the outputs
+    if flask.request.path.endswith('/_dash-update-component') and 'request_start' in flask.g:
+        elapsed = time.perf_counter_ns() - flask.g.request_start
+        timings.record('callback.request', elapsed)
+        if 'callback_ns' in flask.g:
+            timings.record('callback.encode', elapsed - flask.g.callback_ns)
+    return response
+
+@app.server.route('/diagnostics')
+def diagnostics():
+    """Serve the stage timings and job statistics as JSON"""
+    return flask.jsonify({
+        'stages': timings.snapshot(),
+        'jobs': scheduler.stats() if scheduler else {},
+        'render_cache': render_cache.stats(),
+        'probes': heatmap.adaptive.stats() if heatmap and heatmap.adaptive else {}
+    })
+
+# Exportable series: the store holding them and the columns to export,
+# None for all (heatmap columns are hosts)
+EXPORT_SERIES = {
+    'ping': (lambda: network_history, ('ping',)),
+    'speed': (lambda: network_history, ('download', 'upload')),
+    'interface': (lambda: interface_history, None),
+    'heatmap': (lambda: heatmap_history, None)
+}
+
+@app.server.route('/export/<name>')
+def export_series(name):
+    """
+    Stream a time range of a stored series.
+
+    Query parameters: start and end in epoch ms, resolution in ms (picks the
+    raw, 1 min or 1 h tier), format (ndjson, csv or binary) and columns, a
+    comma-separated subset such as heatmap hosts. The response is generated
+    batch by batch while it is sent.
+    """
+    if name not in EXPORT_SERIES:
+        flask.abort(404, f"Unknown series: {name}")
+    get_store, columns = EXPORT_SERIES[name]
+    store = get_store()
+    if store is None:
+        flask.abort(404, f"{name} history is not being recorded")
+
+    args = flask.request.args
+    format = args.get('format', 'ndjson')
+    if args.get('columns'):
+        columns = args['columns'].split(',')
+    try:
+        start, end = (int(args[key]) if args.get(key) else None for key in ('start', 'end'))
+        tier, chunks = export(store, format, start, end, int(args.get('resolution', 0)), columns)
+    except ValueError as e:
+        flask.abort(400, str(e))
+
+    extension = 'bin' if format == 'binary' else format
+    return flask.Response(chunks, mimetype=FORMATS[format], headers={
+        'Content-Disposition': f'attachment; filename="pingcanvas-{name}.{extension}"',
+        'X-PingCanvas-Tier': tier
+    })
+
+@app.server.route('/events')
+def events():
+    """
+    Stream new samples and panel versions as Server-Sent Events.
+
+    Events are 'config' once on connect, 'sample' with the sample total,
+    x and every series value, 'version' with a panel and its data version,
+    and 'dropped' when the client fell behind and missed events.
+    """
+    config = {
+        'history': HISTORY_SAMPLES,
+        'refresh': FULL_REFRESH_POINTS,
+        'graphs': {graph: list(spec['columns']) for graph, spec in SERIES_GRAPHS.items()}
+    }
+    return flask.Response(broadcaster.subscribe([('config', config)]),
+                          mimetype='text/event-stream',
+                          headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# UTC offsets change on quarter-hour boundaries at most
+OFFSET_STEP_MS = 15 * 60 * 1000
+
+def local_datetimes(timestamps):
+    """
+    Convert epoch-ms timestamps to naive local datetime64 values for plotting.
+
+    Each timestamp gets the UTC offset in effect at its own time, so history
+    from before a daylight saving change still shows its wall-clock time.
+    Offsets are looked up once per quarter hour the timestamps span.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    steps, inverse = np.unique(timestamps // OFFSET_STEP_MS, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(step * OFFSET_STEP_MS / 1000, timezone.utc).astimezone()
+        .utcoffset().total_seconds() * 1000
+        for step in steps.tolist()
+    ], dtype=np.int64)
+    return (timestamps + offsets[inverse].reshape(timestamps.shape)).astype('datetime64[ms]')
+
 def create_graph_layout(title, y_title):
     return {
         'title': {
@@ -139,6 +459,8 @@ def create_graph_layout(title, y_title):
         },
         'xaxis': {
             'title': 'Time (HH:MM:SS)',
+            # Typed-array x values arrive as epoch ms, see encoding.typed_array
+            'type': 'date',
             'gridcolor': '#333',
             'showgrid': True,
             'color': 'white',
@@ -161,6 +483,31 @@ def create_graph_layout(title, y_title):
         }
     }
 
+def format_latency_summary(summary):
+    """Format windowed latency statistics for the status panel"""
+    if not summary or summary['p50'] is None:
+        return "Percentiles: no replies in the last 5 minutes"
+
+    jitter = f"{summary['jitter']:.1f} ms" if summary['jitter'] is not None else "n/a"
+    return (
+        f"p50/p95/p99: {summary['p50']:.1f} / {summary['p95']:.1f} / {summary['p99']:.1f} ms, "
+        f"Jitter: {jitter}, Loss: {summary['loss'] * 100:.1f}%"
+    )
+
+def format_burst_summary(report):
+    """Format the sub-second rate report of the last second for the status panel"""
+    if not report or report['recv']['peak'] is None:
+        return None
+
+    parts = []
+    for direction, label in (('recv', 'Rx'), ('sent', 'Tx')):
+        rates = report[direction]
+        part = f"{label} peak/p99: {rates['peak']:.1f} / {rates['p99']:.1f} Mbps"
+        if rates['bursts'] is not None:
+            part += f", {rates['bursts']} bursts"
+        parts.append(part)
+    return "Microbursts: " + "; ".join(parts)
+
 def format_traceroute_hop(hop):
     """Format a single traceroute hop for display"""
     hop_num, ip, rtt = hop
@@ -195,167 +542,448 @@ def format_traceroute_hop(hop):
         'latency': latency_str
     }
 
-@app.callback(
-    [Output('status-display', 'children'),
-     Output('traceroute-display', 'children'),
-     Output('ping-graph', 'figure'),
-     Output('speed-graph', 'figure'),
-     Output('heatmap-graph', 'figure')],
-    Input('interval-component', 'n_intervals')
-)
-def update_graphs(n):
+def build_ping_figure(ping):
+    """
+    Build the latency figure.
 
-    if not network_data['timestamps']:
-        current_status = html.Div([
-            html.P("Collecting data...", style={'color': 'white'}),
-            html.P("Please wait a few seconds", style={'color': 'white'})
-        ])
-        traceroute_status = html.P("Waiting for first traceroute...", 
-                                  style={'color': 'white'})
-        
-        ping_figure = {
-            'data': [],
-            'layout': create_graph_layout(
-                'Network Latency Over Time',
-                'Ping (ms)'
-            )
-        }
-        speed_figure = {
-            'data': [],
-            'layout': create_graph_layout(
-                'Network Speed Over Time',
-                'Speed (MB/s)'
-            )
-        }
-        heatmap_figure = {
-            'data': [],
-            'layout': create_graph_layout(
-                'Network Latency Heatmap',
-                'Hosts'
-            )
+    :param ping: Tuple of (timestamps, latencies)
+    """
+    return {
+        'data': [go.Scatter(
+            x=ping[0],
+            y=ping[1],
+            name='Round Trip Time',
+            mode='lines+markers',
+            line={'color': '#1f77b4'}
+        )],
+        'layout': {
+            **create_graph_layout(
+                'Network Latency (Ping Response Time)',
+                'Latency (ms)'
+            ),
+            'uirevision': 'ping'
         }
-        return current_status, traceroute_status, ping_figure, speed_figure, heatmap_figure
+    }
 
-    try:
-        current_status = html.Div([
-            html.P(f"Current Ping: {network_data['ping_times'][-1]:.1f} ms",
-                  style={'color': 'white'}),
-            html.P([
-                "Network Speed (measured every 5 minutes):",
-                html.Br(),
-                f"Download: {network_data['measured_download']:.1f} Mbps",
-                html.Br(),
-                f"Upload: {network_data['measured_upload']:.1f} Mbps",
-                html.Br(),
-                html.Span(
-                    f"Last measured: {network_data['last_speed_test'].strftime('%H:%M:%S')}" 
-                    if network_data['last_speed_test'] else "Not yet measured",
-                    style={'fontSize': 'smaller', 'color': '#888'}
-                )
-            ], style={'color': 'white'})
-        ])
-        
-        traceroute_status = html.Div([
-            html.Table([
-                html.Tr([
-                    html.Th(col, style={'color': 'white', 'padding': '10px', 'textAlign': 'left'}) 
-                    for col in ['Hop', 'IP', 'Latency']
-                ]),
-                *[
-                    html.Tr([
-                        html.Td(
-                            formatted_hop['hop_num'], 
-                            style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
-                        ),
-                        html.Td(
-                            formatted_hop['ip'], 
-                            style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
-                        ),
-                        html.Td(
-                            formatted_hop['latency'], 
-                            style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
-                        )
-                    ]) for formatted_hop in [
-                        format_traceroute_hop(hop) 
-                        for hop in network_data.get('traceroute_hops', [])
-                    ]
-                ]
-            ], style={
-                'width': '100%',
-                'borderCollapse': 'collapse',
-                'backgroundColor': '#222',
-                'borderRadius': '5px'
-            }) if network_data.get('traceroute_hops') else html.P(
-                "No traceroute data available", 
-                style={'color': 'white'}
-            )
-        ])
-        
-        ping_figure = {
-            'data': [go.Scatter(
-                x=network_data['timestamps'],
-                y=network_data['ping_times'],
-                name='Round Trip Time',
+def build_speed_figure(download, upload):
+    """
+    Build the speed figure.
+
+    :param download: Tuple of (timestamps, download speeds)
+    :param upload: Tuple of (timestamps, upload speeds)
+    """
+    return {
+        'data': [
+            go.Scatter(
+                x=download[0],
+                y=download[1],
+                name='Download',
                 mode='lines+markers',
-                line={'color': '#1f77b4'}
-            )],
-            'layout': create_graph_layout(
-                'Network Latency (Ping Response Time)',
-                'Latency (ms)'
+                line={'color': '#2ca02c'}
+            ),
+            go.Scatter(
+                x=upload[0],
+                y=upload[1],
+                name='Upload',
+                mode='lines+markers',
+                line={'color': '#ff7f0e'}
             )
-        }
-        
-        speed_figure = {
-            'data': [
-                go.Scatter(
-                    x=network_data['timestamps'],
-                    y=network_data['download_speeds'],
-                    name='Download',
-                    mode='lines+markers',
-                    line={'color': '#2ca02c'}
-                ),
-                go.Scatter(
-                    x=network_data['timestamps'],
-                    y=network_data['upload_speeds'],
-                    name='Upload',
-                    mode='lines+markers',
-                    line={'color': '#ff7f0e'}
-                )
-            ],
-            'layout': create_graph_layout(
+        ],
+        'layout': {
+            **create_graph_layout(
                 'Network Speed (Measured Every Minute)',
                 'Speed (Megabits per second)'
-            )
+            ),
+            'uirevision': 'speed'
         }
-        
-        # Heatmap figure
-        if network_data.get('heatmap_data'):
-            heatmap_figure = {
-                'data': [go.Heatmap(
-                    z=network_data['heatmap_data']['z'],
-                    x=network_data['timestamps'][-len(network_data['heatmap_data']['z'][0]):],
-                    y=network_data['heatmap_data']['hosts'],
-                    colorscale='RdYlGn_r',
-                    colorbar={'title': 'Latency (ms)'}
-                )],
-                'layout': create_graph_layout(
-                    'Network Latency Heatmap',
-                    'Hosts'
-                )
+    }
+
+# Latency uses min/max buckets so spikes survive downsampling
+SERIES_GRAPHS = {
+    'ping': {'columns': ('ping',), 'method': 'minmax', 'build': build_ping_figure},
+    'speed': {'columns': ('download', 'upload'), 'method': 'lttb', 'build': build_speed_figure}
+}
+
+def series_traces(snapshot, columns, method, window=None):
+    """
+    Read and downsample series for plotting.
+
+    :param snapshot: Snapshot holding the live view
+    :param columns: Series columns, one trace each
+    :param method: Downsampling method, see downsample.downsample
+    :param window: Optional (start, end) in epoch ms. The live view reads the
+                   snapshot; a window is read from the on-disk history at the
+                   cheapest resolution that still fills the graph. From a
+                   rollup tier, 'minmax' series plot each row's min and max
+                   so spikes stay visible, and other series its mean.
+    :return: List of (timestamps, values) tuples as typed array specs
+    """
+    if window is None:
+        data = {column: (snapshot.timestamps, snapshot.columns[column]) for column in columns}
+    else:
+        start, end = window
+        tier, rows = network_history.query(start, end, resolution=(end - start) // GRAPH_POINTS)
+        if tier == 'raw':
+            data = {column: (rows['timestamp'], rows[column]) for column in columns}
+        elif method == 'minmax':
+            data = {
+                column: (np.repeat(rows['timestamp'], 2),
+                         np.column_stack([rows[f'{column}_min'], rows[f'{column}_max']]).ravel())
+                for column in columns
             }
         else:
-            heatmap_figure = {
-                'data': [],
-                'layout': create_graph_layout(
-                    'Network Latency Heatmap',
-                    'Hosts'
-                )
-            }
-        
-        return current_status, traceroute_status, ping_figure, speed_figure, heatmap_figure
+            data = {column: (rows['timestamp'], rows[f'{column}_mean']) for column in columns}
+
+    traces = []
+    for column in columns:
+        timestamps, values = data[column]
+        indices = downsample(timestamps, values, GRAPH_POINTS, method)
+        traces.append((
+            typed_array(local_datetimes(timestamps[indices])),
+            typed_array(values[indices])
+        ))
+    return traces
+
+def parse_zoom_window(relayout):
+    """
+    Extract the zoomed x range from a graph's relayoutData.
+
+    :return: (start, end) in epoch ms, or None if the x axis is not zoomed
+    """
+    if not relayout:
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif 'xaxis.range' in relayout:
+        bounds = relayout['xaxis.range']
+    else:
+        return None
+    try:
+        # Axis values are naive local times, see local_datetimes
+        start, end = (int(datetime.fromisoformat(str(bound)).timestamp() * 1000) for bound in bounds)
+    except ValueError:
+        return None
+    return (start, end) if start < end else None
+
+def with_meta(figure, **meta):
+    """
+    Attach what a series figure shows to its layout.
+
+    In push mode the page appends pushed samples itself and needs to know
+    which sample total a figure was built at and whether it is zoomed.
+    """
+    return {**figure, 'layout': {**figure['layout'], 'meta': meta}}
+
+def update_series_graph(graph, cursor, relayout):
+    """
+    Update one series graph for one client.
+
+    A client gets a full, downsampled figure when it first connects, resets
+    its zoom, falls more than MAX_DELTA_POINTS samples behind, or has taken
+    FULL_REFRESH_POINTS deltas on a downsampled figure. Otherwise only the
+    samples added since its cursor are sent through extendData. Zooming
+    replaces the figure with the visible window at full detail and pauses
+    live updates until the zoom is reset.
+
+    :param graph: Key into SERIES_GRAPHS
+    :param cursor: The client's cursor: total samples sent, total at the last
+                   full figure, and whether it is zoomed
+    :param relayout: The graph's relayoutData
+    :return: Tuple of (figure, extendData, cursor)
+    """
+    spec = SERIES_GRAPHS[graph]
+    cursor = cursor or {}
+    # Everything below reads this one snapshot, so the totals, lengths and
+    # values agree even while the collector appends
+    snapshot = snapshots.current
+
+    if dash.ctx.triggered_id == f'{graph}-graph':
+        window = parse_zoom_window(relayout)
+        if window:
+            figure = render_cache.get(
+                (graph, 'window', window, snapshot.total),
+                lambda: with_meta(spec['build'](*series_traces(snapshot, spec['columns'], spec['method'],
+                                                               window)),
+                                  zoomed=True)
+            )
+            return figure, dash.no_update, {**cursor, 'zoomed': True}
+        if not relayout or not relayout.get('xaxis.autorange'):
+            return dash.no_update, dash.no_update, dash.no_update
+        cursor = {}
+    elif cursor.get('zoomed'):
+        return dash.no_update, dash.no_update, dash.no_update
+
+    total = snapshot.total
+    sent = cursor.get('total')
+    new_points = total - sent if sent is not None else None
+    stale = len(snapshot) > GRAPH_POINTS and total - cursor.get('full', 0) >= FULL_REFRESH_POINTS
+
+    if new_points is None or new_points < 0 or new_points > min(len(snapshot), MAX_DELTA_POINTS) or stale:
+        figure = render_cache.get(
+            (graph, 'full', total),
+            lambda: with_meta(spec['build'](*series_traces(snapshot, spec['columns'], spec['method'])),
+                              total=total, downsampled=len(snapshot) > GRAPH_POINTS)
+        )
+        return figure, dash.no_update, {'total': total, 'full': total}
+
+    if new_points == 0:
+        return dash.no_update, dash.no_update, dash.no_update
+
+    def build_delta():
+        # Plotly.extendTraces only takes plain arrays, so deltas stay JSON
+        # lists; they hold a handful of points
+        timestamps = local_datetimes(snapshot.timestamps[-new_points:])
+        return [
+            {'x': [timestamps] * len(spec['columns']),
+             'y': [snapshot.columns[column][-new_points:] for column in spec['columns']]},
+            list(range(len(spec['columns']))),
+            HISTORY_SAMPLES
+        ]
+
+    # Clients that poll in step ask for the same delta
+    delta = render_cache.get((graph, 'delta', total, new_points), build_delta)
+    return dash.no_update, delta, {**cursor, 'total': total}
+
+@app.callback(
+    [Output('ping-graph', 'figure'),
+     Output('ping-graph', 'extendData'),
+     Output('ping-cursor', 'data')],
+    [Input('interval-component', 'n_intervals'),
+     Input('ping-graph', 'relayoutData')],
+    State('ping-cursor', 'data')
+)
+@timed_callback('ping_graph')
+def update_ping_graph(n, relayout, cursor):
+    return update_series_graph('ping', cursor, relayout)
+
+@app.callback(
+    [Output('speed-graph', 'figure'),
+     Output('speed-graph', 'extendData'),
+     Output('speed-cursor', 'data')],
+    [Input('interval-component', 'n_intervals'),
+     Input('speed-graph', 'relayoutData')],
+    State('speed-cursor', 'data')
+)
+@timed_callback('speed_graph')
+def update_speed_graph(n, relayout, cursor):
+    return update_series_graph('speed', cursor, relayout)
+
+def render_status(snapshot):
+    """Render the current network status panel"""
+    if not len(snapshot):
+        return html.Div([
+            html.P("Collecting data...", style={'color': 'white'}),
+            html.P("Please wait a few seconds", style={'color': 'white'})
+        ])
+
+    state = snapshot.state
+    # Lost pings are stored as NaN
+    last_ping = snapshot.last('ping')
+    current = f"{last_ping:.1f} ms" if not np.isnan(last_ping) else "n/a"
+    return html.Div([
+        html.P(f"Current Ping: {current}",
+              style={'color': 'white'}),
+        html.P(format_latency_summary(latency_stats.summary("8.8.8.8")),
+              style={'color': 'white', 'fontSize': 'smaller'}),
+        html.P(format_burst_summary(state['bursts']),
+              style={'color': 'white', 'fontSize': 'smaller'}),
+        html.P([
+            "Network Speed (measured every 5 minutes):",
+            html.Br(),
+            f"Download: {state['measured_download']:.1f} Mbps",
+            html.Br(),
+            f"Upload: {state['measured_upload']:.1f} Mbps",
+            html.Br(),
+            html.Span(
+                f"Last measured: {state['last_speed_test'].strftime('%H:%M:%S')}" 
+                if state['last_speed_test'] else "Not yet measured",
+                style={'fontSize': 'smaller', 'color': '#888'}
+            )
+        ], style={'color': 'white'})
+    ])
+
+def render_traceroute(snapshot):
+    """Render the traceroute table"""
+    if not snapshot.panels['traceroute']:
+        return html.P("Waiting for first traceroute...", 
+                      style={'color': 'white'})
+
+    return html.Div([
+        html.Table([
+            html.Tr([
+                html.Th(col, style={'color': 'white', 'padding': '10px', 'textAlign': 'left'}) 
+                for col in ['Hop', 'IP', 'Latency']
+            ]),
+            *[
+                html.Tr([
+                    html.Td(
+                        formatted_hop['hop_num'], 
+                        style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
+                    ),
+                    html.Td(
+                        formatted_hop['ip'], 
+                        style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
+                    ),
+                    html.Td(
+                        formatted_hop['latency'], 
+                        style={'color': 'white', 'padding': '5px', 'textAlign': 'left'}
+                    )
+                ]) for formatted_hop in [
+                    format_traceroute_hop(hop) 
+                    for hop in snapshot.state['traceroute_hops']
+                ]
+            ]
+        ], style={
+            'width': '100%',
+            'borderCollapse': 'collapse',
+            'backgroundColor': '#222',
+            'borderRadius': '5px'
+        }) if snapshot.state['traceroute_hops'] else html.P(
+            "No traceroute data available", 
+            style={'color': 'white'}
+        )
+    ])
+
+def render_heatmap(view):
+    """
+    Render the multi-host latency heatmap figure for one page.
+
+    The matrix is read from the heatmap rather than a snapshot, as copying
+    it on every sweep would grow with the target list.
+
+    :param view: Dictionary with the page offset and whether rows are
+                 grouped by prefix
+    """
+    layout = create_graph_layout(
+        'Network Latency Heatmap',
+        'Hosts'
+    )
+    if heatmap is None or not heatmap.columns:
+        return {'data': [], 'layout': layout}
+
+    if view['grouped']:
+        labels, timestamps, data = heatmap.aggregate()
+        labels = labels[view['offset']:view['offset'] + HEATMAP_ROWS]
+        data = data[view['offset']:view['offset'] + HEATMAP_ROWS]
+    else:
+        labels, timestamps, data = heatmap.rows(view['offset'], HEATMAP_ROWS)
+
+    return {
+        'data': [go.Heatmap(
+            z=typed_array(data.astype(np.float32)),
+            x=typed_array(local_datetimes(timestamps)),
+            y=labels,
+            colorscale='RdYlGn_r',
+            colorbar={'title': 'Latency (ms)'}
+        )],
+        'layout': layout
+    }
+
+def render_diagnostics():
+    """Render the stage timing table of the diagnostics panel"""
+    def cell(value):
+        return html.Td('-' if value is None else f"{value:.3f}", style={'textAlign': 'right'})
+
+    header = html.Tr([html.Th(title) for title in
+                      ('Stage', 'Count', 'p50 ms', 'p90 ms', 'p99 ms', 'Max ms')])
+    rows = [
+        html.Tr([html.Td(stage), html.Td(stats['count'], style={'textAlign': 'right'}),
+                 cell(stats['p50']), cell(stats['p90']), cell(stats['p99']), cell(stats['max'])])
+        for stage, stats in timings.snapshot().items()
+    ]
+    return html.Table([header] + rows, style={'color': 'white', 'fontSize': 'smaller'})
+
+def render_if_changed(panel, seen_version, render, view=()):
+    """
+    Render a panel only if its data changed since the client last saw it.
+
+    A version is rendered once and served to every client from render_cache.
+
+    :param panel: Key into the snapshot's panel versions
+    :param seen_version: Version the client last rendered, or None
+    :param render: Callable taking the current Snapshot and returning the
+                   panel content
+    :param view: Hashable client view settings the content depends on
+    :return: Tuple of (content, version), both no_update when unchanged
+    """
+    snapshot = snapshots.current
+    version = snapshot.panels[panel]
+    if version == seen_version:
+        return dash.no_update, dash.no_update
+    try:
+        return render_cache.get((panel, version, view), lambda: render(snapshot)), version
     except Exception as e:
-        print(f"Error updating graphs: {e}")
-        return update_graphs(n)  
+        # Leave the client's version unchanged so the next tick retries
+        print(f"Error updating {panel} panel: {e}")
+        return dash.no_update, dash.no_update
+
+@app.callback(
+    [Output('status-display', 'children'),
+     Output('status-version', 'data')],
+    Input('status-interval', 'n_intervals'),
+    State('status-version', 'data')
+)
+@timed_callback('status')
+def update_status(n, seen_version):
+    return render_if_changed('status', seen_version, render_status)
+
+@app.callback(
+    [Output('traceroute-display', 'children'),
+     Output('traceroute-version', 'data')],
+    Input('traceroute-interval', 'n_intervals'),
+    State('traceroute-version', 'data')
+)
+@timed_callback('traceroute')
+def update_traceroute(n, seen_version):
+    return render_if_changed('traceroute', seen_version, render_traceroute)
+
+@app.callback(
+    [Output('heatmap-graph', 'figure'),
+     Output('heatmap-version', 'data'),
+     Output('heatmap-view', 'data')],
+    [Input('heatmap-interval', 'n_intervals'),
+     Input('heatmap-prev', 'n_clicks'),
+     Input('heatmap-next', 'n_clicks'),
+     Input('heatmap-group', 'n_clicks')],
+    [State('heatmap-version', 'data'),
+     State('heatmap-view', 'data')]
+)
+@timed_callback('heatmap')
+def update_heatmap(n, prev_clicks, next_clicks, group_clicks, seen_version, view):
+    if heatmap is None:
+        rows = 0
+    else:
+        rows = len(heatmap.groups()[0]) if view['grouped'] else len(heatmap.hosts)
+    view = dict(view)
+    if dash.ctx.triggered_id == 'heatmap-prev':
+        view['offset'] = max(0, view['offset'] - HEATMAP_ROWS)
+    elif dash.ctx.triggered_id == 'heatmap-next':
+        view['offset'] = min(view['offset'] + HEATMAP_ROWS, max(0, rows - 1))
+    elif dash.ctx.triggered_id == 'heatmap-group':
+        view = {'offset': 0, 'grouped': not view['grouped']}
+
+    # A page change must re-render even when the data has not changed
+    figure, version = render_if_changed(
+        'heatmap',
+        seen_version[0] if seen_version and seen_version[1:] == [view['offset'], view['grouped']] else None,
+        lambda snapshot: render_heatmap(view),
+        (view['offset'], view['grouped'])
+    )
+    if version is dash.no_update:
+        return dash.no_update, dash.no_update, dash.no_update
+    return figure, [version, view['offset'], view['grouped']], view
+
+@app.callback(
+    Output('diagnostics-display', 'children'),
+    Input('diagnostics-interval', 'n_intervals')
+)
+def update_diagnostics(n):
+    return render_diagnostics()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # In debug mode this process only watches files; the reloader runs the
+    # server in a child process with WERKZEUG_RUN_MAIN set, and only that
+    # one should collect
+    if not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start()
+    app.run(debug=DEBUG)
@@ -1,35 +1,111 @@
 import subprocess
+import threading
 
-def ping(host, count=4, timeout=2, ipv6=False):
+import icmp
+from instrumentation import timings
+
+_prober = None
+_prober_lock = threading.Lock()
+_reply_listeners = []
+
+def get_prober():
+    """Return the shared in-process ICMP prober, creating it on first use"""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            _prober = icmp.IcmpProber()
+        return _prober
+
+def add_reply_listener(listener):
+    """
+    Register a callable to receive the individual replies of every ping.
+
+    :param listener: Callable taking (host, rtts), where rtts holds one
+                     round-trip time in ms per request and None for losses.
+    """
+    _reply_listeners.append(listener)
+
+def remove_reply_listener(listener):
+    """Unregister a listener added with add_reply_listener"""
+    _reply_listeners.remove(listener)
+
+def ping(host, count=4, timeout=2, ipv6=None):
     """
     Ping a host and return the average round-trip time.
 
+    Uses the in-process ICMP prober when the kernel allows unprivileged ICMP
+    sockets, and falls back to the system ping binary otherwise. The
+    individual replies are passed to any registered reply listeners.
+
     :param host: The host to ping.
     :param count: Number of ping requests to send.
     :param timeout: Timeout in seconds for each ping request.
-    :param ipv6: Boolean indicating whether to use IPv6.
+    :param ipv6: Boolean indicating whether to use IPv6, or None to use it
+                 for IPv6 addresses and hostnames without an IPv4 address.
     :return: Average round-trip time in milliseconds or None if the ping fails.
     """
+    use_ipv6 = ipv6 if ipv6 is not None else icmp.is_ipv6_address(host)
+    if icmp.available(use_ipv6):
+        try:
+            with timings.time('ping.icmp'):
+                rtts = get_prober().ping(host, count=count, timeout=timeout, ipv6=ipv6)
+        except OSError:
+            rtts = [None] * count
+        replies = [rtt for rtt in rtts if rtt is not None]
+        avg_rtt = sum(replies) / len(replies) if replies else None
+    else:
+        rtts, avg_rtt = _ping_subprocess(host, count, timeout, use_ipv6)
+
+    # A failing listener must not turn a successful probe into a failed one
+    for listener in list(_reply_listeners):
+        try:
+            listener(host, rtts)
+        except Exception as e:
+            print(f"Error in reply listener for {host}: {e}")
+    return avg_rtt
+
+def _ping_subprocess(host, count, timeout, ipv6):
+    """
+    Ping a host with the system ping binary.
+
+    :return: Tuple of (per-request round-trip times, average from the summary line)
+    """
     try:
         ping_cmd = "ping6" if ipv6 else "ping"
         
-        result = subprocess.run(
-            [ping_cmd, "-c", str(count), "-W", str(timeout), host],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        # subprocess.run spawns and waits in one call, so both are one stage
+        with timings.time('ping.subprocess'):
+            result = subprocess.run(
+                [ping_cmd, "-c", str(count), "-W", str(timeout), host],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
         
         if result.returncode == 0:
-
-            for line in result.stdout.splitlines():
-                if "avg" in line:
-                    avg_time = line.split('/')[4]
-                    return float(avg_time)
+            with timings.time('ping.parse'):
+                return _parse_ping_output(result.stdout, count)
         else:
-            return None
+            return [None] * count, None
     except Exception as e:
-        return None
+        return [None] * count, None
+
+def _parse_ping_output(output, count):
+    """
+    Parse the output of the system ping binary.
+
+    :return: Tuple of (per-request round-trip times padded with None to
+             count, average from the summary line or None)
+    """
+    rtts = []
+    avg_time = None
+    for line in output.splitlines():
+        if "time=" in line:
+            rtts.append(float(line.split("time=")[1].split()[0]))
+        elif "avg" in line:
+            avg_time = float(line.split('/')[4])
+    rtts += [None] * (count - len(rtts))
+    return rtts, avg_time
 
 if __name__ == "__main__":
     host = "8.8.8.8" # Google
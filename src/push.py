@@ -0,0 +1,79 @@
+import json
+import threading
+from collections import deque
+
+def format_event(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+class _Subscriber:
+    __slots__ = ('events', 'dropped')
+
+    def __init__(self, max_queue):
+        self.events = deque(maxlen=max_queue)
+        self.dropped = False
+
+class EventBroadcaster:
+    def __init__(self, max_queue=64, heartbeat=15):
+        """
+        Initialize a Server-Sent Events fan-out.
+
+        Every event is encoded once and queued for each subscriber. A client
+        that falls max_queue events behind loses the oldest ones and gets a
+        'dropped' event, so it knows to resynchronize.
+
+        :param max_queue: Events kept per subscriber
+        :param heartbeat: Seconds between keep-alive comments, which also
+                          detect disconnected clients
+        """
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.published = 0
+        self._subscribers = set()
+        self._cond = threading.Condition()
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data):
+        """Send an event with JSON data to every subscriber"""
+        message = format_event(event, data)
+        with self._cond:
+            for subscriber in self._subscribers:
+                if len(subscriber.events) == self.max_queue:
+                    subscriber.dropped = True
+                subscriber.events.append(message)
+            self.published += 1
+            self._cond.notify_all()
+
+    def subscribe(self, initial=()):
+        """
+        Stream events to one client.
+
+        :param initial: (event, data) pairs sent first, e.g. configuration
+        :return: Generator of encoded events for a text/event-stream
+                 response; closing it unsubscribes
+        """
+        subscriber = _Subscriber(self.max_queue)
+        with self._cond:
+            self._subscribers.add(subscriber)
+        try:
+            for event, data in initial:
+                yield format_event(event, data)
+            while True:
+                with self._cond:
+                    if not subscriber.events:
+                        self._cond.wait(self.heartbeat)
+                    messages = list(subscriber.events)
+                    subscriber.events.clear()
+                    dropped, subscriber.dropped = subscriber.dropped, False
+                if dropped:
+                    yield format_event('dropped', {})
+                if messages:
+                    yield b''.join(messages)
+                else:
+                    yield b': keep-alive\n\n'
+        finally:
+            with self._cond:
+                self._subscribers.discard(subscriber)
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def plain(value):
+    """
+    Convert Dash components, plotly objects and arrays into plain dicts and lists.
+
+    The result encodes to the same JSON, but the JSON encoder no longer has
+    to call back into Python for every component, so a cached value is
+    cheap to send again and again. Arrays are copied, so cached values never
+    alias the live ring buffers.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'to_plotly_json'):
+        value = value.to_plotly_json()
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+class _Pending:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class RenderCache:
+    def __init__(self, max_entries=128):
+        """
+        Initialize a cache of rendered callback outputs shared by all clients.
+
+        Keys name what was rendered and the data version it was rendered
+        from, e.g. ('status', 42), so a key never goes stale; old versions
+        simply fall out of the LRU. When several clients miss the same key
+        at once, one renders and the others wait for its result.
+
+        :param max_entries: Number of outputs kept
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """
+        Return the cached output for a key, rendering it on a miss.
+
+        :param key: Hashable key including the data version
+        :param render: Callable returning the output; the result is passed
+                       through plain() before it is cached
+        :return: The cached output, shared between callers and not to be modified
+        :raises Exception: Whatever render raised; failures are not cached
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = plain(render())
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+                if pending.error is None:
+                    self._entries[key] = pending.value
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            pending.done.set()
+        return pending.value
+
+    def stats(self):
+        """Return the hit and miss counters and the number of cached outputs"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        """Drop all cached outputs"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,131 @@
+import random
+import threading
+import time
+
+class Job:
+    def __init__(self, name, func, period, jitter=0.0, initial_delay=0.0):
+        """
+        Initialize a periodic job.
+
+        :param name: Name used in statistics and error messages
+        :param func: Callable run on every tick
+        :param period: Seconds between ticks
+        :param jitter: Maximum random delay in seconds added to each tick
+        :param initial_delay: Seconds to wait before the first tick
+        """
+        self.name = name
+        self.func = func
+        self.period = period
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.last_duration = None
+        self.max_duration = 0.0
+        self.last_error = None
+        self._thread = None
+
+    def stats(self):
+        """Return the job's run, overrun and skipped-tick counters"""
+        return {
+            'period': self.period,
+            'runs': self.runs,
+            'errors': self.errors,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'last_duration': self.last_duration,
+            'max_duration': self.max_duration,
+            'last_error': self.last_error
+        }
+
+class Scheduler:
+    def __init__(self, timings=None):
+        """
+        Initialize a fixed-rate job scheduler.
+
+        Every job runs on its own thread. Tick k of a job is due at
+        start + initial_delay + k * period, independent of how long earlier
+        ticks took, so the schedule does not drift. A tick that runs past
+        the next due time counts as an overrun, and any due times it covered
+        are skipped rather than run back to back.
+
+        :param timings: Optional instrumentation.Timings that receives the
+                        duration of every tick as stage 'job.<name>'
+        """
+        self.jobs = {}
+        self.timings = timings
+        self._stop = threading.Event()
+
+    def add_job(self, name, func, period, jitter=0.0, initial_delay=0.0):
+        """
+        Register a job. Jobs added after start() begin immediately.
+
+        :return: The created Job
+        """
+        if name in self.jobs:
+            raise ValueError(f"Job {name} already exists")
+        job = Job(name, func, period, jitter, initial_delay)
+        self.jobs[name] = job
+        if self.running:
+            self._start_job(job)
+        return job
+
+    @property
+    def running(self):
+        return any(job._thread is not None for job in self.jobs.values()) and not self._stop.is_set()
+
+    def _start_job(self, job):
+        job._thread = threading.Thread(
+            target=self._run_job, args=(job,), name=f"job-{job.name}", daemon=True
+        )
+        job._thread.start()
+
+    def _run_job(self, job):
+        due = time.monotonic() + job.initial_delay
+        while True:
+            delay = due + random.uniform(0, job.jitter) - time.monotonic()
+            if self._stop.wait(max(0.0, delay)):
+                return
+
+            started = time.monotonic()
+            try:
+                job.func()
+            except Exception as e:
+                job.errors += 1
+                job.last_error = str(e)
+                print(f"Error in {job.name} job: {e}")
+            job.last_duration = time.monotonic() - started
+            if self.timings is not None:
+                self.timings.record(f'job.{job.name}', int(job.last_duration * 1e9))
+            job.max_duration = max(job.max_duration, job.last_duration)
+            job.runs += 1
+
+            due += job.period
+            now = time.monotonic()
+            if now > due:
+                # Resume on the first due time that has not yet passed
+                missed = int((now - due) // job.period) + 1
+                job.overruns += 1
+                job.skipped += missed
+                due += missed * job.period
+
+    def start(self):
+        """Start a worker thread for every registered job"""
+        self._stop.clear()
+        for job in self.jobs.values():
+            if job._thread is None:
+                self._start_job(job)
+
+    def stop(self, timeout=None):
+        """Stop all jobs, waiting up to timeout seconds for running ticks to finish"""
+        self._stop.set()
+        for job in self.jobs.values():
+            if job._thread is not None:
+                job._thread.join(timeout)
+                job._thread = None
+
+    def stats(self):
+        """Return per-job statistics keyed by job name"""
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -0,0 +1,102 @@
+import threading
+from types import MappingProxyType
+import numpy as np
+
+class Snapshot:
+    __slots__ = ('version', 'total', 'timestamps', 'columns', 'state', 'panels')
+
+    def __init__(self, version, total, timestamps, columns, state, panels):
+        """
+        Initialize an immutable view of the collected data.
+
+        Built by SnapshotPublisher; readers get one from its current
+        attribute and may hold on to it for as long as they like.
+
+        :param version: Publication counter, increasing with every publish
+        :param total: Number of series samples ever appended
+        :param timestamps: Read-only epoch-ms timestamps of the series, oldest first
+        :param columns: Mapping of column name to read-only values aligned with timestamps
+        :param state: Mapping of the latest collector results, e.g. measured speeds
+        :param panels: Mapping of panel name to the version of its data
+        """
+        for name, value in (('version', version), ('total', total), ('timestamps', timestamps),
+                            ('columns', columns), ('state', state), ('panels', panels)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshots are immutable")
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def last(self, column):
+        """Return the newest value of a series column, or None if there are no samples"""
+        values = self.columns[column]
+        return values[-1] if len(values) else None
+
+def _frozen(array):
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+class SnapshotPublisher:
+    def __init__(self, columns, panels, **state):
+        """
+        Initialize the hand-over of collected data from collector jobs to readers.
+
+        Collector jobs call publish() once per tick with what they changed;
+        it builds a new Snapshot from the current one and swaps it in with a
+        single reference assignment. Readers take current and never see a
+        half-updated state, and they need neither locks nor copies: the
+        series arrays are copied once per publish, which for an hour of
+        per-second samples is about 70 kB.
+
+        :param columns: Series column names
+        :param panels: Names of the panels whose data versions are tracked
+        :param state: Initial collector results
+        """
+        self._lock = threading.Lock()
+        empty = _frozen(np.zeros(0, dtype=np.float32))
+        self.current = Snapshot(
+            version=0,
+            total=0,
+            timestamps=_frozen(np.zeros(0, dtype=np.int64)),
+            columns=MappingProxyType({column: empty for column in columns}),
+            state=MappingProxyType(dict(state)),
+            panels=MappingProxyType({panel: 0 for panel in panels})
+        )
+
+    def publish(self, series=None, panels=(), **state):
+        """
+        Publish a new snapshot.
+
+        Publishing is serialized between collector threads; readers are
+        never blocked.
+
+        :param series: TimeSeriesStore whose current contents to publish, or
+                       None to keep the published series
+        :param panels: Panels whose data changed; their versions are bumped
+        :param state: Collector results that changed
+        :return: The published Snapshot
+        """
+        with self._lock:
+            previous = self.current
+            timestamps, columns, total = previous.timestamps, previous.columns, previous.total
+            if series is not None:
+                timestamps = _frozen(series.timestamps())
+                columns = MappingProxyType({column: _frozen(series.column(column))
+                                            for column in previous.columns})
+                total = series.total
+            snapshot = Snapshot(
+                version=previous.version + 1,
+                total=total,
+                timestamps=timestamps,
+                columns=columns,
+                state=MappingProxyType({**previous.state, **state}) if state else previous.state,
+                panels=MappingProxyType({
+                    panel: version + 1 if panel in panels else version
+                    for panel, version in previous.panels.items()
+                })
+            )
+            self.current = snapshot
+        return snapshot
@@ -2,45 +2,277 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
 import speedtest_cli as speedtest
+import json
+import os
+import threading
 import time
+import urllib.request
+import throughput
+from storage import DEFAULT_DATA_DIR
+from sweep import sweep
+
+SERVER_CACHE = os.path.join(DEFAULT_DATA_DIR, 'speedtest_servers.json')
+
+def probe_server(server, timeout=5, attempts=3):
+    """
+    Measure the HTTP latency of a speedtest.net server the way speedtest-cli does.
+
+    :param server: Server dictionary as returned by speedtest-cli
+    :return: Mean latency in ms, or None if the server did not answer correctly
+    """
+    url = os.path.dirname(server['url']) + '/latency.txt'
+    total = 0.0
+    for attempt in range(attempts):
+        start = time.monotonic()
+        try:
+            with urllib.request.urlopen(f"{url}?x={int(time.time() * 1000)}.{attempt}",
+                                        timeout=timeout) as response:
+                if response.read(9) != b'test=test':
+                    return None
+        except OSError:
+            return None
+        total += time.monotonic() - start
+    return total / attempts * 1000
+
+class ServerSelector:
+    def __init__(self, cache_path=SERVER_CACHE, ttl=24 * 3600, candidates=10,
+                 probe=probe_server, deadline=15, block=60, max_block=3600):
+        """
+        Initialize a cached speedtest.net server selector.
+
+        The closest candidate servers and their latency ranking are kept in a
+        JSON file, so a restart within the TTL skips server discovery and
+        latency probing entirely. Candidates are probed in parallel.
+
+        Servers that failed a measurement are left out of rankings for a
+        while, as they often still answer latency probes. The block starts at
+        block seconds and doubles with every further failure up to max_block.
+        Blocks are lifted when no candidate answers probes (the network is
+        down, not the servers), when every answering candidate is blocked,
+        and when servers are discovered again, so an outage never leaves
+        speed tests disabled.
+
+        :param cache_path: Path of the JSON cache file
+        :param ttl: Seconds the cached candidates and ranking stay valid
+        :param candidates: Number of closest servers to rank
+        :param probe: Callable taking a server dictionary and returning its
+                      latency in ms or None
+        :param deadline: Seconds a ranking round may take
+        :param block: Seconds a server is first left out after a failure
+        :param max_block: Longest seconds a server is left out
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.candidate_count = candidates
+        self.probe = probe
+        self.deadline = deadline
+        self.block = block
+        self.max_block = max_block
+        self.candidates = []
+        self.ranking = []
+        self.updated = None
+        # Server id to its consecutive failures and the time its block ends
+        self.failed = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.candidates = cache.get('candidates', [])
+        self.ranking = cache.get('ranking', [])
+        self.updated = cache.get('updated')
+        self.failed = {id: entry for id, entry in cache.get('failed', {}).items()
+                       if isinstance(entry, dict)}
+
+    def _save(self):
+        # Write a temporary file and rename it, so a crash never leaves a torn cache
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        temporary = self.cache_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({'updated': self.updated, 'candidates': self.candidates,
+                       'ranking': self.ranking, 'failed': self.failed}, f)
+        os.replace(temporary, self.cache_path)
+
+    @property
+    def fresh(self):
+        """Whether the cached ranking is within its TTL and not exhausted"""
+        return bool(self.ranking) and self.updated is not None and time.time() - self.updated < self.ttl
+
+    def rank(self, st, discover=True):
+        """
+        Rank the candidate servers by latency, probing them in parallel.
+
+        :param st: speedtest-cli Speedtest instance, used to discover servers
+        :param discover: Fetch the closest servers again; otherwise the
+                         cached candidates are re-ranked if there are any
+        :return: The fastest server dictionary, including its 'latency'
+        """
+        candidates = self.candidates
+        if discover or not candidates:
+            candidates = st.get_closest_servers(limit=self.candidate_count)
+            with self._lock:
+                self.failed = {}
+        # Blocked servers are probed too, to tell an outage from broken servers
+        latencies, _ = sweep(candidates, self.probe, max_workers=len(candidates) or 1,
+                             deadline=self.deadline)
+        answered = sorted(
+            (dict(server, latency=latency) for server, latency in zip(candidates, latencies)
+             if latency is not None),
+            key=lambda server: server['latency']
+        )
+
+        with self._lock:
+            now = time.time()
+            if not answered:
+                # Measurements failed because the network is down
+                self.failed = {}
+                self._save()
+                raise RuntimeError("No speedtest server answered")
+            blocked = {id for id, entry in self.failed.items() if entry['until'] > now}
+            ranking = [server for server in answered if str(server.get('id')) not in blocked]
+            if not ranking:
+                self.failed = {}
+                ranking = answered
+            self.candidates, self.ranking, self.updated = list(candidates), ranking, now
+            self._save()
+        return ranking[0]
+
+    def best(self, st):
+        """Return the best server, ranking the candidates only if the cache is stale"""
+        with self._lock:
+            if self.fresh:
+                return self.ranking[0]
+        return self.rank(st)
+
+    def fail(self, server):
+        """
+        Drop a server that failed a measurement from the ranking and keep it
+        out of rankings for a while, longer after every further failure.
+
+        :return: The next best cached server, or None if none is left
+        """
+        with self._lock:
+            failures = self.failed.get(str(server.get('id')), {}).get('failures', 0) + 1
+            self.failed[str(server.get('id'))] = {
+                'failures': failures,
+                'until': time.time() + min(self.block * 2 ** (failures - 1), self.max_block)
+            }
+            self.ranking = [s for s in self.ranking if s['id'] != server.get('id')]
+            self._save()
+            return self.ranking[0] if self.ranking else None
+
+    def succeed(self, server):
+        """Forget the past failures of a server that completed a measurement"""
+        with self._lock:
+            if self.failed.pop(str(server.get('id')), None) is not None:
+                self._save()
+
+def use_server(st, server):
+    """Point a Speedtest instance at a server without another discovery round"""
+    # speedtest-cli only exposes the best server read-only; download() and
+    # upload() read it from _best
+    st._best.clear()
+    st._best.update(server)
+    st.results.server = server
+    st.results.ping = server.get('latency')
 
 class NetworkSpeedTest:
-    def __init__(self):
-        """Initialize speed test with best server"""
+    def __init__(self, server=None, streams=4, duration=5, selector=None):
+        """
+        Initialize speed test, selecting the best server in the background
+
+        :param server: Address of a throughput server (see throughput.py) to
+                       test against instead of public speedtest.net servers,
+                       e.g. 'host:5201'
+        :param streams: Parallel TCP streams per direction against that server
+        :param duration: Seconds per direction against that server
+        :param selector: ServerSelector for speedtest.net servers
+        """
+        self.server = throughput.parse_address(server) if server else None
+        self.streams = streams
+        self.duration = duration
+        self.st = None
+        # The first selection, which the first measurement waits for, and
+        # later re-rankings, which no measurement waits for
+        self._selecting = None
+        self._reranking = None
+        if self.server:
+            return
+
+        self.selector = selector or ServerSelector()
+        self._selecting = self._start_selection(rerank=False)
+
+    def _start_selection(self, rerank):
+        thread = threading.Thread(
+            target=self._select, args=(rerank,), name='speedtest-select', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _select(self, rerank):
         try:
-            self.st = speedtest.Speedtest()
-            self.st.get_best_server()
+            st = speedtest.Speedtest()
+            server = self.selector.rank(st, discover=False) if rerank else self.selector.best(st)
+            use_server(st, server)
+            self.st = st
         except Exception as e:
-            if __name__ == "__main__":  
+            if __name__ == "__main__":
                 print(f"Failed to initialize speedtest: {e}")
+
+    def _recover(self, st):
+        """Fail over to the next cached server now and re-rank in the background"""
+        next_server = self.selector.fail(st.best)
+        if next_server:
+            use_server(st, next_server)
+            self.st = st
+        else:
             self.st = None
-    
+        self._reranking = self._start_selection(rerank=True)
+
     def measure(self):
         """Run speed test and return results in Mbps"""
-        if not self.st:
+        if self.server:
+            try:
+                return throughput.measure(self.server, self.streams, self.duration)
+            except OSError as e:
+                if __name__ == "__main__":
+                    print(f"Speed test error: {e}")
+                return {'download': 0, 'upload': 0}
+
+        # The first selection usually finishes long before the first measurement
+        if self._selecting is not None:
+            self._selecting.join()
+            self._selecting = None
+        # After a failure the failover server is used while the re-ranking
+        # runs; its result replaces st when done
+        st = self.st
+        if not st:
+            if self._reranking is None or not self._reranking.is_alive():
+                self._reranking = self._start_selection(rerank=False)
             return {'download': 0, 'upload': 0}
-            
+
         try:
             if __name__ == "__main__":
                 print("Testing download speed...")
-            download_speed = self.st.download() / 1_000_000
+            download_speed = st.download() / 1_000_000
 
-            if __name__ == "__main__": 
+            if __name__ == "__main__":
                 print("Testing upload speed...")
-            upload_speed = self.st.upload() / 1_000_000
-            
+            upload_speed = st.upload() / 1_000_000
+
+            self.selector.succeed(st.best)
             return {
                 'download': download_speed,
                 'upload': upload_speed
             }
         except Exception as e:
-            if __name__ == "__main__":  
+            if __name__ == "__main__":
                 print(f"Speed test error: {e}")
-            try:
-                self.st = speedtest.Speedtest()
-                self.st.get_best_server()
-            except:
-                self.st = None
+            self._recover(st)
             return {'download': 0, 'upload': 0}
 
 if __name__ == "__main__":
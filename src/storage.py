@@ -0,0 +1,268 @@
+import os
+import threading
+import numpy as np
+
+DEFAULT_DATA_DIR = os.environ.get('PINGCANVAS_DATA', os.path.expanduser('~/.pingcanvas'))
+
+# (name, resolution in milliseconds); the first tier holds raw samples
+DEFAULT_TIERS = (('raw', 0), ('1m', 60_000), ('1h', 3_600_000))
+ROLLUP_FIELDS = ('min', 'max', 'mean', 'count')
+
+class ColumnFile:
+    def __init__(self, path, dtype, chunk_rows=65536):
+        """
+        Initialize an append-only, memory-mapped column file.
+
+        The file is grown in whole chunks and remapped when full. Readers keep
+        any views they already hold, since the old mapping stays alive until
+        it is no longer referenced.
+
+        :param path: File path
+        :param dtype: NumPy dtype of the column
+        :param chunk_rows: Number of rows the file grows by
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as f:
+                f.truncate(chunk_rows * self.dtype.itemsize)
+        self._map()
+
+    def _map(self):
+        self.array = np.memmap(self.path, dtype=self.dtype, mode='r+')
+
+    @property
+    def capacity(self):
+        return len(self.array)
+
+    def reserve(self, rows):
+        """Grow the file so it can hold at least rows rows"""
+        if rows <= self.capacity:
+            return
+        self.array.flush()
+        chunks = -(-rows // self.chunk_rows)
+        with open(self.path, 'r+b') as f:
+            f.truncate(chunks * self.chunk_rows * self.dtype.itemsize)
+        self._map()
+
+    def flush(self):
+        self.array.flush()
+
+class Tier:
+    def __init__(self, directory, name, resolution, fields):
+        """
+        Initialize one storage tier.
+
+        :param directory: Root directory of the store
+        :param name: Tier name, used as its subdirectory
+        :param resolution: Bucket width in milliseconds, 0 for raw samples
+        :param fields: Mapping of field name to dtype, excluding the timestamp
+        """
+        self.name = name
+        self.resolution = resolution
+        path = os.path.join(directory, name)
+        os.makedirs(path, exist_ok=True)
+        self.timestamps = ColumnFile(os.path.join(path, 'timestamp.bin'), np.int64)
+        self.fields = {
+            field: ColumnFile(os.path.join(path, f'{field}.bin'), dtype)
+            for field, dtype in fields.items()
+        }
+        self.length = self._recover_length()
+
+    def _recover_length(self):
+        # Timestamps are written last and are never zero, so the written rows
+        # are exactly the leading non-zero prefix
+        timestamps = self.timestamps.array
+        low, high = 0, len(timestamps)
+        while low < high:
+            mid = (low + high) // 2
+            if timestamps[mid] != 0:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    @property
+    def last_timestamp(self):
+        return int(self.timestamps.array[self.length - 1]) if self.length else None
+
+    def append(self, timestamp, values):
+        row = self.length
+        self.timestamps.reserve(row + 1)
+        for field, column in self.fields.items():
+            column.reserve(row + 1)
+            column.array[row] = values[field]
+        self.timestamps.array[row] = timestamp
+        self.length += 1
+
+    def range(self, start=None, end=None):
+        """
+        Return the rows with start <= timestamp < end as views.
+
+        For rollup tiers the bucket containing start is included.
+
+        :return: Dictionary of field name to array, including 'timestamp'
+        """
+        timestamps = self.timestamps.array[:self.length]
+        if start is not None and self.resolution:
+            # Include the bucket that contains start
+            start -= start % self.resolution
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        last = self.length if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        rows = {'timestamp': timestamps[first:last]}
+        for field, column in self.fields.items():
+            rows[field] = column.array[first:last]
+        return rows
+
+    def flush(self):
+        self.timestamps.flush()
+        for column in self.fields.values():
+            column.flush()
+
+class _Rollup:
+    __slots__ = ('bucket', 'min', 'max', 'sum', 'count')
+
+    def __init__(self, size):
+        self.bucket = None
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+        self.sum = np.zeros(size)
+        self.count = np.zeros(size, dtype=np.int64)
+
+    def reset(self, bucket):
+        self.bucket = bucket
+        self.min.fill(np.inf)
+        self.max.fill(-np.inf)
+        self.sum.fill(0)
+        self.count.fill(0)
+
+    def add(self, values):
+        valid = ~np.isnan(values)
+        self.min[valid] = np.minimum(self.min[valid], values[valid])
+        self.max[valid] = np.maximum(self.max[valid], values[valid])
+        self.sum[valid] += values[valid]
+        self.count[valid] += 1
+
+class TieredStore:
+    def __init__(self, directory, columns, tiers=DEFAULT_TIERS):
+        """
+        Initialize a persistent time-series store with automatic rollups.
+
+        Raw samples are appended to memory-mapped column files. Every rollup
+        tier keeps min, max, mean and count per column for fixed buckets,
+        written when a bucket closes. Opening an existing store only maps its
+        files and replays the raw rows of the open buckets, so restart cost
+        does not depend on history length, and history lives in the page
+        cache rather than process memory.
+
+        :param directory: Directory holding the column files
+        :param columns: Names of the float32 value columns
+        :param tiers: Sequence of (name, resolution_ms); the first must be raw
+        """
+        self.directory = directory
+        self.columns = tuple(columns)
+        self._lock = threading.Lock()
+
+        raw_name, raw_resolution = tiers[0]
+        if raw_resolution != 0:
+            raise ValueError("The first tier must hold raw samples")
+        self.raw = Tier(directory, raw_name, 0, {column: np.float32 for column in self.columns})
+        self.rollups = [
+            Tier(directory, name, resolution, {
+                f'{column}_{field}': np.uint32 if field == 'count' else np.float32
+                for column in self.columns for field in ROLLUP_FIELDS
+            })
+            for name, resolution in tiers[1:]
+        ]
+        self.tiers = [self.raw] + self.rollups
+        self._pending = [_Rollup(len(self.columns)) for _ in self.rollups]
+        self._replay_open_buckets()
+
+    def _replay_open_buckets(self):
+        last = self.raw.last_timestamp
+        if last is None:
+            return
+        for tier, pending in zip(self.rollups, self._pending):
+            bucket = last - last % tier.resolution
+            rows = self.raw.range(start=bucket)
+            pending.reset(bucket)
+            for i in range(len(rows['timestamp'])):
+                pending.add(np.array([rows[column][i] for column in self.columns], dtype=np.float64))
+
+    def _close_bucket(self, tier, pending):
+        values = {}
+        for i, column in enumerate(self.columns):
+            count = pending.count[i]
+            values[f'{column}_min'] = pending.min[i] if count else np.nan
+            values[f'{column}_max'] = pending.max[i] if count else np.nan
+            values[f'{column}_mean'] = pending.sum[i] / count if count else np.nan
+            values[f'{column}_count'] = count
+        tier.append(pending.bucket, values)
+
+    def append(self, timestamp, **values):
+        """
+        Append one raw sample and update the rollups.
+
+        :param timestamp: Epoch time in milliseconds. Timestamps earlier than
+                          the last stored one (e.g. after a clock step) are
+                          clamped to it so every tier stays sorted.
+        :param values: Column values; missing columns and None are stored as NaN
+        """
+        with self._lock:
+            last = self.raw.last_timestamp
+            if last is not None and timestamp < last:
+                timestamp = last
+            row = np.array([
+                np.nan if values.get(column) is None else values[column]
+                for column in self.columns
+            ], dtype=np.float64)
+
+            for tier, pending in zip(self.rollups, self._pending):
+                bucket = timestamp - timestamp % tier.resolution
+                if pending.bucket != bucket:
+                    if pending.bucket is not None:
+                        self._close_bucket(tier, pending)
+                    pending.reset(bucket)
+                pending.add(row)
+
+            self.raw.append(timestamp, dict(zip(self.columns, row)))
+
+    def select_tier(self, resolution=0):
+        """Return the coarsest tier whose resolution is at least as fine as requested"""
+        chosen = self.raw
+        for tier in self.rollups:
+            if tier.resolution <= resolution:
+                chosen = tier
+        return chosen
+
+    def query(self, start=None, end=None, resolution=0):
+        """
+        Read a time range at the cheapest sufficient resolution.
+
+        :param start: Inclusive start in epoch milliseconds, None for the beginning
+        :param end: Exclusive end in epoch milliseconds, None for the latest sample
+        :param resolution: Coarsest acceptable spacing in milliseconds
+        :return: Tuple of (tier name, dictionary of arrays). Raw tiers have one
+                 array per column; rollup tiers have <column>_min, _max, _mean
+                 and _count. Buckets still open are not included.
+        """
+        with self._lock:
+            tier = self.select_tier(resolution)
+            return tier.name, tier.range(start, end)
+
+    def tail(self, rows):
+        """Return the newest raw rows as a dictionary of arrays"""
+        with self._lock:
+            start = max(0, self.raw.length - rows)
+            timestamps = self.raw.timestamps.array[start:self.raw.length]
+            data = {'timestamp': timestamps}
+            for column, file in self.raw.fields.items():
+                data[column] = file.array[start:self.raw.length]
+            return data
+
+    def flush(self):
+        """Flush all tiers to disk"""
+        with self._lock:
+            for tier in self.tiers:
+                tier.flush()
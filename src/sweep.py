@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+def sweep(hosts, probe, max_workers=32, deadline=None):
+    """
+    Probe a list of hosts concurrently within an optional deadline.
+
+    :param hosts: List of hosts to probe.
+    :param probe: Callable taking a host and returning a latency in ms or None.
+    :param max_workers: Maximum number of probes in flight at once.
+    :param deadline: Seconds the whole sweep may take. Hosts still pending when
+                     it expires are reported as None. None waits for all hosts.
+    :return: Tuple of (results, stats). results holds one latency or None per
+             host, in host order. stats is a dictionary containing duration,
+             total, completed, responded and timed_out.
+    """
+    start = time.monotonic()
+    results = [None] * len(hosts)
+
+    if not hosts:
+        return results, {'duration': 0.0, 'total': 0, 'completed': 0,
+                         'responded': 0, 'timed_out': 0}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(hosts))))
+    try:
+        futures = {executor.submit(probe, host): i for i, host in enumerate(hosts)}
+        done, not_done = wait(futures, timeout=deadline)
+    finally:
+        # Stragglers are abandoned rather than waited for; queued probes never start
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception:
+            pass
+
+    return results, {
+        'duration': time.monotonic() - start,
+        'total': len(hosts),
+        'completed': len(done),
+        'responded': sum(1 for r in results if r is not None),
+        'timed_out': len(not_done)
+    }
@@ -0,0 +1,242 @@
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_PORT = 5201
+# Request header: direction (b'D' download, b'U' upload) and duration in seconds
+HEADER = struct.Struct('!cd')
+# Upload reply: bytes the server received
+RECEIVED = struct.Struct('!Q')
+PAYLOAD_SIZE = 1 << 20
+BUFFER_SIZE = 128 * 1024
+# Extra seconds the server keeps a stream open beyond the requested duration
+GRACE = 2.0
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """
+    Parse a server address.
+
+    :param address: (host, port) tuple or 'host', 'host:port' or '[v6addr]:port'
+    :return: Tuple of (host, port)
+    """
+    if isinstance(address, (tuple, list)):
+        return address[0], int(address[1])
+    if address.startswith('['):
+        host, _, port = address[1:].partition(']')
+        return host, int(port.lstrip(':') or default_port)
+    if address.count(':') == 1:
+        host, port = address.split(':')
+        return host, int(port)
+    return address, default_port
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed during header")
+        data += chunk
+    return data
+
+class _StreamHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        sock.settimeout(self.server.io_timeout)
+        try:
+            direction, duration = HEADER.unpack(_recv_exact(sock, HEADER.size))
+            deadline = time.monotonic() + min(duration, self.server.max_duration) + GRACE
+            if direction == b'D':
+                self._send(sock, deadline)
+            elif direction == b'U':
+                sock.sendall(RECEIVED.pack(self._receive(sock, deadline)))
+        except (ConnectionError, socket.timeout):
+            pass  # The client closing the stream is how downloads end
+
+    def _send(self, sock, deadline):
+        # sendfile() moves the payload from the page cache to the socket
+        # without copying it through user space; it falls back to send()
+        # where os.sendfile is unavailable
+        payload = self.server.payload
+        while time.monotonic() < deadline:
+            sock.sendfile(payload, 0, PAYLOAD_SIZE)
+
+    def _receive(self, sock, deadline):
+        buffer = bytearray(BUFFER_SIZE)
+        received = 0
+        while time.monotonic() < deadline:
+            count = sock.recv_into(buffer)
+            if not count:
+                break
+            received += count
+        return received
+
+class ThroughputServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, max_duration=60, io_timeout=10):
+        """
+        Initialize a throughput test server.
+
+        Every connection is one stream. The client sends a header naming the
+        direction and duration; for downloads the server sends until the
+        client closes the stream, for uploads it counts what it receives
+        until the client shuts down its side and replies with the total.
+
+        :param host: Address to listen on; IPv6 addresses are supported
+        :param port: TCP port, 0 to pick a free one
+        :param max_duration: Longest stream in seconds a client may request
+        :param io_timeout: Seconds a stream may stall before it is dropped
+        """
+        if ':' in host:
+            self.address_family = socket.AF_INET6
+        self.max_duration = max_duration
+        self.io_timeout = io_timeout
+        self.payload = tempfile.TemporaryFile()
+        self.payload.write(os.urandom(PAYLOAD_SIZE))
+        self.payload.flush()
+        self._thread = None
+        super().__init__((host, port), _StreamHandler)
+
+    @property
+    def address(self):
+        """The (host, port) the server listens on"""
+        return self.server_address[:2]
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name='throughput-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+        self.payload.close()
+
+def _download(sock, duration, start):
+    buffer = bytearray(BUFFER_SIZE)
+    received = 0
+    end = start + duration
+    now = time.monotonic()
+    while now < end:
+        count = sock.recv_into(buffer)
+        now = time.monotonic()
+        if not count:
+            break
+        received += count
+    return received, now
+
+def _upload(sock, duration, start):
+    # The server counts what arrives, so a partial send needs no resending
+    payload = os.urandom(BUFFER_SIZE)
+    end = start + duration
+    while time.monotonic() < end:
+        sock.send(payload)
+    sock.shutdown(socket.SHUT_WR)
+    received = RECEIVED.unpack(_recv_exact(sock, RECEIVED.size))[0]
+    return received, time.monotonic()
+
+def run_streams(address, direction='download', streams=4, duration=5, timeout=10):
+    """
+    Run parallel TCP streams against a throughput server.
+
+    :param address: Server address, see parse_address
+    :param direction: 'download' or 'upload'
+    :param streams: Number of parallel TCP connections
+    :param duration: Seconds each stream runs
+    :param timeout: Seconds a connection may stall before it fails
+    :return: Dictionary with 'mbps' (aggregate), 'streams' (Mbps per
+             stream), 'bytes' and 'duration' (seconds)
+    :raises OSError: If the server cannot be reached or a stream fails
+    """
+    if direction not in ('download', 'upload'):
+        raise ValueError(f"Unknown direction: {direction}")
+    host, port = parse_address(address)
+    code = b'D' if direction == 'download' else b'U'
+    transfer = _download if direction == 'download' else _upload
+
+    sockets = []
+    try:
+        for _ in range(streams):
+            sock = socket.create_connection((host, port), timeout=timeout)
+            sock.sendall(HEADER.pack(code, duration))
+            sockets.append(sock)
+
+        results = [None] * streams
+        start = time.monotonic()
+
+        def run(index):
+            try:
+                results[index] = transfer(sockets[index], duration, start)
+            except OSError as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(streams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for sock in sockets:
+            sock.close()
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    elapsed = max(end for _, end in results) - start
+    total = sum(count for count, _ in results)
+    return {
+        'mbps': total * 8 / elapsed / 1_000_000,
+        'streams': [count * 8 / (end - start) / 1_000_000 for count, end in results],
+        'bytes': total,
+        'duration': elapsed
+    }
+
+def measure(address, streams=4, duration=5):
+    """
+    Measure download and upload throughput against a throughput server.
+
+    :return: Dictionary with 'download' and 'upload' in Mbps and the
+             per-stream rates as 'download_streams' and 'upload_streams'
+    """
+    download = run_streams(address, 'download', streams, duration)
+    upload = run_streams(address, 'upload', streams, duration)
+    return {
+        'download': download['mbps'],
+        'upload': upload['mbps'],
+        'download_streams': download['streams'],
+        'upload_streams': upload['streams']
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('server', 'client'):
+        print("Usage: throughput.py server [host[:port]] | client host[:port] [streams] [seconds]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'server':
+        host, port = parse_address(sys.argv[2] if len(sys.argv) > 2 else '0.0.0.0')
+        server = ThroughputServer(host, port)
+        print(f"Listening on {server.address[0]}:{server.address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped server")
+        server.server_close()
+    else:
+        streams = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 5
+        results = measure(sys.argv[2], streams, seconds)
+        for direction in ('download', 'upload'):
+            per_stream = ', '.join(f"{rate:.1f}" for rate in results[f'{direction}_streams'])
+            print(f"{direction.capitalize()}: {results[direction]:.1f} Mbps ({per_stream})")
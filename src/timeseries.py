@@ -0,0 +1,71 @@
+import time
+import numpy as np
+
+class TimeSeriesStore:
+    def __init__(self, capacity, columns):
+        """
+        Initialize a fixed-capacity time-series ring buffer.
+
+        Every sample is written twice, at its ring position and at the same
+        position in a mirror half, so the newest `capacity` samples are always
+        one contiguous slice. Reads are therefore chronological views rather
+        than copies; a view aliases the buffer and is only stable until the
+        next append.
+
+        :param capacity: Maximum number of samples kept
+        :param columns: Names of the float32 value columns
+        """
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = {
+            name: np.full(2 * capacity, np.nan, dtype=np.float32)
+            for name in self.columns
+        }
+        self._head = 0
+        self._size = 0
+        self.total = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp=None, **values):
+        """
+        Append one sample in O(1).
+
+        :param timestamp: Epoch time in milliseconds, defaults to now
+        :param values: Column values; missing columns and None are stored as NaN
+        """
+        if timestamp is None:
+            timestamp = time.time_ns() // 1_000_000
+        i = self._head
+        mirror = i + self.capacity
+
+        self._timestamps[i] = self._timestamps[mirror] = timestamp
+        for name, column in self._values.items():
+            value = values.get(name)
+            column[i] = column[mirror] = np.nan if value is None else value
+
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total += 1
+
+    def _view(self, array):
+        start = (self._head - self._size) % self.capacity
+        view = array[start:start + self._size]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self):
+        """Return a read-only chronological view of the epoch-ms timestamps"""
+        return self._view(self._timestamps)
+
+    def column(self, name):
+        """Return a read-only chronological view of a value column"""
+        return self._view(self._values[name])
+
+    def last(self, name):
+        """Return the newest value of a column, or None if the store is empty"""
+        if not self._size:
+            return None
+        return self._values[name][(self._head - 1) % self.capacity]
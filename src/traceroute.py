@@ -1,41 +1,69 @@
 import subprocess
 
+import icmp
+from instrumentation import timings
+
 def traceroute(host, max_hops=30, timeout=2, ipv6=False):
     """
     Perform a traceroute to a host and return the path.
 
+    Uses the in-process parallel-TTL engine when the kernel allows
+    unprivileged ICMP sockets, and falls back to the system traceroute
+    binary otherwise.
+
     :param host: The host to traceroute.
     :param max_hops: Maximum number of hops to trace.
     :param timeout: Timeout in seconds for each hop.
     :param ipv6: Boolean indicating whether to use IPv6.
     :return: List of hops with their respective IP addresses and round-trip times.
     """
+    if icmp.available(ipv6):
+        try:
+            with timings.time('traceroute.icmp'):
+                hops = icmp.trace(host, max_hops=max_hops, timeout=timeout, ipv6=ipv6)
+        except OSError:
+            return None
+        if hops is None:
+            return None
+        return [
+            (str(ttl), address, [f"{rtt:.3f}", "ms"]) if address else (str(ttl), '*', ['*'])
+            for ttl, address, rtt in hops
+        ]
+    return _traceroute_subprocess(host, max_hops, timeout, ipv6)
+
+def _traceroute_subprocess(host, max_hops, timeout, ipv6):
+    """Trace the path to a host with the system traceroute binary"""
     try:
         traceroute_cmd = "traceroute6" if ipv6 else "traceroute"
         
-        result = subprocess.run(
-            [traceroute_cmd, "-m", str(max_hops), "-w", str(timeout), host],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        with timings.time('traceroute.subprocess'):
+            result = subprocess.run(
+                [traceroute_cmd, "-m", str(max_hops), "-w", str(timeout), host],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
         
         if result.returncode == 0:
-            hops = []
-            for line in result.stdout.splitlines():
-                if line.startswith("traceroute") or not line.strip():
-                    continue
-                parts = line.split()
-                hop_number = parts[0]
-                hop_ip = parts[1]
-                rtt = parts[2:]
-                hops.append((hop_number, hop_ip, rtt))
-            return hops
+            with timings.time('traceroute.parse'):
+                return _parse_traceroute_output(result.stdout)
         else:
             return None
     except Exception as e:
         return None
 
+def _parse_traceroute_output(output):
+    """Parse the output of the system traceroute binary into (hop, ip, rtt fields) tuples"""
+    hops = []
+    for line in output.splitlines():
+        if line.startswith("traceroute") or not line.strip():
+            continue
+        parts = line.split()
+        hop_number = parts[0]
+        hop_ip = parts[1]
+        rtt = parts[2:]
+        hops.append((hop_number, hop_ip, rtt))
+    return hops
 
 if __name__ == "__main__":
     host = "8.8.8.8"  # Google
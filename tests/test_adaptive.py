@@ -0,0 +1,131 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import numpy as np
+from adaptive import TokenBucket, AdaptiveProber
+
+class TestTokenBucket(unittest.TestCase):
+    def test_take_within_burst(self):
+        bucket = TokenBucket(rate=5)
+        self.assertEqual(bucket.take(3, now=bucket._updated), 3)
+        self.assertEqual(bucket.take(3, now=bucket._updated), 2)
+        self.assertEqual(bucket.take(1, now=bucket._updated), 0)
+
+    def test_refills_at_rate(self):
+        bucket = TokenBucket(rate=5, burst=10)
+        start = bucket._updated
+        bucket.take(10, now=start)
+
+        self.assertEqual(bucket.take(10, now=start + 1), 5)
+        self.assertEqual(bucket.take(20, now=start + 100), 10)
+
+    def test_charge_goes_into_debt(self):
+        bucket = TokenBucket(rate=2)
+        start = bucket._updated
+        bucket.charge(4, now=start)
+
+        self.assertEqual(bucket.take(1, now=start + 0.5), 0)
+        self.assertEqual(bucket.take(5, now=start + 2), 2)
+
+    def test_debt_is_bounded(self):
+        bucket = TokenBucket(rate=2)
+        start = bucket._updated
+        for second in range(100):
+            bucket.charge(3, now=start + second)
+
+        self.assertEqual(bucket.tokens, -2)
+        self.assertEqual(bucket.take(5, now=start + 100), 0)
+        self.assertEqual(bucket.take(5, now=start + 101), 2)
+
+    def test_fractional_rate_grants_whole_tokens(self):
+        bucket = TokenBucket(rate=0.5)
+        start = bucket._updated
+        bucket.take(1, now=start)
+
+        self.assertEqual(bucket.take(1, now=start + 1), 0)
+        self.assertEqual(bucket.take(1, now=start + 2), 1)
+
+class TestAdaptiveProber(unittest.TestCase):
+    def setUp(self):
+        self.hosts = ['stable', 'jittery', 'lossy']
+        self.prober = AdaptiveProber(self.hosts, TokenBucket(rate=100),
+                                     min_interval=1, max_interval=60)
+
+    def probe_for(self, seconds, latency_of):
+        """Probe every due host once per simulated second"""
+        rng = np.random.default_rng(0)
+        now = self.prober.budget._updated
+        counts = np.zeros(len(self.hosts), dtype=int)
+        for second in range(seconds):
+            for i in self.prober.due(now=now + second):
+                self.prober.record(i, latency_of(self.hosts[i], rng), now=now + second)
+                counts[i] += 1
+        return counts
+
+    def test_unstable_hosts_get_more_probes(self):
+        def latency_of(host, rng):
+            if host == 'lossy' and rng.random() < 0.3:
+                return None
+            return 20 + rng.normal(0, 10) if host == 'jittery' else 20 + rng.normal(0, 0.1)
+
+        counts = self.probe_for(600, latency_of)
+
+        stable, jittery, lossy = counts
+        self.assertLess(stable, 30)
+        self.assertGreater(jittery, 2 * stable)
+        self.assertGreater(lossy, 2 * stable)
+        self.assertEqual(self.prober.probes, counts.sum())
+        self.assertGreater(self.prober.interval[0], 50)
+
+    def test_change_resets_interval(self):
+        now = self.prober.budget._updated
+        for second in range(100):
+            self.prober.record(0, 20.0, now=now + second)
+        self.assertEqual(self.prober.interval[0], 60)
+
+        self.prober.record(0, 80.0, now=now + 100)
+        self.assertEqual(self.prober.interval[0], 1)
+        self.prober.record(1, None, now=now + 100)
+        self.assertEqual(self.prober.interval[1], 1)
+        self.assertTrue(np.isnan(self.prober.latency[1]))
+
+    def test_unreachable_hosts_back_off(self):
+        def latency_of(host, rng):
+            return None if host == 'lossy' else 20 + rng.normal(0, 0.1)
+
+        stable, _, dead = self.probe_for(600, latency_of)
+
+        self.assertLess(dead, 30)
+        self.assertEqual(self.prober.interval[2], 60)
+        self.prober.record(2, 20.0, now=self.prober.budget._updated + 600)
+        self.assertEqual(self.prober.interval[2], 1)
+
+    def test_budget_limits_probes(self):
+        prober = AdaptiveProber([f'10.0.0.{i}' for i in range(10)], TokenBucket(rate=4))
+        now = prober.budget._updated
+
+        first = prober.due(now=now)
+        second = prober.due(now=now)
+        third = prober.due(now=now + 1)
+
+        self.assertEqual(len(first), 4)
+        self.assertEqual(second, [])
+        self.assertEqual(len(third), 4)
+        self.assertFalse(set(first) & set(third))
+        self.assertEqual(prober.deferred, 3 * 6)
+
+    def test_run_probes_due_hosts(self):
+        latencies = {'stable': 10.0, 'jittery': None, 'lossy': 30.0}
+        stats = self.prober.run(lambda host: latencies[host])
+        latency, updated = self.prober.snapshot()
+
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(latency[0], 10.0)
+        self.assertTrue(np.isnan(latency[1]))
+        self.assertTrue((updated > 0).all())
+        self.assertEqual(self.prober.run(lambda host: latencies[host])['total'], 0)
+        self.assertEqual(self.prober.stats()['probes'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
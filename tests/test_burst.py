@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+from unittest.mock import patch
+import shutil
+import tempfile
+from burst import BurstSampler
+
+class TestBurstSampler(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'eth0', 'statistics'))
+        self.rx = self.tx = 0
+        self.write_counters(0, 0)
+        self.sampler = BurstSampler('eth0', period=0.1, window=10, threshold_mbps=10,
+                                    sys_path=self.root)
+
+    def tearDown(self):
+        self.sampler.close()
+        shutil.rmtree(self.root)
+
+    def write_counters(self, rx, tx):
+        for name, value in (('rx', rx), ('tx', tx)):
+            with open(os.path.join(self.root, 'eth0', 'statistics', f'{name}_bytes'), 'w') as f:
+                f.write(f"{value}\n")
+
+    def feed(self, start, recv_per_sample, sent=0):
+        """Take one 100 ms sample per entry; counters grow by the given bytes"""
+        for i, delta in enumerate(recv_per_sample):
+            self.rx += delta
+            self.tx += sent
+            self.write_counters(self.rx, self.tx)
+            with patch('time.monotonic', return_value=start + i * 0.1):
+                self.sampler.sample()
+
+    def test_peak_p99_and_bursts(self):
+        # 12.5 kB per 100 ms is 1 Mbps, 250 kB is 20 Mbps
+        self.feed(100.0, [0, 12500, 250000, 250000, 12500, 250000, 12500])
+
+        report = self.sampler.report(since=0)
+
+        self.assertEqual(report['samples'], 6)
+        self.assertAlmostEqual(report['duration'], 0.6)
+        self.assertAlmostEqual(report['recv']['peak'], 20.0)
+        self.assertGreater(report['recv']['p99'], 19.0)
+        self.assertEqual(report['recv']['bursts'], 2)
+        self.assertEqual(report['sent']['peak'], 0.0)
+        self.assertEqual(report['sent']['bursts'], 0)
+
+    def test_report_since_previous_report(self):
+        self.sampler._reported = 100.0
+        self.feed(100.0, [0, 12500, 12500])
+        with patch('time.monotonic', return_value=100.25):
+            first = self.sampler.report()
+        self.feed(100.3, [250000, 250000])
+        with patch('time.monotonic', return_value=100.45):
+            second = self.sampler.report()
+
+        self.assertEqual(first['samples'], 2)
+        self.assertEqual(first['recv']['bursts'], 0)
+        # The window starts from the last sample of the previous one
+        self.assertEqual(second['samples'], 2)
+        self.assertAlmostEqual(second['recv']['peak'], 20.0)
+        self.assertEqual(second['recv']['bursts'], 1)
+
+    def test_ring_buffer_keeps_window(self):
+        self.feed(0.0, [1000] * (self.sampler.capacity + 50))
+
+        report = self.sampler.report(since=0)
+
+        self.assertEqual(report['samples'], self.sampler.capacity - 1)
+
+    def test_empty_report(self):
+        report = self.sampler.report(since=0)
+
+        self.assertEqual(report['samples'], 0)
+        self.assertIsNone(report['recv']['peak'])
+
+    def test_no_threshold(self):
+        with patch('psutil.net_if_stats', return_value={}):
+            sampler = BurstSampler('eth0', sys_path=self.root)
+        self.assertIsNone(sampler.threshold_mbps)
+        sampler.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import tempfile
+import time
+import numpy as np
+import icmp
+from collector import SharedResults, ShardedCollector, read_targets
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+class TestSharedResults(unittest.TestCase):
+    def test_attach_shares_memory(self):
+        results = SharedResults(4, 2)
+        try:
+            attached = SharedResults(4, 2, name=results.name)
+            attached.latency[1] = 12.5
+            attached.owner[3] = 1
+
+            self.assertEqual(results.latency[1], 12.5)
+            self.assertTrue(np.isnan(results.latency[0]))
+            self.assertEqual(list(results.owner), [-1, -1, -1, 1])
+            self.assertEqual(results.running[0], 1)
+            attached.close()
+        finally:
+            results.close()
+
+    def test_read_targets(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("# Resolvers\n8.8.8.8\n\n1.1.1.1  # Cloudflare\n")
+        try:
+            self.assertEqual(read_targets(f.name), ['8.8.8.8', '1.1.1.1'])
+        finally:
+            os.remove(f.name)
+
+@unittest.skipUnless(icmp.available(), "unprivileged ICMP sockets are not allowed")
+class TestShardedCollector(unittest.TestCase):
+    def setUp(self):
+        self.hosts = ['127.0.0.1'] * 40
+        self.collector = ShardedCollector(self.hosts, workers=2, period=0.2, timeout=0.5,
+                                          heartbeat_timeout=2).start()
+
+    def tearDown(self):
+        self.collector.stop()
+
+    def probed(self):
+        return (self.collector.snapshot()[1] > 0).all()
+
+    def test_all_hosts_probed(self):
+        self.assertTrue(wait_until(self.probed))
+
+        latencies, updated = self.collector.snapshot()
+
+        self.assertFalse(np.isnan(latencies).any())
+        self.assertEqual(sorted(set(self.collector.results.owner)), [0, 1])
+
+    def test_dead_worker_is_replaced(self):
+        self.assertTrue(wait_until(self.probed))
+        self.collector._processes[1].kill()
+        self.collector._processes[1].join()
+
+        self.assertEqual(self.collector.check(), [1])
+        # Its hosts move to the survivor until the replacement reports in
+        self.assertEqual(set(self.collector.results.owner), {0})
+        self.assertTrue(wait_until(lambda: self.collector.check() == [] and
+                                   sorted(set(self.collector.results.owner)) == [0, 1]))
+        self.assertEqual(self.collector.restarts, 1)
+
+    def test_stale_results_are_dropped(self):
+        self.assertTrue(wait_until(self.probed))
+        self.collector.results.running[0] = 0
+        for process in self.collector._processes.values():
+            process.join(5)
+        self.collector.results.updated[:5] = time.time() * 1000 - 120_000
+
+        latencies, _ = self.collector.snapshot(max_age=60)
+
+        self.assertTrue(np.isnan(latencies[:5]).all())
+        self.assertFalse(np.isnan(latencies[5:]).any())
+
+    def test_stop_frees_shared_memory(self):
+        name = self.collector.results.name
+        self.collector.stop()
+
+        self.assertIsNone(self.collector.results)
+        with self.assertRaises(FileNotFoundError):
+            SharedResults(len(self.hosts), 2, name=name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import numpy as np
+from downsample import downsample, lttb, minmax
+
+class TestMinMax(unittest.TestCase):
+    def test_short_series_unchanged(self):
+        np.testing.assert_array_equal(minmax(np.arange(5.0), 10), np.arange(5))
+
+    def test_keeps_spikes(self):
+        y = np.zeros(10000)
+        y[1234] = 500.0
+        y[8765] = -20.0
+        
+        indices = minmax(y, 100)
+        
+        self.assertLessEqual(len(indices), 100)
+        self.assertIn(1234, indices)
+        self.assertIn(8765, indices)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_gaps_are_kept(self):
+        y = np.ones(1000)
+        y[400:600] = np.nan
+        
+        indices = minmax(y, 50)
+        
+        self.assertTrue(np.isnan(y[indices]).any())
+
+class TestLTTB(unittest.TestCase):
+    def test_endpoints_and_size(self):
+        x = np.arange(5000)
+        y = np.sin(x / 100.0)
+        
+        indices = lttb(x, y, 200)
+        
+        self.assertEqual(len(indices), 200)
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], 4999)
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_keeps_peak(self):
+        x = np.arange(3000)
+        y = np.zeros(3000)
+        y[1500] = 100.0
+        
+        indices = lttb(x, y, 100)
+        
+        self.assertIn(1500, indices)
+
+    def test_handles_nan(self):
+        x = np.arange(1000)
+        y = np.ones(1000)
+        y[::7] = np.nan
+        
+        indices = lttb(x, y, 50)
+        
+        self.assertEqual(len(indices), 50)
+
+    def test_short_series_unchanged(self):
+        np.testing.assert_array_equal(lttb(np.arange(3), np.arange(3.0), 10), np.arange(3))
+
+class TestDownsample(unittest.TestCase):
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            downsample(np.arange(10), np.arange(10.0), 5, method='mean')
+
+if __name__ == '__main__':
+    unittest.main()
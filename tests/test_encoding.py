@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import base64
+import numpy as np
+from encoding import typed_array, decode_typed_array
+
+class TestTypedArray(unittest.TestCase):
+    def test_float32(self):
+        values = np.array([1.5, np.nan, -2.0], dtype=np.float32)
+        
+        spec = typed_array(values)
+        
+        self.assertEqual(spec['dtype'], 'f4')
+        self.assertNotIn('shape', spec)
+        self.assertEqual(len(base64.b64decode(spec['bdata'])), 12)
+        np.testing.assert_array_equal(decode_typed_array(spec), values)
+
+    def test_datetime_becomes_epoch_ms(self):
+        times = np.array([1_700_000_000_123, 1_700_000_001_123]).astype('datetime64[ms]')
+        
+        spec = typed_array(times)
+        
+        self.assertEqual(spec['dtype'], 'f8')
+        np.testing.assert_array_equal(decode_typed_array(spec), [1_700_000_000_123, 1_700_000_001_123])
+
+    def test_int64(self):
+        self.assertEqual(typed_array(np.array([1, 2], dtype=np.int64))['dtype'], 'i4')
+        big = np.array([2 ** 40], dtype=np.int64)
+        spec = typed_array(big)
+        self.assertEqual(spec['dtype'], 'f8')
+        self.assertEqual(decode_typed_array(spec)[0], 2 ** 40)
+
+    def test_matrix_shape(self):
+        matrix = np.arange(6, dtype=np.float32).reshape(2, 3)
+        
+        spec = typed_array(matrix)
+        
+        self.assertEqual(spec['shape'], '2,3')
+        np.testing.assert_array_equal(decode_typed_array(spec), matrix)
+
+    def test_non_contiguous_view(self):
+        matrix = np.arange(12, dtype=np.float32).reshape(3, 4)[:, 1:3]
+        np.testing.assert_array_equal(decode_typed_array(typed_array(matrix)), matrix)
+
+    def test_python_list(self):
+        spec = typed_array([1.0, 2.0])
+        self.assertEqual(spec['dtype'], 'f8')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import io
+import json
+import shutil
+import tempfile
+import numpy as np
+from storage import TieredStore
+from export import export, iter_batches, read_binary, select_fields
+
+START = 1_700_000_000_000 - 1_700_000_000_000 % 3_600_000
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TieredStore(self.directory, ('ping', 'download'))
+        # One sample per second for five minutes, with every tenth ping lost
+        for i in range(300):
+            self.store.append(START + i * 1000, ping=None if i % 10 == 0 else float(i), download=50.5)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def collect(self, format, **kwargs):
+        tier, chunks = export(self.store, format, **kwargs)
+        return tier, b''.join(chunks)
+
+    def test_ndjson(self):
+        tier, data = self.collect('ndjson', end=START + 2000)
+
+        self.assertEqual(tier, 'raw')
+        rows = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual(rows, [
+            {'timestamp': START, 'ping': None, 'download': 50.5},
+            {'timestamp': START + 1000, 'ping': 1.0, 'download': 50.5}
+        ])
+
+    def test_csv(self):
+        _, data = self.collect('csv', end=START + 2000, columns=['ping'])
+
+        self.assertEqual(data.decode(), f"timestamp,ping\n{START},\n{START + 1000},1.0\n")
+
+    def test_binary_round_trip(self):
+        tier, chunks = export(self.store, 'binary', batch_rows=64)
+        header, batches = read_binary(io.BytesIO(b''.join(chunks)))
+        batches = list(batches)
+
+        self.assertEqual(header['tier'], 'raw')
+        self.assertEqual([name for name, _ in header['columns']], ['timestamp', 'ping', 'download'])
+        self.assertEqual([len(batch['timestamp']) for batch in batches], [64, 64, 64, 64, 44])
+        ping = np.concatenate([batch['ping'] for batch in batches])
+        _, rows = self.store.query()
+        np.testing.assert_array_equal(ping, rows['ping'])
+        self.assertEqual(batches[0]['timestamp'].dtype, np.int64)
+
+    def test_empty_binary(self):
+        _, chunks = export(self.store, 'binary', start=START * 2)
+        header, batches = read_binary(io.BytesIO(b''.join(chunks)))
+
+        self.assertEqual(header['columns'][1], ['ping', '<f4'])
+        self.assertEqual(list(batches), [])
+
+    def test_rollup_tier(self):
+        tier, data = self.collect('csv', resolution=60_000, columns=['ping'])
+
+        lines = data.decode().splitlines()
+        self.assertEqual(tier, '1m')
+        self.assertEqual(lines[0], 'timestamp,ping_min,ping_max,ping_mean,ping_count')
+        # The last minute is still open and not exported
+        self.assertEqual(len(lines), 1 + 4)
+
+    def test_batches_are_views(self):
+        _, dtypes, batches = iter_batches(self.store, batch_rows=100)
+        batch = next(batches)
+
+        self.assertEqual(list(dtypes), ['timestamp', 'ping', 'download'])
+        self.assertFalse(batch['ping'].flags.owndata)
+        self.assertEqual(len(batch['ping']), 100)
+
+    def test_select_fields(self):
+        fields = ['bytes_recv_min', 'bytes_recv_mean', 'bytes_min']
+        self.assertEqual(select_fields(fields, ['bytes']), ['bytes_min'])
+        self.assertEqual(select_fields(['bytes_recv', 'bytes_sent'], ['bytes_sent']), ['bytes_sent'])
+        with self.assertRaises(ValueError):
+            select_fields(fields, ['upload'])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export(self.store, 'xml')
+
+    def test_bad_magic(self):
+        with self.assertRaises(ValueError):
+            read_binary(io.BytesIO(b'nope'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,11 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 import unittest
+import time
 from unittest.mock import patch, Mock
 import numpy as np
-from heatmap import NetworkHeatmap
+from heatmap import NetworkHeatmap, prefix_group
+from adaptive import TokenBucket, AdaptiveProber
 
 class TestNetworkHeatmap(unittest.TestCase):
     def setUp(self):
@@ -30,9 +32,11 @@ class TestNetworkHeatmap(unittest.TestCase):
     def test_measure(self, mock_ping):
         """Test measurement recording"""
 
-        mock_ping.side_effect = [10.0, 20.0]
+        # Hosts are probed concurrently, so answer by host rather than call order
+        latencies = {"8.8.8.8": 10.0, "1.1.1.1": 20.0}
+        mock_ping.side_effect = lambda host, count: latencies[host]
         
-        self.heatmap.measure()
+        stats = self.heatmap.measure()
         
         self.assertEqual(mock_ping.call_count, 2)
         mock_ping.assert_any_call("8.8.8.8", count=2)
@@ -41,17 +45,92 @@ class TestNetworkHeatmap(unittest.TestCase):
         self.assertEqual(self.heatmap.data[0, 0], 10.0)
         self.assertEqual(self.heatmap.data[1, 0], 20.0)
         self.assertEqual(self.heatmap.current_index, 1)
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['responded'], 2)
+        self.assertEqual(self.heatmap.last_sweep, stats)
 
     @patch('heatmap.ping')
     def test_measure_with_failure(self, mock_ping):
         """Test measurement with failed pings"""
-        mock_ping.side_effect = [None, 20.0]
+        latencies = {"8.8.8.8": None, "1.1.1.1": 20.0}
+        mock_ping.side_effect = lambda host, count: latencies[host]
         
         self.heatmap.measure()
         
         self.assertTrue(np.isnan(self.heatmap.data[0, 0]))
         self.assertEqual(self.heatmap.data[1, 0], 20.0)
 
+    @patch('heatmap.ping')
+    def test_measure_deadline(self, mock_ping):
+        """Test hosts missing the sweep deadline are recorded as NaN"""
+        def slow_ping(host, count):
+            if host == "8.8.8.8":
+                time.sleep(0.5)
+            return 10.0
+        mock_ping.side_effect = slow_ping
+        self.heatmap.sweep_deadline = 0.1
+        self.heatmap.data[:, 0] = 99.0
+
+        stats = self.heatmap.measure()
+
+        self.assertTrue(np.isnan(self.heatmap.data[0, 0]))
+        self.assertEqual(self.heatmap.data[1, 0], 10.0)
+        self.assertEqual(stats['completed'], 1)
+        self.assertEqual(stats['timed_out'], 1)
+        self.assertLess(stats['duration'], 0.5)
+
+    @patch('heatmap.ping')
+    def test_measure_from_collector(self, mock_ping):
+        """Test a collector's shared results are read instead of sweeping"""
+        now = time.time() * 1000
+        collector = Mock(period=10, timeout=2)
+        collector.snapshot.return_value = (np.array([12.0, np.nan]), np.array([now, now - 60_000]))
+        heatmap = NetworkHeatmap(self.hosts, interval_minutes=1, history_hours=1, collector=collector)
+
+        stats = heatmap.measure()
+
+        mock_ping.assert_not_called()
+        collector.snapshot.assert_called_once_with(max_age=22)
+        self.assertEqual(heatmap.data[0, 0], 12.0)
+        self.assertTrue(np.isnan(heatmap.data[1, 0]))
+        self.assertEqual(stats['responded'], 1)
+        self.assertEqual(stats['timed_out'], 1)
+
+    @patch('heatmap.ping')
+    def test_adaptive_probing(self, mock_ping):
+        """Test due hosts are probed once each and measure() records their latest results"""
+        latencies = {"8.8.8.8": 10.0, "1.1.1.1": None}
+        mock_ping.side_effect = lambda host, count, timeout: latencies[host]
+        adaptive = AdaptiveProber(self.hosts, TokenBucket(rate=10))
+        heatmap = NetworkHeatmap(self.hosts, interval_minutes=1, history_hours=1, adaptive=adaptive)
+
+        heatmap.probe_due()
+        heatmap.probe_due()
+        stats = heatmap.measure()
+
+        self.assertEqual(mock_ping.call_count, 2)
+        mock_ping.assert_any_call("8.8.8.8", count=1, timeout=0.5)
+        self.assertEqual(heatmap.data[0, 0], 10.0)
+        self.assertTrue(np.isnan(heatmap.data[1, 0]))
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['responded'], 1)
+
+    @patch('heatmap.ping')
+    def test_probe_due_fits_in_its_period(self, mock_ping):
+        """Test a probe run returns before the next one-second tick"""
+        def slow_ping(host, count, timeout):
+            time.sleep(2)
+            return 10.0
+        mock_ping.side_effect = slow_ping
+        adaptive = AdaptiveProber(self.hosts, TokenBucket(rate=10))
+        heatmap = NetworkHeatmap(self.hosts, interval_minutes=1, history_hours=1, adaptive=adaptive)
+
+        stats = heatmap.probe_due()
+
+        self.assertLess(stats['duration'], 1)
+        self.assertEqual(stats['timed_out'], 2)
+
     @patch('matplotlib.pyplot.figure')
     @patch('matplotlib.pyplot.imshow')
     @patch('matplotlib.pyplot.colorbar')
@@ -72,6 +151,97 @@ class TestNetworkHeatmap(unittest.TestCase):
         mock_savefig.assert_called_once_with("test.png")
         mock_close.assert_called_once()
 
+    def test_load_history(self):
+        """Test restoring stored sweeps"""
+        history = np.arange(2 * 70, dtype=float).reshape(2, 70)
+        
+        self.heatmap.load_history(history)
+        
+        np.testing.assert_array_equal(self.heatmap.data, history[:, -60:])
+        self.assertEqual(self.heatmap.current_index, 0)
+
+        self.heatmap.load_history(history[:, :5])
+        self.assertEqual(self.heatmap.current_index, 5)
+        self.assertTrue(np.isnan(self.heatmap.data[:, 5:]).all())
+
+    @patch('heatmap.ping')
+    def test_chronological_view(self, mock_ping):
+        """Test wrapped columns come out oldest first with their timestamps"""
+        values = iter(range(1, 1000))
+        mock_ping.side_effect = lambda host, count: float(next(values))
+        with patch('time.time_ns') as mock_time:
+            for i in range(63):
+                mock_time.return_value = (i + 1) * 1_000_000_000
+                self.heatmap.measure()
+        
+        timestamps, data = self.heatmap.chronological()
+        
+        self.assertEqual(data.shape, (2, 60))
+        self.assertTrue(np.shares_memory(data, self.heatmap.data))
+        self.assertEqual(timestamps[0], 4000)
+        self.assertEqual(timestamps[-1], 63000)
+        self.assertTrue(np.all(np.diff(timestamps) > 0))
+        self.assertTrue(np.all(np.diff(data[0]) > 0))
+        with self.assertRaises(ValueError):
+            data[0, 0] = 1.0
+
+    @patch('heatmap.ping')
+    def test_chronological_before_wrap(self, mock_ping):
+        mock_ping.return_value = 5.0
+        self.heatmap.measure()
+        self.heatmap.measure()
+        
+        timestamps, data = self.heatmap.chronological()
+        
+        self.assertEqual(data.shape, (2, 2))
+        self.assertEqual(len(timestamps), 2)
+
+    def test_rows_page(self):
+        heatmap = NetworkHeatmap(["10.0.0.%d" % i for i in range(10)], 1, 1)
+        heatmap.load_history(np.arange(30, dtype=float).reshape(10, 3), [1, 2, 3])
+        
+        hosts, timestamps, data = heatmap.rows(4, 3)
+        
+        self.assertEqual(hosts, ["10.0.0.4", "10.0.0.5", "10.0.0.6"])
+        np.testing.assert_array_equal(timestamps, [1, 2, 3])
+        np.testing.assert_array_equal(data, [[12, 13, 14], [15, 16, 17], [18, 19, 20]])
+
+    def test_aggregate_by_prefix(self):
+        hosts = ["10.0.0.1", "10.0.1.1", "10.0.0.2", "example.com"]
+        heatmap = NetworkHeatmap(hosts, 1, 1)
+        heatmap.load_history(np.array([
+            [10.0, np.nan],
+            [30.0, 40.0],
+            [20.0, np.nan],
+            [np.nan, np.nan]
+        ]), [1, 2])
+        
+        labels, timestamps, mean = heatmap.aggregate()
+        _, _, peak = heatmap.aggregate(how='max')
+        
+        self.assertEqual(labels, ["10.0.0.0/24", "10.0.1.0/24", "example.com"])
+        np.testing.assert_array_equal(mean[0], [15.0, np.nan])
+        np.testing.assert_array_equal(peak[0], [20.0, np.nan])
+        np.testing.assert_array_equal(mean[1], [30.0, 40.0])
+        self.assertTrue(np.isnan(mean[2]).all())
+
+    def test_groups_are_computed_once(self):
+        hosts = ["10.0.0.1", "10.0.1.1", "10.0.0.2"]
+        heatmap = NetworkHeatmap(hosts, 1, 1)
+        group = Mock(side_effect=prefix_group)
+
+        labels, rows = heatmap.groups(group)
+        heatmap.aggregate(group)
+
+        self.assertEqual(labels, ["10.0.0.0/24", "10.0.1.0/24"])
+        self.assertEqual(rows.tolist(), [0, 1, 0])
+        self.assertEqual(group.call_count, 3)
+
+    def test_prefix_group(self):
+        self.assertEqual(prefix_group("192.168.1.77"), "192.168.1.0/24")
+        self.assertEqual(prefix_group("2001:db8:1:2::1"), "2001:db8:1::/48")
+        self.assertEqual(prefix_group("a.b.example.com"), "example.com")
+
     def test_circular_buffer(self):
         """Test that data wraps around correctly"""
         with patch('heatmap.ping') as mock_ping:
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import socket
+import threading
+import time
+import icmp
+from icmp import IcmpProber, checksum
+
+class TestChecksum(unittest.TestCase):
+    def test_checksum(self):
+        # Echo request, id 1, seq 1, no payload
+        header = bytes([8, 0, 0, 0, 0, 1, 0, 1])
+        self.assertEqual(checksum(header), 0xf7fd)
+
+    def test_checksum_odd_length(self):
+        self.assertEqual(checksum(b'\x01'), 0xfeff)
+
+class TestResolveHost(unittest.TestCase):
+    def test_family_from_literal(self):
+        self.assertEqual(icmp.resolve_host("127.0.0.1")[0], socket.AF_INET)
+        self.assertEqual(icmp.resolve_host("::1")[0], socket.AF_INET6)
+        self.assertEqual(icmp.resolve_host("fe80::1%lo")[0], socket.AF_INET6)
+
+    def test_forced_family(self):
+        self.assertEqual(icmp.resolve_host("127.0.0.1", ipv6=False),
+                         (socket.AF_INET, ("127.0.0.1", 0)))
+        self.assertIsNone(icmp.resolve_host("::1", ipv6=False)[1])
+
+    def test_unresolvable(self):
+        self.assertIsNone(icmp.resolve_host("host.invalid")[1])
+
+@unittest.skipUnless(icmp.available(), "unprivileged ICMP sockets not permitted")
+class TestIcmpProber(unittest.TestCase):
+    def setUp(self):
+        self.prober = IcmpProber()
+
+    def tearDown(self):
+        self.prober.close()
+
+    def test_ping_loopback(self):
+        rtts = self.prober.ping("127.0.0.1", count=3, timeout=1, interval=0.01)
+        self.assertEqual(len(rtts), 3)
+        for rtt in rtts:
+            self.assertIsNotNone(rtt)
+            self.assertTrue(0 <= rtt < 100)
+
+    @unittest.skipUnless(icmp.available(ipv6=True) and socket.has_ipv6,
+                         "unprivileged ICMPv6 sockets not permitted")
+    def test_ping_loopback_ipv6(self):
+        rtts = self.prober.ping("::1", count=2, timeout=1, interval=0.01, ipv6=True)
+        self.assertEqual(len(rtts), 2)
+        self.assertTrue(all(rtt is not None for rtt in rtts))
+
+    @unittest.skipUnless(icmp.available(ipv6=True) and socket.has_ipv6,
+                         "unprivileged ICMPv6 sockets not permitted")
+    def test_socket_added_later_is_watched_at_once(self):
+        self.prober.ping("127.0.0.1", count=1, timeout=1)
+        time.sleep(0.1)
+        # The receiver is now blocked in select() on the IPv4 socket only
+        rtts = self.prober.ping("::1", count=3, timeout=1, interval=0.01, ipv6=True)
+        self.assertTrue(all(rtt is not None and rtt < 100 for rtt in rtts))
+
+    def test_close_stops_receiver(self):
+        self.prober.ping("127.0.0.1", count=1, timeout=1)
+        self.prober.close()
+        self.assertFalse(self.prober._receiver.is_alive())
+
+    @unittest.skipUnless(icmp.available(ipv6=True) and socket.has_ipv6,
+                         "unprivileged ICMPv6 sockets not permitted")
+    def test_family_from_address(self):
+        results = self.prober.ping_many(["127.0.0.1", "::1"], count=2, timeout=1, interval=0.01)
+
+        self.assertTrue(all(rtt is not None for rtts in results.values() for rtt in rtts))
+        self.assertEqual(set(self.prober._sockets), {socket.AF_INET, socket.AF_INET6})
+
+    def test_ping_many_shares_socket(self):
+        hosts = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+        results = self.prober.ping_many(hosts, count=2, timeout=1, interval=0.01)
+        
+        self.assertEqual(set(results), set(hosts))
+        for host in hosts:
+            self.assertEqual(len(results[host]), 2)
+            self.assertTrue(all(rtt is not None for rtt in results[host]))
+        self.assertEqual(len(self.prober._sockets), 1)
+
+    def test_concurrent_callers(self):
+        results = {}
+
+        def worker(host):
+            results[host] = self.prober.ping(host, count=2, timeout=1, interval=0.01)
+
+        threads = [threading.Thread(target=worker, args=(f"127.0.0.{i}",)) for i in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(results), 8)
+        for rtts in results.values():
+            self.assertTrue(all(rtt is not None for rtt in rtts))
+
+    def test_unresolvable_host(self):
+        rtts = self.prober.ping("host.invalid", count=2, timeout=0.1)
+        self.assertEqual(rtts, [None, None])
+
+    def test_timeout(self):
+        # Drop every reply so the request has to time out
+        self.prober._dispatch = lambda *args: None
+        rtts = self.prober.ping("127.0.0.1", count=1, timeout=0.2)
+        self.assertEqual(rtts, [None])
+        self.assertEqual(self.prober._pending, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import time
+from instrumentation import Histogram, Timings, bucket_index, bucket_bounds
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_cover_their_values(self):
+        for ns in [0, 1, 3, 4, 7, 8, 100, 999, 12345, 10 ** 9, 2 ** 40 + 5, 2 ** 63]:
+            low, high = bucket_bounds(bucket_index(ns))
+            self.assertLessEqual(low, ns)
+            self.assertLess(ns, high)
+            # Sub-buckets keep the relative error at 25% or less
+            if ns >= 4:
+                self.assertLessEqual(high - low, low / 4)
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for _ in range(90):
+            histogram.record(1_000_000)  # 1 ms
+        for _ in range(10):
+            histogram.record(100_000_000)  # 100 ms
+
+        stats = histogram.snapshot()
+
+        self.assertEqual(stats['count'], 100)
+        self.assertAlmostEqual(stats['mean'], 10.9)
+        self.assertAlmostEqual(stats['p50'], 1.0, delta=0.25)
+        self.assertAlmostEqual(stats['p90'], 1.0, delta=0.25)
+        self.assertAlmostEqual(stats['p99'], 100.0, delta=25)
+        self.assertEqual(stats['max'], 100.0)
+
+    def test_empty(self):
+        stats = Histogram().snapshot()
+
+        self.assertEqual(stats['count'], 0)
+        self.assertIsNone(stats['p50'])
+        self.assertIsNone(stats['max'])
+
+class TestTimings(unittest.TestCase):
+    def test_timer_and_decorator(self):
+        timings = Timings()
+
+        with timings.time('stage.block'):
+            time.sleep(0.01)
+
+        @timings.timed('stage.call')
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(21), 42)
+        snapshot = timings.snapshot()
+        self.assertEqual(list(snapshot), ['stage.block', 'stage.call'])
+        self.assertGreaterEqual(snapshot['stage.block']['max'], 10)
+        self.assertEqual(snapshot['stage.call']['count'], 1)
+
+    def test_timer_records_on_error(self):
+        timings = Timings()
+        with self.assertRaises(ValueError):
+            with timings.time('stage'):
+                raise ValueError()
+        self.assertEqual(timings.snapshot()['stage']['count'], 1)
+
+    def test_disabled(self):
+        timings = Timings(enabled=False)
+        with timings.time('stage'):
+            pass
+        timings.record('other', 5)
+        self.assertEqual(timings.snapshot(), {})
+
+    def test_reset(self):
+        timings = Timings()
+        timings.record('stage', 5)
+        timings.reset()
+        self.assertEqual(timings.snapshot(), {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,40 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 import unittest
 from unittest.mock import patch, Mock
-import time
-from interface_stats import InterfaceStats
+import tempfile
+from interface_stats import InterfaceStats, NetDevSampler, FIELD_INDEX
+
+HEADER = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|"
+    "bytes    packets errs drop fifo colls carrier compressed\n"
+)
+
+def proc_line(name, bytes_recv=0, packets_recv=0, errin=0, dropin=0,
+              bytes_sent=0, packets_sent=0, errout=0, dropout=0):
+    receive = [bytes_recv, packets_recv, errin, dropin, 0, 0, 0, 0]
+    transmit = [bytes_sent, packets_sent, errout, dropout, 0, 0, 0, 0]
+    return f"{name:>6}: " + ' '.join(str(value) for value in receive + transmit) + "\n"
+
+def psutil_counters(bytes_sent, bytes_recv, packets_sent, packets_recv):
+    return Mock(bytes_sent=bytes_sent, bytes_recv=bytes_recv,
+                packets_sent=packets_sent, packets_recv=packets_recv,
+                errin=0, errout=0, dropin=0, dropout=0)
 
 class TestInterfaceStats(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.missing = self.path + '.missing'
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write_proc(self, *lines):
+        # Rewrite in place so the sampler's open handle sees the new content
+        with open(self.path, 'w') as f:
+            f.write(HEADER + ''.join(lines))
+
     @patch('psutil.net_if_stats')
     def test_get_default_interface(self, mock_if_stats):
         mock_if_stats.return_value = {
@@ -14,71 +44,42 @@ class TestInterfaceStats(unittest.TestCase):
             'eth0': Mock(isup=True),
             'wlan0': Mock(isup=False)
         }
-        
-        with patch('psutil.net_io_counters') as mock_counters:
-            mock_counters.return_value = {
-                'eth0': Mock(
-                    bytes_sent=1000,
-                    bytes_recv=2000,
-                    packets_sent=10,
-                    packets_recv=20
-                )
-            }
-            stats = InterfaceStats()
-            self.assertEqual(stats.interface_name, 'eth0')
+        self.write_proc(proc_line('lo'), proc_line('eth0', 2000, 20, bytes_sent=1000, packets_sent=10))
 
-    @patch('psutil.net_io_counters')
-    def test_get_rates(self, mock_counters):
-        
-        mock_counters.return_value = {
-            'eth0': Mock(
-                bytes_sent=1000,
-                bytes_recv=2000,
-                packets_sent=10,
-                packets_recv=20
-            )
-        }
-        
-        stats = InterfaceStats('eth0')
-        initial_time = time.time()
-        stats.last_time = initial_time
-        
-        mock_counters.return_value = {
-            'eth0': Mock(
-                bytes_sent=2000,  
-                bytes_recv=4000,  
-                packets_sent=15,
-                packets_recv=30
-            )
-        }
-        
-        with patch('time.time') as mock_time:
-            mock_time.return_value = initial_time + 1.0
-            rates = stats.get_rates()
-        
-        self.assertEqual(rates['bytes_sent'], 1000.0)
-        self.assertEqual(rates['bytes_recv'], 2000.0)
-        self.assertEqual(rates['packets_sent'], 5.0) 
-        self.assertEqual(rates['packets_recv'], 10.0)  
+        stats = InterfaceStats(path=self.path)
+        self.assertEqual(stats.interface_name, 'eth0')
 
-    @patch('psutil.net_io_counters')
-    def test_get_totals(self, mock_counters):
-        mock_counters.return_value = {
-            'eth0': Mock(
-                bytes_sent=1000,
-                bytes_recv=2000,
-                packets_sent=10,
-                packets_recv=20
-            )
-        }
-        
-        stats = InterfaceStats('eth0')
+    @patch('time.monotonic')
+    def test_get_rates(self, mock_time):
+        self.write_proc(proc_line('eth0', 2000, 20, bytes_sent=1000, packets_sent=10))
+        mock_time.return_value = 100.0
+        stats = InterfaceStats('eth0', path=self.path)
+
+        self.write_proc(proc_line('eth0', 4000, 30, errin=2, dropin=1,
+                                  bytes_sent=2000, packets_sent=15, errout=4))
+        mock_time.return_value = 101.0
+        rates = stats.get_rates()
+
+        self.assertEqual(rates['bytes_sent'], 1000 * 8 / 1_000_000)
+        self.assertEqual(rates['bytes_recv'], 2000 * 8 / 1_000_000)
+        self.assertEqual(rates['packets_sent'], 5.0)
+        self.assertEqual(rates['packets_recv'], 10.0)
+        self.assertEqual(rates['errin'], 2.0)
+        self.assertEqual(rates['errout'], 4.0)
+        self.assertEqual(rates['dropin'], 1.0)
+        self.assertEqual(rates['dropout'], 0.0)
+
+    def test_get_totals(self):
+        self.write_proc(proc_line('eth0', 2000, 20, dropout=3, bytes_sent=1000, packets_sent=10))
+
+        stats = InterfaceStats('eth0', path=self.path)
         totals = stats.get_totals()
-        
+
         self.assertEqual(totals['bytes_sent'], 1000)
         self.assertEqual(totals['bytes_recv'], 2000)
         self.assertEqual(totals['packets_sent'], 10)
         self.assertEqual(totals['packets_recv'], 20)
+        self.assertEqual(totals['dropout'], 3)
 
     @patch('psutil.net_if_stats')
     def test_no_active_interface(self, mock_if_stats):
@@ -87,16 +88,112 @@ class TestInterfaceStats(unittest.TestCase):
             'eth0': Mock(isup=False),
             'wlan0': Mock(isup=False)
         }
-        
+
         with self.assertRaises(RuntimeError):
             InterfaceStats()
 
+    def test_interface_not_found(self):
+        self.write_proc(proc_line('lo'))
+
+        with self.assertRaises(ValueError):
+            InterfaceStats('nonexistent0', path=self.path)
+
+    @patch('psutil.net_io_counters')
+    def test_psutil_fallback(self, mock_counters):
+        mock_counters.return_value = {'eth0': psutil_counters(1000, 2000, 10, 20)}
+
+        stats = InterfaceStats('eth0', path=self.missing)
+        self.assertEqual(stats.get_totals()['bytes_recv'], 2000)
+
+        mock_counters.return_value = {'eth0': psutil_counters(1500, 2500, 15, 25)}
+        rates = stats.get_rates()
+        self.assertGreater(rates['packets_sent'], 0)
+
     @patch('psutil.net_io_counters')
-    def test_interface_not_found(self, mock_counters):
+    def test_psutil_interface_not_found(self, mock_counters):
         mock_counters.return_value = {}
-        
+
         with self.assertRaises(ValueError):
-            InterfaceStats('nonexistent0')
+            InterfaceStats('nonexistent0', path=self.missing)
+
+class TestNetDevSampler(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.sampler = NetDevSampler(self.path)
+
+    def tearDown(self):
+        self.sampler.close()
+        os.remove(self.path)
+
+    def write_proc(self, *lines):
+        with open(self.path, 'w') as f:
+            f.write(HEADER + ''.join(lines))
+
+    def sample_at(self, when, *lines):
+        self.write_proc(*lines)
+        with patch('time.monotonic', return_value=when):
+            return self.sampler.sample()
+
+    def test_snapshot_reads_all_interfaces(self):
+        self.write_proc(proc_line('lo', 5, 1), proc_line('eth0', 10, 2), proc_line('wlan0', 20, 3))
+
+        names, counters = self.sampler.snapshot()
+
+        self.assertEqual(names, ('lo', 'eth0', 'wlan0'))
+        self.assertEqual(counters.shape, (3, 16))
+        self.assertEqual(list(counters[:, FIELD_INDEX['bytes_recv']]), [5, 10, 20])
+
+    def test_first_sample_has_zero_rates(self):
+        sample = self.sample_at(10.0, proc_line('eth0', 1000))
+
+        self.assertEqual(sample['interval'], 0.0)
+        self.assertFalse(sample['rates'].any())
+
+    def test_rates_for_all_interfaces(self):
+        self.sample_at(10.0, proc_line('lo', 0), proc_line('eth0', 1000))
+        sample = self.sample_at(12.0, proc_line('lo', 400), proc_line('eth0', 5000))
+
+        self.assertEqual(sample['interval'], 2.0)
+        self.assertEqual(list(sample['rates'][:, FIELD_INDEX['bytes_recv']]), [200.0, 2000.0])
+
+    def test_32bit_counter_wrap(self):
+        self.sample_at(10.0, proc_line('eth0', 2 ** 32 - 100))
+        sample = self.sample_at(11.0, proc_line('eth0', 50))
+
+        self.assertEqual(sample['rates'][0, FIELD_INDEX['bytes_recv']], 150.0)
+        self.assertEqual(self.sampler.wraps, 1)
+        self.assertEqual(self.sampler.resets, 0)
+
+    def test_64bit_counter_wrap(self):
+        self.sample_at(10.0, proc_line('eth0', 2 ** 64 - 100))
+        sample = self.sample_at(11.0, proc_line('eth0', 50))
+
+        self.assertEqual(sample['rates'][0, FIELD_INDEX['bytes_recv']], 150.0)
+        self.assertEqual(self.sampler.wraps, 1)
+        self.assertEqual(self.sampler.resets, 0)
+
+    def test_counter_reset(self):
+        self.sample_at(10.0, proc_line('eth0', 10 ** 12))
+        sample = self.sample_at(11.0, proc_line('eth0', 300))
+
+        self.assertEqual(sample['rates'][0, FIELD_INDEX['bytes_recv']], 300.0)
+        self.assertEqual(self.sampler.resets, 1)
+
+    def test_small_counter_reset_is_not_a_wrap(self):
+        self.sample_at(10.0, proc_line('eth0', 1000))
+        sample = self.sample_at(11.0, proc_line('eth0', 10))
+
+        self.assertEqual(sample['rates'][0, FIELD_INDEX['bytes_recv']], 10.0)
+        self.assertEqual(self.sampler.wraps, 0)
+        self.assertEqual(self.sampler.resets, 1)
+
+    def test_interfaces_appearing(self):
+        self.sample_at(10.0, proc_line('eth0', 1000))
+        sample = self.sample_at(11.0, proc_line('tun0', 7000), proc_line('eth0', 1500))
+
+        self.assertEqual(sample['interfaces'], ('tun0', 'eth0'))
+        self.assertEqual(list(sample['rates'][:, FIELD_INDEX['bytes_recv']]), [0.0, 500.0])
 
 if __name__ == '__main__':
     unittest.main()
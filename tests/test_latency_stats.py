@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import numpy as np
+from latency_stats import DDSketch, LatencyWindow, LatencyStats
+
+class TestDDSketch(unittest.TestCase):
+    def test_quantiles_within_accuracy(self):
+        values = np.random.default_rng(1).lognormal(3, 0.5, 10000)
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        
+        for q in (0.5, 0.95, 0.99):
+            expected = np.quantile(values, q, method='lower')
+            self.assertAlmostEqual(sketch.quantile(q) / expected, 1, delta=0.02)
+
+    def test_bins_are_bounded(self):
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=32)
+        for value in np.geomspace(0.01, 10000, 5000):
+            sketch.add(value)
+        
+        self.assertLessEqual(len(sketch.bins), 32)
+        self.assertEqual(sketch.count, 5000)
+        self.assertAlmostEqual(sketch.quantile(0.99) / 9120, 1, delta=0.05)
+
+    def test_merge(self):
+        a, b, combined = DDSketch(), DDSketch(), DDSketch()
+        for value in range(1, 101):
+            (a if value % 2 else b).add(value)
+            combined.add(value)
+        
+        a.merge(b)
+        
+        self.assertEqual(a.count, 100)
+        self.assertEqual(a.quantile(0.5), combined.quantile(0.5))
+
+    def test_empty(self):
+        self.assertIsNone(DDSketch().quantile(0.5))
+
+class TestLatencyWindow(unittest.TestCase):
+    def test_loss_and_jitter(self):
+        window = LatencyWindow(window=60, slots=6)
+        window.record([10.0, 12.0, None, 11.0], timestamp=0)
+        
+        summary = window.summary(timestamp=1)
+        
+        self.assertEqual(summary['sent'], 4)
+        self.assertEqual(summary['received'], 3)
+        self.assertAlmostEqual(summary['loss'], 0.25)
+        self.assertAlmostEqual(summary['jitter'], 1.5)
+        self.assertAlmostEqual(summary['p50'], 11.0, delta=0.2)
+
+    def test_old_slots_expire(self):
+        window = LatencyWindow(window=60, slots=6)
+        window.record([100.0], timestamp=0)
+        window.record([10.0], timestamp=55)
+        self.assertEqual(window.summary(timestamp=55)['sent'], 2)
+        
+        summary = window.summary(timestamp=65)
+        
+        self.assertEqual(summary['sent'], 1)
+        self.assertAlmostEqual(summary['p99'], 10.0, delta=0.2)
+
+    def test_all_lost(self):
+        window = LatencyWindow()
+        window.record([None, None], timestamp=0)
+        summary = window.summary(timestamp=0)
+        self.assertIsNone(summary['p50'])
+        self.assertEqual(summary['loss'], 1.0)
+
+class TestLatencyStats(unittest.TestCase):
+    def test_per_host(self):
+        stats = LatencyStats()
+        stats.record("a", [1.0, 2.0], timestamp=0)
+        stats.record("b", [None], timestamp=0)
+        
+        self.assertEqual(sorted(stats.hosts()), ["a", "b"])
+        self.assertEqual(stats.summary("a", timestamp=0)['received'], 2)
+        self.assertEqual(stats.summary("b", timestamp=0)['loss'], 1.0)
+        self.assertIsNone(stats.summary("c"))
+
+if __name__ == '__main__':
+    unittest.main()
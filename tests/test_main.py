@@ -0,0 +1,266 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import tempfile
+from datetime import datetime
+from unittest.mock import patch
+import dash
+import numpy as np
+import main
+from encoding import decode_typed_array
+from render_cache import RenderCache
+from snapshot import SnapshotPublisher
+from storage import TieredStore
+from timeseries import TimeSeriesStore
+
+def triggered_by(component):
+    """Stand in for dash.ctx inside a callback triggered by a component"""
+    return patch.object(dash, 'ctx', type('Context', (), {'triggered_id': component})())
+
+class TestUpdateSeriesGraph(unittest.TestCase):
+    def setUp(self):
+        self.series = TimeSeriesStore(main.HISTORY_SAMPLES, ('ping', 'download', 'upload'))
+        self.snapshots = SnapshotPublisher(self.series.columns, ('status',))
+        patches = [
+            patch.object(main, 'snapshots', self.snapshots),
+            patch.object(main, 'render_cache', RenderCache()),
+            triggered_by('interval-component')
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def publish(self, samples):
+        """Append samples one second apart, with the sample number as latency"""
+        start = self.series.total
+        for i in range(start, start + samples):
+            self.series.append(1_700_000_000_000 + i * 1000, ping=float(i), download=1.0, upload=2.0)
+        return self.snapshots.publish(series=self.series)
+
+    def assertFullFigure(self, result, total, downsampled=False):
+        figure, extend, cursor = result
+        self.assertEqual(figure['layout']['meta'], {'total': total, 'downsampled': downsampled})
+        self.assertIs(extend, dash.no_update)
+        self.assertEqual(cursor, {'total': total, 'full': total})
+
+    def test_first_connect_gets_full_figure(self):
+        self.publish(10)
+
+        self.assertFullFigure(main.update_series_graph('ping', None, None), 10)
+
+    def test_delta_holds_new_points(self):
+        self.publish(10)
+        cursor = {'total': 7, 'full': 5}
+
+        figure, extend, cursor = main.update_series_graph('ping', cursor, None)
+
+        self.assertIs(figure, dash.no_update)
+        data, traces, max_points = extend
+        self.assertEqual(data['y'], [[7.0, 8.0, 9.0]])
+        self.assertEqual(len(data['x'][0]), 3)
+        self.assertEqual(traces, [0])
+        self.assertEqual(max_points, main.HISTORY_SAMPLES)
+        self.assertEqual(cursor, {'total': 10, 'full': 5})
+
+    def test_delta_covers_every_speed_trace(self):
+        self.publish(10)
+
+        _, extend, _ = main.update_series_graph('speed', {'total': 9, 'full': 9}, None)
+
+        self.assertEqual(extend[0]['y'], [[1.0], [2.0]])
+        self.assertEqual(extend[1], [0, 1])
+
+    def test_client_far_behind_gets_full_figure(self):
+        total = main.MAX_DELTA_POINTS + 50
+        self.publish(total)
+
+        behind = {'total': total - main.MAX_DELTA_POINTS - 1, 'full': 0}
+        self.assertFullFigure(main.update_series_graph('ping', behind, None), total)
+        _, extend, _ = main.update_series_graph('ping', {'total': total - main.MAX_DELTA_POINTS, 'full': 0}, None)
+        self.assertEqual(len(extend[0]['y'][0]), main.MAX_DELTA_POINTS)
+
+    def test_no_new_points(self):
+        self.publish(10)
+
+        result = main.update_series_graph('ping', {'total': 10, 'full': 10}, None)
+
+        self.assertEqual(result, (dash.no_update, dash.no_update, dash.no_update))
+
+    def test_downsampled_figure_is_refreshed(self):
+        total = main.GRAPH_POINTS + 100
+        self.publish(total)
+        refreshed = total - main.FULL_REFRESH_POINTS
+
+        _, extend, cursor = main.update_series_graph('ping', {'total': total - 1, 'full': refreshed + 1}, None)
+        self.assertEqual(extend[0]['y'], [[float(total - 1)]])
+        self.assertEqual(cursor, {'total': total, 'full': refreshed + 1})
+
+        result = main.update_series_graph('ping', {'total': total - 1, 'full': refreshed}, None)
+        self.assertFullFigure(result, total, downsampled=True)
+        self.assertLessEqual(len(decode_typed_array(result[0]['data'][0]['y'])), main.GRAPH_POINTS)
+
+    def test_stale_cursor_gets_full_figure(self):
+        self.publish(10)
+
+        # A cursor from before a server restart is ahead of the new series
+        self.assertFullFigure(main.update_series_graph('ping', {'total': 500, 'full': 500}, None), 10)
+        self.assertFullFigure(main.update_series_graph('ping', {'total': -5, 'full': 0}, None), 10)
+
+    def test_zoomed_client_is_not_updated(self):
+        self.publish(10)
+
+        result = main.update_series_graph('ping', {'total': 5, 'full': 5, 'zoomed': True}, None)
+
+        self.assertEqual(result, (dash.no_update, dash.no_update, dash.no_update))
+
+class TestRenderIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.snapshots = SnapshotPublisher(('ping',), ('status', 'traceroute'))
+        self.cache = RenderCache()
+        for p in (patch.object(main, 'snapshots', self.snapshots),
+                  patch.object(main, 'render_cache', self.cache)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.renders = []
+
+    def render(self, snapshot):
+        self.renders.append(snapshot.panels['status'])
+        return f"status {snapshot.panels['status']}"
+
+    def test_unchanged_version_is_skipped(self):
+        self.snapshots.publish(panels=('status',))
+
+        content, version = main.render_if_changed('status', None, self.render)
+        self.assertEqual((content, version), ("status 1", 1))
+
+        self.assertEqual(main.render_if_changed('status', 1, self.render), (dash.no_update, dash.no_update))
+        # Other panels changing does not re-render this one
+        self.snapshots.publish(panels=('traceroute',))
+        self.assertEqual(main.render_if_changed('status', 1, self.render), (dash.no_update, dash.no_update))
+        self.assertEqual(self.renders, [1])
+
+    def test_rendered_once_per_version_and_view(self):
+        self.snapshots.publish(panels=('status',))
+        for _ in range(3):
+            main.render_if_changed('status', None, self.render)
+            main.render_if_changed('status', 0, self.render, view=('page', 1))
+        self.assertEqual(self.renders, [1, 1])
+
+        self.snapshots.publish(panels=('status',))
+        self.assertEqual(main.render_if_changed('status', 1, self.render), ("status 2", 2))
+        main.render_if_changed('status', 1, self.render, view=('page', 1))
+        main.render_if_changed('status', 1, self.render, view=('page', 2))
+        self.assertEqual(self.renders, [1, 1, 2, 2, 2])
+
+    def test_failed_render_is_retried(self):
+        self.snapshots.publish(panels=('status',))
+        calls = []
+
+        def flaky(snapshot):
+            calls.append(snapshot.version)
+            if len(calls) == 1:
+                raise ValueError("not ready")
+            return "status"
+
+        with patch('builtins.print'):
+            self.assertEqual(main.render_if_changed('status', None, flaky), (dash.no_update, dash.no_update))
+        self.assertEqual(main.render_if_changed('status', None, flaky), ("status", 1))
+        self.assertEqual(main.render_if_changed('status', None, flaky), ("status", 1))
+        self.assertEqual(len(calls), 2)
+
+class TestRenderStatus(unittest.TestCase):
+    def setUp(self):
+        self.series = TimeSeriesStore(10, ('ping', 'download', 'upload'))
+        self.snapshots = SnapshotPublisher(self.series.columns, ('status',), measured_download=0,
+                                           measured_upload=0, last_speed_test=0, bursts=None)
+
+    def current_ping(self, latency):
+        self.series.append(1_700_000_000_000, ping=latency, download=0.0, upload=0.0)
+        status = main.render_status(self.snapshots.publish(series=self.series))
+        return status.children[0].children
+
+    def test_current_ping(self):
+        self.assertEqual(self.current_ping(12.34), "Current Ping: 12.3 ms")
+
+    def test_lost_ping(self):
+        self.assertEqual(self.current_ping(float('nan')), "Current Ping: n/a")
+
+class TestParseZoomWindow(unittest.TestCase):
+    def local(self, ms):
+        # Axis values are naive local times
+        return datetime.fromtimestamp(ms / 1000).isoformat(sep=' ')
+
+    def test_range_bounds(self):
+        relayout = {'xaxis.range[0]': self.local(1_700_000_000_000),
+                    'xaxis.range[1]': self.local(1_700_000_060_500)}
+        self.assertEqual(main.parse_zoom_window(relayout), (1_700_000_000_000, 1_700_000_060_500))
+
+    def test_range_list(self):
+        relayout = {'xaxis.range': [self.local(1_700_000_000_000), self.local(1_700_003_600_000)]}
+        self.assertEqual(main.parse_zoom_window(relayout), (1_700_000_000_000, 1_700_003_600_000))
+
+    def test_not_zoomed(self):
+        self.assertIsNone(main.parse_zoom_window(None))
+        self.assertIsNone(main.parse_zoom_window({}))
+        self.assertIsNone(main.parse_zoom_window({'xaxis.autorange': True}))
+        self.assertIsNone(main.parse_zoom_window({'xaxis.range[0]': self.local(1_700_000_000_000)}))
+        self.assertIsNone(main.parse_zoom_window({'yaxis.range[0]': 0, 'yaxis.range[1]': 10}))
+
+    def test_invalid_range(self):
+        self.assertIsNone(main.parse_zoom_window({'xaxis.range': ['yesterday', 'today']}))
+        reversed_range = [self.local(1_700_000_060_000), self.local(1_700_000_000_000)]
+        self.assertIsNone(main.parse_zoom_window({'xaxis.range': reversed_range}))
+
+class TestSeriesTraces(unittest.TestCase):
+    # Minute aligned, so every minute holds two samples
+    START = 28_333_334 * 60_000
+    MINUTES = 100
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = TieredStore(directory.name, ('ping', 'download', 'upload'))
+        for i in range(2 * self.MINUTES):
+            minute = i // 2
+            self.store.append(self.START + i * 30_000, ping=float(minute) if i % 2 == 0 else 50.0 + minute,
+                              download=float(i), upload=1.0)
+        p = patch.object(main, 'network_history', self.store)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def decode(self, trace):
+        return decode_typed_array(trace[0]), decode_typed_array(trace[1])
+
+    def test_rollup_plots_min_and_max(self):
+        # Wide enough for the 1 min tier; the buckets still open are not stored
+        window = (self.START, self.START + 1000 * 60_000)
+        [trace] = main.series_traces(None, ('ping',), 'minmax', window)
+        timestamps, values = self.decode(trace)
+
+        minutes = self.MINUTES - 1
+        expected = np.column_stack([np.arange(minutes), 50.0 + np.arange(minutes)]).ravel()
+        np.testing.assert_array_equal(values, expected)
+        self.assertTrue((np.diff(timestamps) >= 0).all())
+        np.testing.assert_array_equal(timestamps[::2], timestamps[1::2])
+        self.assertEqual(timestamps[2] - timestamps[0], 60_000)
+
+    def test_rollup_plots_mean(self):
+        window = (self.START, self.START + 1000 * 60_000)
+        download, upload = main.series_traces(None, ('download', 'upload'), 'lttb', window)
+        timestamps, values = self.decode(download)
+
+        np.testing.assert_array_equal(values, np.arange(self.MINUTES - 1) * 2 + 0.5)
+        self.assertTrue((np.diff(timestamps) > 0).all())
+        self.assertTrue((self.decode(upload)[1] == 1.0).all())
+
+    def test_narrow_window_reads_raw_samples(self):
+        window = (self.START, self.START + 5 * 60_000)
+        [trace] = main.series_traces(None, ('ping',), 'minmax', window)
+        timestamps, values = self.decode(trace)
+
+        np.testing.assert_array_equal(values, [0, 50, 1, 51, 2, 52, 3, 53, 4, 54])
+        self.assertTrue((np.diff(timestamps) == 30_000).all())
+
+if __name__ == '__main__':
+    unittest.main()
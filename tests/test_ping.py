@@ -3,12 +3,14 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 import unittest
 from unittest.mock import patch
-from ping import ping
+import icmp
+from ping import ping, add_reply_listener, remove_reply_listener
 
 class TestPing(unittest.TestCase):
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_ping_ipv4_success(self, mock_subprocess):
+    def test_ping_ipv4_success(self, mock_subprocess, mock_available):
         mock_subprocess.return_value.returncode = 0
         mock_subprocess.return_value.stdout = (
             "PING 8.8.8.8 (8.8.8.8): 56 data bytes\n"
@@ -25,16 +27,65 @@ class TestPing(unittest.TestCase):
         result = ping("8.8.8.8")
         self.assertEqual(result, 13.610)
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_ping_failure(self, mock_subprocess):
+    def test_reply_listener(self, mock_subprocess, mock_available):
+        mock_subprocess.return_value.returncode = 0
+        mock_subprocess.return_value.stdout = (
+            "PING 8.8.8.8 (8.8.8.8): 56 data bytes\n"
+            "64 bytes from 8.8.8.8: icmp_seq=0 ttl=56 time=12.994 ms\n"
+            "64 bytes from 8.8.8.8: icmp_seq=2 ttl=56 time=13.021 ms\n"
+            "\n"
+            "--- 8.8.8.8 ping statistics ---\n"
+            "3 packets transmitted, 2 packets received, 33.3% packet loss\n"
+            "round-trip min/avg/max/stddev = 12.994/13.007/13.021/0.013 ms\n"
+        )
+        replies = []
+        listener = lambda host, rtts: replies.append((host, rtts))
+        add_reply_listener(listener)
+        try:
+            result = ping("8.8.8.8", count=3)
+        finally:
+            remove_reply_listener(listener)
+        
+        self.assertEqual(result, 13.007)
+        self.assertEqual(replies, [("8.8.8.8", [12.994, 13.021, None])])
+
+    @patch('icmp.available', return_value=False)
+    @patch('subprocess.run')
+    def test_failing_listener_keeps_result(self, mock_subprocess, mock_available):
+        mock_subprocess.return_value.returncode = 0
+        mock_subprocess.return_value.stdout = (
+            "64 bytes from 8.8.8.8: icmp_seq=0 ttl=56 time=12.994 ms\n"
+            "round-trip min/avg/max/stddev = 12.994/12.994/12.994/0.000 ms\n"
+        )
+        replies = []
+        def failing(host, rtts):
+            raise ValueError("unexpected host")
+        listener = lambda host, rtts: replies.append(host)
+        add_reply_listener(failing)
+        add_reply_listener(listener)
+        try:
+            result = ping("8.8.8.8", count=1)
+        finally:
+            remove_reply_listener(failing)
+            remove_reply_listener(listener)
+
+        self.assertEqual(result, 12.994)
+        self.assertEqual(replies, ["8.8.8.8"])
+
+    @patch('icmp.available', return_value=False)
+    @patch('subprocess.run')
+    def test_ping_failure(self, mock_subprocess, mock_available):
         mock_subprocess.return_value.returncode = 1
         mock_subprocess.return_value.stderr = "ping: cannot resolve unknown.host"
         
         result = ping("unknown.host")
         self.assertIsNone(result)
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_ping_ipv6_success(self, mock_subprocess):
+    def test_ping_ipv6_success(self, mock_subprocess, mock_available):
         mock_subprocess.return_value.returncode = 0
         mock_subprocess.return_value.stdout = (
             "PING6 2001:4860:4860::8888(2001:4860:4860::8888) 56 data bytes\n"
@@ -51,6 +102,34 @@ class TestPing(unittest.TestCase):
         result = ping("2001:4860:4860::8888", ipv6=True)
         self.assertEqual(result, 15.250)
 
+    @patch('icmp.available', return_value=False)
+    @patch('subprocess.run')
+    def test_ipv6_address_uses_ping6(self, mock_subprocess, mock_available):
+        mock_subprocess.return_value.returncode = 1
+        mock_subprocess.return_value.stderr = ""
+
+        ping("::1", count=1)
+
+        mock_available.assert_called_with(True)
+        self.assertEqual(mock_subprocess.call_args[0][0][0], "ping6")
+
+    @unittest.skipUnless(icmp.available(ipv6=True), "unprivileged ICMPv6 sockets not permitted")
+    @patch('subprocess.run')
+    def test_native_ping_ipv6_loopback(self, mock_subprocess):
+        """IPv6 addresses are probed over ICMPv6 without asking for it"""
+        result = ping("::1", count=2, timeout=1)
+        self.assertIsInstance(result, float)
+        mock_subprocess.assert_not_called()
+
+    @unittest.skipUnless(icmp.available(), "unprivileged ICMP sockets not permitted")
+    @patch('subprocess.run')
+    def test_native_ping_loopback(self, mock_subprocess):
+        """Native prober is used without spawning a ping process"""
+        result = ping("127.0.0.1", count=2, timeout=1)
+        self.assertIsInstance(result, float)
+        self.assertTrue(0 < result < 100)
+        mock_subprocess.assert_not_called()
+
     def test_real_ping(self):
         """Integration test with real ping to Google's DNS"""
         result = ping("8.8.8.8", count=2)
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import json
+import threading
+import time
+from push import EventBroadcaster, format_event
+
+def parse(chunk):
+    """Split a chunk of an event stream into (event, data) pairs"""
+    events = []
+    for block in chunk.decode().split('\n\n'):
+        if not block or block.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+class TestEventBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.broadcaster = EventBroadcaster(max_queue=3, heartbeat=0.05)
+
+    def test_format_event(self):
+        self.assertEqual(format_event('sample', {'total': 1}),
+                         b'event: sample\ndata: {"total":1}\n\n')
+
+    def test_initial_events_then_published(self):
+        stream = self.broadcaster.subscribe([('config', {'history': 10})])
+
+        self.assertEqual(parse(next(stream)), [('config', {'history': 10})])
+        self.assertEqual(self.broadcaster.subscribers, 1)
+        self.broadcaster.publish('sample', {'total': 1})
+        self.broadcaster.publish('sample', {'total': 2})
+        self.assertEqual(parse(next(stream)), [('sample', {'total': 1}), ('sample', {'total': 2})])
+
+    def test_waits_for_events(self):
+        stream = self.broadcaster.subscribe()
+        # The stream subscribes when first advanced, before the timer fires
+        timer = threading.Timer(0.02, self.broadcaster.publish, ('version', {'panel': 'status'}))
+        timer.start()
+        chunk = next(stream)
+        timer.join()
+
+        if chunk.startswith(b':'):
+            chunk = next(stream)
+        self.assertEqual(parse(chunk), [('version', {'panel': 'status'})])
+
+    def test_heartbeat(self):
+        stream = self.broadcaster.subscribe()
+        start = time.monotonic()
+
+        self.assertEqual(next(stream), b': keep-alive\n\n')
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_slow_subscriber_drops_oldest(self):
+        stream = self.broadcaster.subscribe([('config', {})])
+        next(stream)
+        for total in range(5):
+            self.broadcaster.publish('sample', {'total': total})
+
+        self.assertEqual(parse(next(stream)), [('dropped', {})])
+        self.assertEqual([data['total'] for _, data in parse(next(stream))], [2, 3, 4])
+
+    def test_close_unsubscribes(self):
+        stream = self.broadcaster.subscribe([('config', {})])
+        next(stream)
+        stream.close()
+
+        self.assertEqual(self.broadcaster.subscribers, 0)
+        self.broadcaster.publish('sample', {})
+
+if __name__ == '__main__':
+    unittest.main()
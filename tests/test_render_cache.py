@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import threading
+import time
+import numpy as np
+from dash import html
+from render_cache import RenderCache, plain
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RenderCache(max_entries=2)
+        self.renders = 0
+
+    def render(self, value='content'):
+        self.renders += 1
+        return value
+
+    def test_renders_once_per_key(self):
+        first = self.cache.get(('status', 1), self.render)
+        second = self.cache.get(('status', 1), self.render)
+        self.cache.get(('status', 2), self.render)
+
+        self.assertEqual(first, 'content')
+        self.assertIs(first, second)
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 2, 'entries': 2})
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.get(1, self.render)
+        self.cache.get(2, self.render)
+        self.cache.get(1, self.render)
+        self.cache.get(3, self.render)
+
+        self.cache.get(1, self.render)
+        self.assertEqual(self.renders, 3)
+        self.cache.get(2, self.render)
+        self.assertEqual(self.renders, 4)
+
+    def test_concurrent_misses_render_once(self):
+        started = threading.Event()
+
+        def slow_render():
+            started.set()
+            time.sleep(0.1)
+            return self.render()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get('key', slow_render)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['content'] * 8)
+        self.assertEqual(self.renders, 1)
+
+    def test_failures_are_not_cached(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get('key', fail)
+        self.assertEqual(self.cache.get('key', self.render), 'content')
+
+    def test_outputs_are_plain(self):
+        ring = np.array([1.5, 2.5], dtype=np.float32)
+        value = self.cache.get('key', lambda: html.Div([html.P("x")], id='panel'))
+        delta = self.cache.get('delta', lambda: {'y': [ring]})
+        ring[0] = 9
+
+        self.assertEqual(value['type'], 'Div')
+        self.assertEqual(value['props']['children'][0]['props']['children'], 'x')
+        self.assertEqual(delta, {'y': [[1.5, 2.5]]})
+
+    def test_plain_keeps_json(self):
+        from plotly.io.json import to_json_plotly
+        component = html.Div([html.P("a", style={'color': 'white'}), "b"])
+        self.assertEqual(to_json_plotly(plain(component)), to_json_plotly(component))
+
+if __name__ == '__main__':
+    unittest.main()
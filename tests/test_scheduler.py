@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import threading
+import time
+from scheduler import Scheduler
+from instrumentation import Timings
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = Scheduler()
+
+    def tearDown(self):
+        self.scheduler.stop(timeout=1)
+
+    def test_fixed_rate_without_drift(self):
+        times = []
+
+        def work():
+            times.append(time.monotonic())
+            time.sleep(0.02)
+
+        self.scheduler.add_job('work', work, period=0.05)
+        self.scheduler.start()
+        time.sleep(0.53)
+        self.scheduler.stop(timeout=1)
+        
+        # Work time must not push later ticks back
+        self.assertGreaterEqual(len(times), 10)
+        self.assertAlmostEqual(times[9] - times[0], 0.45, delta=0.03)
+        self.assertEqual(self.scheduler.jobs['work'].overruns, 0)
+
+    def test_overrun_skips_ticks(self):
+        self.scheduler.add_job('slow', lambda: time.sleep(0.25), period=0.1)
+        self.scheduler.start()
+        time.sleep(0.4)
+        self.scheduler.stop(timeout=1)
+        
+        stats = self.scheduler.stats()['slow']
+        self.assertGreaterEqual(stats['runs'], 1)
+        self.assertGreaterEqual(stats['overruns'], 1)
+        self.assertGreaterEqual(stats['skipped'], 2)
+
+    def test_jobs_are_independent(self):
+        fast_runs = []
+        blocker = threading.Event()
+
+        self.scheduler.add_job('blocked', blocker.wait, period=0.05)
+        self.scheduler.add_job('fast', lambda: fast_runs.append(1), period=0.05)
+        self.scheduler.start()
+        time.sleep(0.3)
+        blocker.set()
+        
+        self.assertGreaterEqual(len(fast_runs), 5)
+
+    def test_errors_are_counted(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        self.scheduler.add_job('fail', fail, period=0.05)
+        self.scheduler.start()
+        time.sleep(0.12)
+        self.scheduler.stop(timeout=1)
+        
+        stats = self.scheduler.stats()['fail']
+        self.assertGreaterEqual(stats['errors'], 2)
+        self.assertEqual(stats['last_error'], "boom")
+
+    def test_initial_delay(self):
+        runs = []
+        self.scheduler.add_job('late', lambda: runs.append(1), period=0.05, initial_delay=0.5)
+        self.scheduler.start()
+        time.sleep(0.2)
+        self.assertEqual(runs, [])
+
+    def test_job_durations_are_recorded(self):
+        timings = Timings()
+        scheduler = Scheduler(timings=timings)
+        scheduler.add_job('work', lambda: time.sleep(0.01), period=0.05)
+        scheduler.start()
+        time.sleep(0.12)
+        scheduler.stop(timeout=1)
+
+        stats = timings.snapshot()['job.work']
+        self.assertGreaterEqual(stats['count'], 2)
+        self.assertGreaterEqual(stats['p50'], 8)
+
+    def test_duplicate_job(self):
+        self.scheduler.add_job('job', lambda: None, period=1)
+        with self.assertRaises(ValueError):
+            self.scheduler.add_job('job', lambda: None, period=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import threading
+import numpy as np
+from timeseries import TimeSeriesStore
+from snapshot import SnapshotPublisher
+
+class TestSnapshotPublisher(unittest.TestCase):
+    def setUp(self):
+        self.series = TimeSeriesStore(4, ('ping', 'download'))
+        self.publisher = SnapshotPublisher(self.series.columns, ('status', 'traceroute'),
+                                           measured_download=0, hops=())
+
+    def test_initial_snapshot(self):
+        snapshot = self.publisher.current
+
+        self.assertEqual(snapshot.version, 0)
+        self.assertEqual(snapshot.total, 0)
+        self.assertEqual(len(snapshot), 0)
+        self.assertIsNone(snapshot.last('ping'))
+        self.assertEqual(dict(snapshot.state), {'measured_download': 0, 'hops': ()})
+        self.assertEqual(dict(snapshot.panels), {'status': 0, 'traceroute': 0})
+
+    def test_publish_series(self):
+        for i in range(6):
+            self.series.append(i * 1000, ping=i, download=i * 10)
+        snapshot = self.publisher.publish(series=self.series, panels=('status',))
+
+        self.assertIs(self.publisher.current, snapshot)
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(snapshot.total, 6)
+        self.assertEqual(snapshot.timestamps.tolist(), [2000, 3000, 4000, 5000])
+        self.assertEqual(snapshot.columns['download'].tolist(), [20, 30, 40, 50])
+        self.assertEqual(snapshot.last('ping'), 5)
+        self.assertEqual(dict(snapshot.panels), {'status': 1, 'traceroute': 0})
+
+    def test_snapshot_does_not_change(self):
+        self.series.append(0, ping=1, download=1)
+        snapshot = self.publisher.publish(series=self.series)
+        for i in range(1, 5):
+            self.series.append(i * 1000, ping=9, download=9)
+        self.publisher.publish(series=self.series, measured_download=5)
+
+        self.assertEqual(snapshot.timestamps.tolist(), [0])
+        self.assertEqual(snapshot.columns['ping'].tolist(), [1])
+        self.assertEqual(snapshot.state['measured_download'], 0)
+
+    def test_snapshot_is_read_only(self):
+        snapshot = self.publisher.publish(series=self.series)
+
+        with self.assertRaises(AttributeError):
+            snapshot.total = 5
+        with self.assertRaises(TypeError):
+            snapshot.state['hops'] = ('a',)
+        with self.assertRaises(ValueError):
+            snapshot.columns['ping'][:] = 1
+
+    def test_state_merges_and_keeps_series(self):
+        self.series.append(0, ping=1, download=1)
+        first = self.publisher.publish(series=self.series)
+        second = self.publisher.publish(panels=('traceroute',), hops=('a', 'b'))
+
+        self.assertIs(second.timestamps, first.timestamps)
+        self.assertEqual(second.total, 1)
+        self.assertEqual(dict(second.state), {'measured_download': 0, 'hops': ('a', 'b')})
+        self.assertEqual(dict(second.panels), {'status': 0, 'traceroute': 1})
+
+    def test_readers_see_aligned_series(self):
+        series = TimeSeriesStore(100, ('ping', 'download'))
+        publisher = SnapshotPublisher(series.columns, ())
+        done = threading.Event()
+
+        def collect():
+            for i in range(2000):
+                series.append(i, ping=i, download=i)
+                publisher.publish(series=series)
+            done.set()
+
+        thread = threading.Thread(target=collect)
+        thread.start()
+        while not done.is_set():
+            snapshot = publisher.current
+            self.assertEqual(len(snapshot.columns['ping']), len(snapshot))
+            np.testing.assert_array_equal(snapshot.columns['ping'], snapshot.timestamps)
+            np.testing.assert_array_equal(snapshot.columns['download'], snapshot.timestamps)
+            if len(snapshot):
+                self.assertEqual(snapshot.timestamps[-1], snapshot.total - 1)
+        thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+from unittest.mock import patch, Mock
+import shutil
+import tempfile
+import time
+from speed_measure import ServerSelector, NetworkSpeedTest
+
+SERVERS = [
+    {'id': '1', 'url': 'http://one.example/speedtest/upload.php'},
+    {'id': '2', 'url': 'http://two.example/speedtest/upload.php'},
+    {'id': '3', 'url': 'http://three.example/speedtest/upload.php'}
+]
+LATENCIES = {'1': 30.0, '2': 10.0, '3': 20.0}
+
+def fake_probe(server):
+    return LATENCIES[server['id']]
+
+def fake_speedtest():
+    st = Mock()
+    st._best = {}
+    st.get_closest_servers.return_value = [dict(server) for server in SERVERS]
+    st.best = st._best
+    return st
+
+class TestServerSelector(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = os.path.join(self.directory, 'servers.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rank_orders_by_latency(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+
+        best = selector.rank(fake_speedtest())
+
+        self.assertEqual(best['id'], '2')
+        self.assertEqual([server['id'] for server in selector.ranking], ['2', '3', '1'])
+        self.assertEqual(best['latency'], 10.0)
+
+    def test_unanswered_servers_are_dropped(self):
+        selector = ServerSelector(self.cache, probe=lambda server: None if server['id'] == '2' else 5.0)
+
+        selector.rank(fake_speedtest())
+
+        self.assertNotIn('2', [server['id'] for server in selector.ranking])
+
+    def test_no_server_answers(self):
+        selector = ServerSelector(self.cache, probe=lambda server: None)
+
+        with self.assertRaises(RuntimeError):
+            selector.rank(fake_speedtest())
+
+    def test_cache_skips_discovery(self):
+        ServerSelector(self.cache, probe=fake_probe).rank(fake_speedtest())
+        probe = Mock(side_effect=fake_probe)
+        st = fake_speedtest()
+
+        best = ServerSelector(self.cache, probe=probe).best(st)
+
+        self.assertEqual(best['id'], '2')
+        st.get_closest_servers.assert_not_called()
+        probe.assert_not_called()
+
+    def test_stale_cache_is_ranked_again(self):
+        ServerSelector(self.cache, probe=fake_probe).rank(fake_speedtest())
+        selector = ServerSelector(self.cache, ttl=0, probe=fake_probe)
+        st = fake_speedtest()
+
+        selector.best(st)
+
+        st.get_closest_servers.assert_called_once()
+
+    def test_probes_run_in_parallel(self):
+        def slow_probe(server):
+            time.sleep(0.3)
+            return LATENCIES[server['id']]
+        selector = ServerSelector(self.cache, probe=slow_probe)
+
+        start = time.monotonic()
+        selector.rank(fake_speedtest())
+
+        self.assertLess(time.monotonic() - start, 0.8)
+
+    def test_fail_returns_next_server(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+        best = selector.rank(fake_speedtest())
+
+        self.assertEqual(selector.fail(best)['id'], '3')
+        self.assertEqual(ServerSelector(self.cache).ranking[0]['id'], '3')
+
+    def test_failed_server_is_not_ranked_again(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+        selector.fail(selector.rank(fake_speedtest()))
+
+        self.assertEqual(selector.rank(fake_speedtest(), discover=False)['id'], '3')
+        reloaded = ServerSelector(self.cache, probe=fake_probe)
+        self.assertEqual(reloaded.rank(fake_speedtest(), discover=False)['id'], '3')
+        # Discovery starts over
+        self.assertEqual(reloaded.rank(fake_speedtest())['id'], '2')
+
+    def test_block_backs_off_and_expires(self):
+        selector = ServerSelector(self.cache, probe=fake_probe, block=60, max_block=100)
+        selector.rank(fake_speedtest())
+        start = time.time()
+
+        for failures, block in ((1, 60), (2, 100), (3, 100)):
+            selector.fail({'id': '2'})
+            self.assertEqual(selector.failed['2']['failures'], failures)
+            self.assertAlmostEqual(selector.failed['2']['until'] - start, block, delta=1)
+
+        selector.failed['2']['until'] = time.time() - 1
+        self.assertEqual(selector.rank(fake_speedtest(), discover=False)['id'], '2')
+        selector.succeed({'id': '2'})
+        self.assertNotIn('2', selector.failed)
+
+    def test_blocks_lifted_when_all_answering_servers_blocked(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+        selector.rank(fake_speedtest())
+        for server in SERVERS:
+            selector.fail(server)
+
+        self.assertEqual(selector.rank(fake_speedtest(), discover=False)['id'], '2')
+        self.assertEqual(selector.failed, {})
+
+    def test_blocks_lifted_when_no_server_answers(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+        selector.fail(selector.rank(fake_speedtest()))
+        selector.probe = lambda server: None
+
+        with self.assertRaises(RuntimeError):
+            selector.rank(fake_speedtest(), discover=False)
+        self.assertEqual(ServerSelector(self.cache).failed, {})
+
+    def test_rerank_reuses_candidates(self):
+        selector = ServerSelector(self.cache, probe=fake_probe)
+        selector.rank(fake_speedtest())
+        st = fake_speedtest()
+
+        selector.rank(st, discover=False)
+
+        st.get_closest_servers.assert_not_called()
+
+class TestNetworkSpeedTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.selector = ServerSelector(os.path.join(self.directory, 'servers.json'), probe=fake_probe)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @patch('speed_measure.speedtest.Speedtest')
+    def test_measure(self, mock_speedtest):
+        st = fake_speedtest()
+        st.download.return_value = 50_000_000
+        st.upload.return_value = 10_000_000
+        mock_speedtest.return_value = st
+
+        results = NetworkSpeedTest(selector=self.selector).measure()
+
+        self.assertEqual(results, {'download': 50.0, 'upload': 10.0})
+        self.assertEqual(st._best['id'], '2')
+
+    @patch('speed_measure.speedtest.Speedtest')
+    def test_failure_fails_over_without_discovery(self, mock_speedtest):
+        first = fake_speedtest()
+        first.download.side_effect = OSError("connection reset")
+        second = fake_speedtest()
+        second.download.return_value = 50_000_000
+        second.upload.return_value = 10_000_000
+        mock_speedtest.side_effect = [first, second]
+        speed_test = NetworkSpeedTest(selector=self.selector)
+
+        self.assertEqual(speed_test.measure(), {'download': 0, 'upload': 0})
+        # The next server is used right away, before the re-ranking finishes
+        self.assertEqual(first._best['id'], '3')
+        speed_test._reranking.join()
+        results = speed_test.measure()
+
+        self.assertEqual(results['download'], 50.0)
+        second.get_closest_servers.assert_not_called()
+        # The failed server still answers probes but stays out of the ranking
+        self.assertEqual(second._best['id'], '3')
+
+    @patch('speed_measure.speedtest.Speedtest')
+    def test_measure_does_not_wait_for_reranking(self, mock_speedtest):
+        st = fake_speedtest()
+        st.download.side_effect = [OSError("connection reset"), 50_000_000]
+        st.upload.return_value = 10_000_000
+        mock_speedtest.return_value = st
+        speed_test = NetworkSpeedTest(selector=self.selector)
+        speed_test._selecting.join()
+        self.selector.probe = lambda server: time.sleep(1) or LATENCIES[server['id']]
+
+        speed_test.measure()
+        start = time.monotonic()
+        results = speed_test.measure()
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(results['download'], 50.0)
+        self.assertEqual(st._best['id'], '3')
+
+    @patch('speed_measure.speedtest.Speedtest')
+    def test_recovers_after_outage(self, mock_speedtest):
+        network = {'up': True}
+
+        def download():
+            if not network['up']:
+                raise OSError("network unreachable")
+            return 50_000_000
+
+        def new_speedtest():
+            st = fake_speedtest()
+            st.download.side_effect = download
+            st.upload.return_value = 10_000_000
+            return st
+
+        mock_speedtest.side_effect = new_speedtest
+        self.selector.probe = lambda server: fake_probe(server) if network['up'] else None
+        speed_test = NetworkSpeedTest(selector=self.selector)
+
+        def measure():
+            results = speed_test.measure()
+            if speed_test._reranking is not None:
+                speed_test._reranking.join()
+            return results
+
+        self.assertEqual(measure()['download'], 50.0)
+        network['up'] = False
+        for _ in range(12):
+            self.assertEqual(measure(), {'download': 0, 'upload': 0})
+
+        network['up'] = True
+        results = [measure()['download'] for _ in range(3)]
+        self.assertIn(50.0, results)
+        self.assertEqual(measure()['download'], 50.0)
+
+    @patch('speed_measure.speedtest.Speedtest')
+    def test_initialization_failure(self, mock_speedtest):
+        mock_speedtest.side_effect = OSError("no network")
+
+        speed_test = NetworkSpeedTest(selector=self.selector)
+
+        self.assertEqual(speed_test.measure(), {'download': 0, 'upload': 0})
+        self.assertIsNone(speed_test.st)
+
+if __name__ == '__main__':
+    unittest.main()
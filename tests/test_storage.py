@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import tempfile
+import numpy as np
+from storage import ColumnFile, TieredStore
+
+MINUTE = 60_000
+HOUR = 3_600_000
+BASE = 1_700_000_000_000 - 1_700_000_000_000 % HOUR
+
+class TestColumnFile(unittest.TestCase):
+    def test_grows_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            column = ColumnFile(os.path.join(directory, 'c.bin'), np.float32, chunk_rows=4)
+            self.assertEqual(column.capacity, 4)
+            column.array[3] = 1.5
+            
+            column.reserve(5)
+            
+            self.assertEqual(column.capacity, 8)
+            self.assertEqual(column.array[3], 1.5)
+
+class TestTieredStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.store = TieredStore(self.directory, ('ping', 'download'))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def fill(self, store, seconds, start=BASE):
+        for i in range(seconds):
+            store.append(start + i * 1000, ping=float(i % 60), download=None if i % 2 else 10.0)
+
+    def test_raw_query(self):
+        self.fill(self.store, 5)
+        
+        tier, rows = self.store.query(BASE + 1000, BASE + 3000)
+        
+        self.assertEqual(tier, 'raw')
+        np.testing.assert_array_equal(rows['timestamp'], [BASE + 1000, BASE + 2000])
+        np.testing.assert_array_equal(rows['ping'], [1.0, 2.0])
+        self.assertTrue(np.isnan(rows['download'][0]))
+
+    def test_minute_rollup(self):
+        self.fill(self.store, 125)
+        
+        tier, rows = self.store.query(resolution=MINUTE)
+        
+        self.assertEqual(tier, '1m')
+        # The third minute is still open
+        np.testing.assert_array_equal(rows['timestamp'], [BASE, BASE + MINUTE])
+        np.testing.assert_array_equal(rows['ping_min'], [0, 0])
+        np.testing.assert_array_equal(rows['ping_max'], [59, 59])
+        np.testing.assert_allclose(rows['ping_mean'], [29.5, 29.5])
+        np.testing.assert_array_equal(rows['ping_count'], [60, 60])
+        # NaN samples are not counted
+        np.testing.assert_array_equal(rows['download_count'], [30, 30])
+        np.testing.assert_array_equal(rows['download_mean'], [10, 10])
+
+    def test_tier_selection(self):
+        self.assertEqual(self.store.select_tier(0).name, 'raw')
+        self.assertEqual(self.store.select_tier(30_000).name, 'raw')
+        self.assertEqual(self.store.select_tier(5 * MINUTE).name, '1m')
+        self.assertEqual(self.store.select_tier(2 * HOUR).name, '1h')
+
+    def test_restart_recovers_rows_and_open_bucket(self):
+        self.fill(self.store, 90)
+        self.store.flush()
+        
+        reopened = TieredStore(self.directory, ('ping', 'download'))
+        self.assertEqual(reopened.raw.length, 90)
+        self.fill(reopened, 40, start=BASE + 90 * 1000)
+        
+        tier, rows = reopened.query(resolution=MINUTE)
+        self.assertEqual(rows['ping_count'][1], 60)
+        self.assertEqual(len(rows['timestamp']), 2)
+
+    def test_out_of_order_timestamp_is_clamped(self):
+        self.store.append(BASE + 5000, ping=1.0)
+        self.store.append(BASE, ping=2.0)
+        
+        np.testing.assert_array_equal(self.store.tail(2)['timestamp'], [BASE + 5000, BASE + 5000])
+
+    def test_tail(self):
+        self.fill(self.store, 10)
+        rows = self.store.tail(3)
+        np.testing.assert_array_equal(rows['ping'], [7, 8, 9])
+        self.assertEqual(len(self.store.tail(100)['ping']), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import threading
+import time
+from sweep import sweep
+
+class TestSweep(unittest.TestCase):
+    def test_results_in_host_order(self):
+        hosts = ["a", "b", "c"]
+        latencies = {"a": 1.0, "b": None, "c": 3.0}
+        
+        results, stats = sweep(hosts, latencies.get)
+        
+        self.assertEqual(results, [1.0, None, 3.0])
+        self.assertEqual(stats['total'], 3)
+        self.assertEqual(stats['completed'], 3)
+        self.assertEqual(stats['responded'], 2)
+        self.assertEqual(stats['timed_out'], 0)
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def probe(host):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return 1.0
+
+        results, stats = sweep(list(range(20)), probe, max_workers=4)
+        
+        self.assertEqual(stats['responded'], 20)
+        self.assertLessEqual(peak[0], 4)
+        self.assertGreater(peak[0], 1)
+
+    def test_deadline(self):
+        def probe(host):
+            time.sleep(0.5 if host == "slow" else 0)
+            return 1.0
+
+        results, stats = sweep(["fast", "slow"], probe, deadline=0.1)
+        
+        self.assertEqual(results, [1.0, None])
+        self.assertEqual(stats['completed'], 1)
+        self.assertEqual(stats['timed_out'], 1)
+        self.assertLess(stats['duration'], 0.5)
+
+    def test_probe_exception(self):
+        def probe(host):
+            raise OSError("unreachable")
+
+        results, stats = sweep(["a"], probe)
+        
+        self.assertEqual(results, [None])
+        self.assertEqual(stats['completed'], 1)
+        self.assertEqual(stats['responded'], 0)
+
+    def test_empty(self):
+        results, stats = sweep([], lambda host: 1.0)
+        self.assertEqual(results, [])
+        self.assertEqual(stats['total'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
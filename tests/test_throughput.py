@@ -0,0 +1,73 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import socket
+from throughput import ThroughputServer, run_streams, measure, parse_address, HEADER
+from speed_measure import NetworkSpeedTest
+
+class TestThroughput(unittest.TestCase):
+    def setUp(self):
+        self.server = ThroughputServer('127.0.0.1', 0).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_download(self):
+        result = run_streams(self.server.address, 'download', streams=3, duration=0.3)
+
+        self.assertEqual(len(result['streams']), 3)
+        self.assertTrue(all(rate > 0 for rate in result['streams']))
+        self.assertGreater(result['mbps'], 0)
+        self.assertGreater(result['bytes'], 0)
+        self.assertGreaterEqual(result['duration'], 0.3)
+
+    def test_upload(self):
+        result = run_streams(self.server.address, 'upload', streams=2, duration=0.3)
+
+        self.assertEqual(len(result['streams']), 2)
+        self.assertTrue(all(rate > 0 for rate in result['streams']))
+        self.assertGreater(result['bytes'], 0)
+
+    def test_measure(self):
+        results = measure(self.server.address, streams=2, duration=0.2)
+
+        self.assertGreater(results['download'], 0)
+        self.assertGreater(results['upload'], 0)
+        self.assertEqual(len(results['download_streams']), 2)
+
+    def test_speed_test_targets_server(self):
+        host, port = self.server.address
+        speed_test = NetworkSpeedTest(server=f"{host}:{port}", streams=2, duration=0.2)
+
+        results = speed_test.measure()
+
+        self.assertIsNone(speed_test.st)
+        self.assertGreater(results['download'], 0)
+        self.assertGreater(results['upload'], 0)
+
+    def test_unknown_direction_is_dropped(self):
+        with socket.create_connection(self.server.address, timeout=5) as sock:
+            sock.sendall(HEADER.pack(b'X', 1.0))
+            self.assertEqual(sock.recv(1), b'')
+
+    def test_unreachable_server(self):
+        host, port = self.server.address
+        self.server.stop()
+        self.server = ThroughputServer('127.0.0.1', 0)
+
+        speed_test = NetworkSpeedTest(server=(host, port), duration=0.1)
+        self.assertEqual(speed_test.measure(), {'download': 0, 'upload': 0})
+        with self.assertRaises(OSError):
+            run_streams((host, port), duration=0.1)
+
+class TestParseAddress(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_address('example.com'), ('example.com', 5201))
+        self.assertEqual(parse_address('10.0.0.1:9000'), ('10.0.0.1', 9000))
+        self.assertEqual(parse_address('[::1]:9000'), ('::1', 9000))
+        self.assertEqual(parse_address('[::1]'), ('::1', 5201))
+        self.assertEqual(parse_address(('h', '80')), ('h', 80))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import unittest
+import numpy as np
+from timeseries import TimeSeriesStore
+
+class TestTimeSeriesStore(unittest.TestCase):
+    def setUp(self):
+        self.store = TimeSeriesStore(capacity=4, columns=('ping', 'download'))
+
+    def test_empty(self):
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(len(self.store.timestamps()), 0)
+        self.assertIsNone(self.store.last('ping'))
+
+    def test_append_and_read(self):
+        self.store.append(1000, ping=10.0, download=50.0)
+        self.store.append(2000, ping=None, download=60.0)
+        
+        self.assertEqual(len(self.store), 2)
+        np.testing.assert_array_equal(self.store.timestamps(), [1000, 2000])
+        np.testing.assert_array_equal(self.store.column('download'), [50.0, 60.0])
+        self.assertTrue(np.isnan(self.store.column('ping')[1]))
+        self.assertEqual(self.store.column('ping').dtype, np.float32)
+        self.assertEqual(self.store.timestamps().dtype, np.int64)
+
+    def test_wraparound_is_chronological(self):
+        for i in range(10):
+            self.store.append(i, ping=float(i))
+        
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(self.store.total, 10)
+        np.testing.assert_array_equal(self.store.timestamps(), [6, 7, 8, 9])
+        np.testing.assert_array_equal(self.store.column('ping'), [6, 7, 8, 9])
+        self.assertEqual(self.store.last('ping'), 9.0)
+
+    def test_views_do_not_copy(self):
+        for i in range(6):
+            self.store.append(i, ping=float(i))
+        
+        view = self.store.column('ping')
+        
+        self.assertTrue(np.shares_memory(view, self.store._values['ping']))
+        with self.assertRaises(ValueError):
+            view[0] = 1.0
+
+    def test_default_timestamp(self):
+        self.store.append(ping=1.0)
+        self.assertGreater(self.store.timestamps()[0], 1_600_000_000_000)
+
+if __name__ == '__main__':
+    unittest.main()
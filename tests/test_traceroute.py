@@ -3,12 +3,16 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 import unittest
 from unittest.mock import patch
+import socket
+import struct
+import icmp
 from traceroute import traceroute
 
 class TestTraceroute(unittest.TestCase):
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_traceroute_ipv4_success(self, mock_subprocess):
+    def test_traceroute_ipv4_success(self, mock_subprocess, mock_available):
         mock_subprocess.return_value.returncode = 0
         mock_subprocess.return_value.stdout = (
             "traceroute to 8.8.8.8, 30 hops max\n"
@@ -26,16 +30,18 @@ class TestTraceroute(unittest.TestCase):
         result = traceroute("8.8.8.8")
         self.assertEqual(result, expected_hops)
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_traceroute_failure(self, mock_subprocess):
+    def test_traceroute_failure(self, mock_subprocess, mock_available):
         mock_subprocess.return_value.returncode = 1
         mock_subprocess.return_value.stderr = "traceroute: unknown host"
         
         result = traceroute("unknown.host")
         self.assertIsNone(result)
 
+    @patch('icmp.available', return_value=False)
     @patch('subprocess.run')
-    def test_traceroute_ipv6_success(self, mock_subprocess): 
+    def test_traceroute_ipv6_success(self, mock_subprocess, mock_available): 
         mock_subprocess.return_value.returncode = 0
         mock_subprocess.return_value.stdout = (
             "traceroute to 2001:4860:4860::8888, 30 hops max\n"
@@ -53,6 +59,47 @@ class TestTraceroute(unittest.TestCase):
         result = traceroute("2001:4860:4860::8888", ipv6=True)
         self.assertEqual(result, expected_hops)
 
+    @unittest.skipUnless(icmp.available(), "unprivileged ICMP sockets not permitted")
+    @patch('subprocess.run')
+    def test_native_traceroute_loopback(self, mock_subprocess):
+        """Native engine reaches loopback in one hop without spawning traceroute"""
+        result = traceroute("127.0.0.1", timeout=1)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0][:2], ('1', '127.0.0.1'))
+        self.assertEqual(result[0][2][1], 'ms')
+        float(result[0][2][0])
+        mock_subprocess.assert_not_called()
+
+    @unittest.skipUnless(icmp.available(ipv6=True), "unprivileged ICMPv6 sockets not permitted")
+    def test_native_traceroute_loopback_ipv6(self):
+        result = traceroute("::1", timeout=1, ipv6=True)
+        self.assertEqual(result[0][:2], ('1', '::1'))
+
+    @unittest.skipUnless(icmp.available(), "unprivileged ICMP sockets not permitted")
+    def test_native_traceroute_unresolvable(self):
+        self.assertIsNone(traceroute("host.invalid", timeout=0.1))
+
+    def test_parse_extended_error(self):
+        """Time-exceeded error from 10.0.0.1 as queued by IP_RECVERR"""
+        data = struct.pack('=IBBBBII', 113, icmp.SO_EE_ORIGIN_ICMP, 11, 0, 0, 0, 0)
+        data += struct.pack('=HH4s8x', socket.AF_INET, 0, socket.inet_aton('10.0.0.1'))
+        
+        origin, icmp_type, code, offender = icmp.parse_extended_error(data, socket.AF_INET)
+        
+        self.assertEqual(origin, icmp.SO_EE_ORIGIN_ICMP)
+        self.assertEqual(icmp_type, icmp.ICMP_TIME_EXCEEDED)
+        self.assertEqual(offender, '10.0.0.1')
+
+    def test_parse_extended_error_ipv6(self):
+        data = struct.pack('=IBBBBII', 113, icmp.SO_EE_ORIGIN_ICMP6, 3, 0, 0, 0, 0)
+        data += struct.pack('=HHI16sI', socket.AF_INET6, 0, 0,
+                            socket.inet_pton(socket.AF_INET6, '2001:db8::1'), 0)
+        
+        _, icmp_type, _, offender = icmp.parse_extended_error(data, socket.AF_INET6)
+        
+        self.assertEqual(icmp_type, icmp.ICMPV6_TIME_EXCEEDED)
+        self.assertEqual(offender, '2001:db8::1')
+
     def test_real_traceroute(self):
         """Integration test with real traceroute to Google's DNS"""
         result = traceroute("8.8.8.8")